@@ -1,2 +1,16 @@
+from django.contrib import admin
 
-# Register your models here.
+from .models import FridgeSummary, UserSummary
+
+# 統計計數由寫入路徑維護，後台只供檢視；數值有誤時執行 manage.py rebuild_summaries
+
+
+@admin.register(FridgeSummary)
+class FridgeSummaryAdmin(admin.ModelAdmin):
+    list_display = ('fridge_device', 'item_count', 'pending_photo_count', 'updated_at')
+    readonly_fields = ('fridge_device', 'item_count', 'pending_photo_count', 'updated_at')
+
+@admin.register(UserSummary)
+class UserSummaryAdmin(admin.ModelAdmin):
+    list_display = ('user', 'item_count', 'expiring_count', 'expiring_until', 'updated_at')
+    readonly_fields = ('user', 'item_count', 'expiring_count', 'expiring_until', 'updated_at')
@@ -0,0 +1,161 @@
+import statistics
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from apps.core.pagination import KeysetPaginator
+from apps.fridges.models import FridgeDevice
+from apps.inventory.models import RecognizedItem
+from apps.photos.models import Photo
+
+SEED_PREFIX = 'bench-pagination-'
+ITEMS_PER_PHOTO = 5
+BATCH_SIZE = 10_000
+PLAN_LINES = 6
+
+
+@contextmanager
+def explicit_timestamps(*fields):
+    # 播種時寫入分散的時間，而不是 auto_now_add 的目前時間
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = '以大量播種資料比較 OFFSET 與游標分頁在物品/照片列表上的延遲與查詢計畫'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='播種的辨識物品數 (照片數為其 1/5)')
+        parser.add_argument('--devices', type=int, default=20, help='播種的冰箱數')
+        parser.add_argument('--users', type=int, default=50, help='播種的用戶數')
+        parser.add_argument('--depth', type=int, default=10_000, help='比較的頁面位置 (略過的列數)')
+        parser.add_argument('--page-size', type=int, default=30, help='每頁筆數')
+        parser.add_argument('--repeat', type=int, default=5, help='每個查詢執行的次數')
+        parser.add_argument('--cleanup', action='store_true', help='刪除播種的資料後結束')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self._cleanup()
+            return
+
+        devices, users = self._seed(options)
+        device, user = devices[0], users[0]
+        listings = (
+            ('item_list', RecognizedItem.objects.all(), ('-added_at', '-id')),
+            ('items_by_owner', RecognizedItem.objects.filter(owner=user), ('-added_at', '-id')),
+            ('photo_list', Photo.objects.all(), ('-uploaded_at', '-id')),
+            ('photos_by_fridge', Photo.objects.filter(fridge_device=device), ('-uploaded_at', '-id')),
+            ('pending_photos', Photo.objects.filter(recognition_status='pending'), ('uploaded_at', 'id')),
+        )
+
+        depth, size = options['depth'], options['page_size']
+        self.stdout.write(f"{'listing':<18} {'offset ms':>10} {'keyset ms':>10} {'first page ms':>14}")
+        plans = []
+        for name, queryset, ordering in listings:
+            ordered = queryset.order_by(*ordering)
+            anchor = ordered[depth - 1:depth].first() if depth else None
+            paginator = KeysetPaginator(queryset, ordering, size)
+            cursor = paginator.cursor_after(anchor) if anchor is not None else None
+
+            offset_ms = self._time(lambda o=ordered: list(o[depth:depth + size]), options['repeat'])
+            keyset_ms = self._time(lambda p=paginator, c=cursor: p.page(c), options['repeat'])
+            first_ms = self._time(lambda p=paginator: p.page(), options['repeat'])
+            self.stdout.write(f"{name:<18} {offset_ms:>10.2f} {keyset_ms:>10.2f} {first_ms:>14.2f}")
+
+            if cursor is not None:
+                plans.append((name, ordered[depth:depth + size].explain(), paginator.query(cursor).explain()))
+
+        for name, offset_plan, keyset_plan in plans:
+            self.stdout.write(f"\n== {name} (OFFSET {depth}) ==")
+            self.stdout.write('\n'.join(offset_plan.splitlines()[:PLAN_LINES]))
+            self.stdout.write(f"== {name} (keyset) ==")
+            self.stdout.write('\n'.join(keyset_plan.splitlines()[:PLAN_LINES]))
+
+    @staticmethod
+    def _time(query, repeat: int) -> float:
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            query()
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def _seed(self, options) -> tuple[list[FridgeDevice], list]:
+        user_model = get_user_model()
+        devices = list(FridgeDevice.objects.filter(device_id_esp__startswith=SEED_PREFIX).order_by('id'))
+        users = list(user_model.objects.filter(username__startswith=SEED_PREFIX).order_by('id'))
+        existing = RecognizedItem.objects.filter(photo__fridge_device__in=devices).count() if devices else 0
+        if existing >= options['rows']:
+            self.stdout.write(f"沿用已播種的 {existing} 筆物品 (以 --cleanup 刪除)")
+            return devices, users
+
+        if not devices:
+            devices = FridgeDevice.objects.bulk_create([
+                FridgeDevice(name=f"{SEED_PREFIX}{index}", device_id_esp=f"{SEED_PREFIX}{index}")
+                for index in range(options['devices'])
+            ])
+        if not users:
+            users = user_model.objects.bulk_create([
+                user_model(username=f"{SEED_PREFIX}{index}") for index in range(options['users'])
+            ])
+
+        photo_count = (options['rows'] - existing) // ITEMS_PER_PHOTO
+        started_at = timezone.now() - timedelta(minutes=photo_count)
+        statuses = ('completed',) * 18 + ('pending', 'failed')
+        started = time.perf_counter()
+        uploaded_at = Photo._meta.get_field('uploaded_at')
+        added_at = RecognizedItem._meta.get_field('added_at')
+        with explicit_timestamps(uploaded_at, added_at):
+            for offset in range(0, photo_count, BATCH_SIZE):
+                with transaction.atomic():
+                    photos = Photo.objects.bulk_create([
+                        Photo(
+                            fridge_device=devices[index % len(devices)],
+                            image=f"fridge_photos/bench/{index}.jpg",
+                            timestamp_esp=started_at + timedelta(minutes=index),
+                            uploaded_at=started_at + timedelta(minutes=index),
+                            uploaded_by=users[index % len(users)],
+                            recognition_status=statuses[index % len(statuses)],
+                        )
+                        for index in range(offset, min(offset + BATCH_SIZE, photo_count))
+                    ])
+                    RecognizedItem.objects.bulk_create([
+                        RecognizedItem(
+                            photo=photo,
+                            name=f"物品 {slot}",
+                            quantity='1 個',
+                            estimated_expiry_info='一週內',
+                            placement_date=photo.uploaded_at.date(),
+                            owner=users[(photo.id + slot) % len(users)],
+                            added_at=photo.uploaded_at + timedelta(seconds=slot),
+                        )
+                        for photo in photos
+                        for slot in range(ITEMS_PER_PHOTO)
+                    ], batch_size=BATCH_SIZE)
+                self.stdout.write(f"已播種 {min(offset + BATCH_SIZE, photo_count)}/{photo_count} 張照片")
+        self.stdout.write(f"播種完成，耗時 {time.perf_counter() - started:.1f} 秒")
+        return devices, users
+
+    def _cleanup(self) -> None:
+        devices = FridgeDevice.objects.filter(device_id_esp__startswith=SEED_PREFIX)
+        photos = Photo.objects.filter(fridge_device__in=devices)
+        # 分批刪除，避免一次載入所有關聯物件
+        while True:
+            ids = list(photos.values_list('id', flat=True)[:BATCH_SIZE])
+            if not ids:
+                break
+            RecognizedItem.objects.filter(photo_id__in=ids).delete()
+            Photo.objects.filter(id__in=ids).delete()
+        devices.delete()
+        get_user_model().objects.filter(username__startswith=SEED_PREFIX).delete()
+        self.stdout.write('已刪除播種的資料')
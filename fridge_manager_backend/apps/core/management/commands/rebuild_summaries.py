@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.core.services import SummaryService
+
+
+class Command(BaseCommand):
+    help = '從庫存與照片資料表重建冰箱與用戶的統計計數 (FridgeSummary / UserSummary)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批重建的用戶數')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        fridges = SummaryService.rebuild_fridges()
+        users = SummaryService.rebuild_users(batch_size=options['batch_size'])
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(f"已重建 {fridges} 台冰箱與 {users} 位用戶的統計，耗時 {elapsed:.1f} 秒"))
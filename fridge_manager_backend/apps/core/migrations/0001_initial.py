@@ -0,0 +1,45 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:36
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('fridges', '0006_fridgedevice_inventory_synced_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FridgeSummary',
+            fields=[
+                ('fridge_device', models.OneToOneField(help_text='冰箱', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to='fridges.fridgedevice')),
+                ('item_count', models.IntegerField(default=0, help_text='目前庫存物品數')),
+                ('pending_photo_count', models.IntegerField(default=0, help_text='等待或正在辨識的照片數')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '冰箱統計',
+                'verbose_name_plural': '冰箱統計',
+            },
+        ),
+        migrations.CreateModel(
+            name='UserSummary',
+            fields=[
+                ('user', models.OneToOneField(help_text='用戶', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('item_count', models.IntegerField(default=0, help_text='冰箱中屬於此用戶的庫存物品數')),
+                ('expiring_count', models.IntegerField(default=0, help_text='expiring_until 之前 (含) 可能到期的物品數')),
+                ('expiring_until', models.DateField(blank=True, help_text='expiring_count 計算時採用的到期日上限', null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': '用戶統計',
+                'verbose_name_plural': '用戶統計',
+            },
+        ),
+    ]
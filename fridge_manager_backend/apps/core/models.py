@@ -1,2 +1,55 @@
+from django.conf import settings
+from django.db import models
 
-# Create your models here.
+
+class FridgeSummary(models.Model):
+    """
+    冰箱的統計計數，供首頁等儀表板直接讀取
+
+    由庫存與照片狀態的寫入路徑在同一交易中增量更新 (apps/core/services.py)，
+    manage.py rebuild_summaries 可從來源資料表重建。
+    """
+    fridge_device = models.OneToOneField(
+        'fridges.FridgeDevice',
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='summary',
+        help_text="冰箱"
+    )
+    item_count = models.IntegerField(default=0, help_text="目前庫存物品數")
+    pending_photo_count = models.IntegerField(default=0, help_text="等待或正在辨識的照片數")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "冰箱統計"
+        verbose_name_plural = "冰箱統計"
+
+    def __str__(self):
+        return f"冰箱 {self.fridge_device_id}: {self.item_count} 項物品，{self.pending_photo_count} 張待辨識"
+
+
+class UserSummary(models.Model):
+    """
+    用戶的統計計數，供首頁等儀表板直接讀取
+
+    expiring_count 為最早到期日不晚於 expiring_until 的庫存物品數 (含已過期)；
+    日期改變後第一次讀取時以一次索引查詢重算並更新 expiring_until。
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='summary',
+        help_text="用戶"
+    )
+    item_count = models.IntegerField(default=0, help_text="冰箱中屬於此用戶的庫存物品數")
+    expiring_count = models.IntegerField(default=0, help_text="expiring_until 之前 (含) 可能到期的物品數")
+    expiring_until = models.DateField(null=True, blank=True, help_text="expiring_count 計算時採用的到期日上限")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "用戶統計"
+        verbose_name_plural = "用戶統計"
+
+    def __str__(self):
+        return f"用戶 {self.user_id}: {self.item_count} 項物品，{self.expiring_count} 項即將到期"
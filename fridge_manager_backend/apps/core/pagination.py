@@ -0,0 +1,181 @@
+import base64
+import binascii
+import json
+import logging
+
+from django.conf import settings
+from django.db.models import Q
+
+logger = logging.getLogger(__name__)
+
+CURSOR_PARAM = 'cursor'
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+class KeysetPage:
+    """
+    一頁的查詢結果與前後頁的游標
+
+    Attributes:
+        object_list: 本頁的物件
+        has_next / has_previous: 是否有下一頁 / 上一頁
+        next_cursor / previous_cursor: 前往下一頁 / 上一頁的游標，沒有時為 None
+        next_query / previous_query: 保留其他查詢參數的查詢字串 (由 paginate_keyset 設定)
+    """
+    def __init__(self, object_list: list, next_cursor: str | None, previous_cursor: str | None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.has_next = next_cursor is not None
+        self.has_previous = previous_cursor is not None
+        self.next_query = ''
+        self.previous_query = ''
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    以排序欄位的值 (游標) 分頁，取代 OFFSET 分頁
+
+    OFFSET 分頁越往後需要掃過並丟棄越多列；游標分頁以
+    `WHERE (排序欄位) < (上一頁最後一列的值)` 直接從索引定位，任何一頁的成本都相同。
+    排序欄位不可為 NULL，且最後一個欄位須唯一 (通常為 'id' / '-id')，
+    查詢應有與排序相符的索引。
+
+    用法：
+        paginator = KeysetPaginator(Photo.objects.all(), ('-uploaded_at', '-id'), per_page=30)
+        page = paginator.page(request.GET.get('cursor'))
+    """
+    def __init__(self, queryset, ordering: tuple[str, ...], per_page: int):
+        self.queryset = queryset
+        self.ordering = ordering
+        self.per_page = per_page
+        self._fields = [
+            (name.lstrip('-'), name.startswith('-'), queryset.model._meta.get_field(name.lstrip('-')))
+            for name in ordering
+        ]
+
+    def _encode(self, direction: str, obj) -> str:
+        values = [field.value_to_string(obj) for _, _, field in self._fields]
+        payload = json.dumps([direction, values], separators=(',', ':')).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def _decode(self, cursor: str) -> tuple[str, list]:
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            direction, raw_values = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in (NEXT, PREVIOUS) or len(raw_values) != len(self._fields):
+                raise ValueError(cursor)
+            values = [field.to_python(value) for (_, _, field), value in zip(self._fields, raw_values, strict=True)]
+        except (binascii.Error, TypeError, ValueError) as e:
+            raise ValueError(f"無效的分頁游標: {cursor}") from e
+        return direction, values
+
+    def _after(self, values: list, backwards: bool, index: int = 0) -> Q:
+        # 展開為 a <= x AND (a < x OR (a = x AND 後續欄位...))，讓資料庫能以索引範圍掃描
+        name, descending, _ = self._fields[index]
+        op = 'lt' if descending != backwards else 'gt'
+        strict = Q(**{f"{name}__{op}": values[index]})
+        if index == len(self._fields) - 1:
+            return strict
+        inclusive = Q(**{f"{name}__{op}e": values[index]})
+        return inclusive & (strict | (Q(**{name: values[index]}) & self._after(values, backwards, index + 1)))
+
+    def cursor_after(self, obj) -> str:
+        """
+        產生從 obj 之後開始的游標 (例如從搜尋結果或書籤直接跳到某個位置)
+
+        Args:
+            obj: 查詢中的一個物件
+
+        Returns:
+            str: 可傳給 page() 的游標
+        """
+        return self._encode(NEXT, obj)
+
+    def query(self, cursor: str | None = None):
+        """
+        游標所指一頁的查詢 (多取一列用於判斷是否還有下一頁)，可用於 explain()
+
+        Args:
+            cursor: 前一頁返回的游標，None 表示第一頁
+
+        Returns:
+            QuerySet: 已排序、篩選並切片的查詢
+
+        Raises:
+            ValueError: 當游標無法解析時拋出
+        """
+        direction, values = self._decode(cursor) if cursor else (NEXT, None)
+        backwards = direction == PREVIOUS
+        ordering = [
+            (f"-{name}" if descending != backwards else name) for name, descending, _ in self._fields
+        ]
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self._after(values, backwards))
+        return queryset[:self.per_page + 1]
+
+    def page(self, cursor: str | None = None) -> KeysetPage:
+        """
+        獲取游標所指的一頁
+
+        Args:
+            cursor: 前一頁返回的 next_cursor / previous_cursor，None 表示第一頁
+
+        Returns:
+            KeysetPage: 本頁結果
+
+        Raises:
+            ValueError: 當游標無法解析時拋出
+        """
+        rows = list(self.query(cursor))
+        backwards = bool(cursor) and self._decode(cursor)[0] == PREVIOUS
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+
+        if not rows:
+            return KeysetPage([], None, None)
+        has_next = has_more if not backwards else True
+        has_previous = bool(cursor) if not backwards else has_more
+        return KeysetPage(
+            rows,
+            self._encode(NEXT, rows[-1]) if has_next else None,
+            self._encode(PREVIOUS, rows[0]) if has_previous else None,
+        )
+
+
+def paginate_keyset(request, queryset, ordering: tuple[str, ...], per_page: int | None = None) -> KeysetPage:
+    """
+    依請求中的游標分頁，並產生保留其他查詢參數 (例如篩選條件) 的前後頁查詢字串
+
+    Args:
+        request: HttpRequest
+        queryset: 要分頁的查詢
+        ordering: 排序欄位，最後一個須唯一，例如 ('-uploaded_at', '-id')
+        per_page: 每頁筆數，預設為 settings.LIST_PAGE_SIZE
+
+    Returns:
+        KeysetPage: 本頁結果；游標無效時返回第一頁
+    """
+    paginator = KeysetPaginator(queryset, ordering, per_page or settings.LIST_PAGE_SIZE)
+    try:
+        page = paginator.page(request.GET.get(CURSOR_PARAM))
+    except ValueError as e:
+        logger.warning(str(e))
+        page = paginator.page()
+
+    for attribute, cursor in (('next_query', page.next_cursor), ('previous_query', page.previous_cursor)):
+        if cursor is not None:
+            params = request.GET.copy()
+            params[CURSOR_PARAM] = cursor
+            setattr(page, attribute, params.urlencode())
+    return page
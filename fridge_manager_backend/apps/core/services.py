@@ -0,0 +1,230 @@
+import logging
+from collections import Counter, defaultdict
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.db.models import Case, Count, F, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from apps.fridges.models import FridgeDevice
+from apps.inventory.models import FridgeInventoryItem
+from apps.photos.models import Photo
+
+from .models import FridgeSummary, UserSummary
+
+logger = logging.getLogger(__name__)
+
+# 首頁「本週到期」的天數 (今天 + N 天內，含已過期)，條件與 ExpiryDateService.expiring_within 相同
+EXPIRING_DAYS = 7
+# 計入待辨識照片數的狀態
+PENDING_STATUSES = ('pending', 'processing')
+
+
+class SummaryService:
+    """
+    FridgeSummary / UserSummary 統計計數的增量更新、讀取與重建
+
+    寫入路徑 (InventoryReconciliationService、PhotoIngestService、PhotoStatusService
+    與冰箱快照) 在與來源資料相同的交易中以 F() 表達式加減計數，只更新已存在的
+    統計列；尚未建立的統計列在第一次讀取時從來源資料表計算。刪除用戶、冰箱或
+    照片等未經上述路徑的變更可能造成誤差，以 rebuild_fridges / rebuild_users 修復。
+    """
+
+    @staticmethod
+    def expiring_until() -> date:
+        """「本週到期」的到期日上限"""
+        return timezone.localdate() + timedelta(days=EXPIRING_DAYS)
+
+    @staticmethod
+    def record_inventory(device_id: int, added: list[tuple], removed: list[tuple]) -> None:
+        """
+        記錄冰箱庫存的增減 (需在寫入 FridgeInventoryItem 的交易中呼叫)
+
+        最早到期日改變的物品以「移除舊值、加入新值」各記錄一次，物品數不變。
+
+        Args:
+            device_id: FridgeDevice 的 ID
+            added: 新增物品的 (owner_id, expiry_min_date)
+            removed: 移除物品的 (owner_id, expiry_min_date)
+        """
+        fridge_delta = len(added) - len(removed)
+        if fridge_delta:
+            FridgeSummary.objects.filter(fridge_device_id=device_id).update(
+                item_count=F('item_count') + fridge_delta
+            )
+
+        window = SummaryService.expiring_until()
+        deltas = defaultdict(lambda: [0, 0])
+        for sign, entries in ((1, added), (-1, removed)):
+            for owner_id, expiry_min_date in entries:
+                if owner_id is None:
+                    continue
+                deltas[owner_id][0] += sign
+                if expiry_min_date is not None and expiry_min_date <= window:
+                    deltas[owner_id][1] += sign
+        for owner_id, (item_delta, expiring_delta) in deltas.items():
+            if not item_delta and not expiring_delta:
+                continue
+            UserSummary.objects.filter(user_id=owner_id).update(
+                item_count=F('item_count') + item_delta,
+                # 只調整以今天的到期日上限計算的數量，其他的會在讀取時重算
+                expiring_count=Case(
+                    When(expiring_until=window, then=F('expiring_count') + expiring_delta),
+                    default=F('expiring_count'),
+                ),
+            )
+
+    @staticmethod
+    def record_pending_photos(device_ids: list[int], delta: int = 1) -> None:
+        """
+        記錄待辨識照片的增減 (需在寫入照片或切換狀態的交易中呼叫)
+
+        Args:
+            device_ids: 每張照片的 fridge_device_id (可重複)
+            delta: 新建照片為 1，辨識完成或失敗為 -1
+        """
+        for device_id, count in Counter(device_ids).items():
+            FridgeSummary.objects.filter(fridge_device_id=device_id).update(
+                pending_photo_count=F('pending_photo_count') + count * delta
+            )
+
+    @staticmethod
+    def for_user(user) -> UserSummary:
+        """
+        讀取用戶的統計計數，必要時建立統計列或重算本週到期的數量
+
+        Args:
+            user: 用戶
+
+        Returns:
+            UserSummary: 用戶的統計計數
+        """
+        window = SummaryService.expiring_until()
+        summary = UserSummary.objects.filter(user=user).first()
+        if summary is None:
+            SummaryService.rebuild_users([user.id])
+            return UserSummary.objects.get(user=user)
+        if summary.expiring_until != window:
+            # 以單一 UPDATE 重算，經由 (owner, expiry_min_date) 索引計數
+            UserSummary.objects.filter(pk=summary.pk).update(
+                expiring_count=SummaryService._expiring_subquery(window),
+                expiring_until=window,
+            )
+            summary.refresh_from_db(fields=['expiring_count', 'expiring_until'])
+        return summary
+
+    @staticmethod
+    def for_fridges(devices: list[FridgeDevice]) -> dict[int, FridgeSummary]:
+        """
+        讀取多台冰箱的統計計數，缺少的統計列會先從來源資料表建立
+
+        Args:
+            devices: FridgeDevice 實例
+
+        Returns:
+            Dict[int, FridgeSummary]: 以 fridge_device_id 為鍵的統計計數
+        """
+        device_ids = [device.id for device in devices]
+        summaries = FridgeSummary.objects.in_bulk(device_ids)
+        missing = [device_id for device_id in device_ids if device_id not in summaries]
+        if missing:
+            SummaryService.rebuild_fridges(missing)
+            summaries.update(FridgeSummary.objects.in_bulk(missing))
+        return summaries
+
+    @staticmethod
+    def rebuild_fridges(device_ids: list[int] | None = None) -> int:
+        """
+        以 GROUP BY 從來源資料表重建冰箱的統計計數
+
+        Args:
+            device_ids: 只重建這些冰箱，預設為全部
+
+        Returns:
+            int: 重建的冰箱數
+        """
+        devices = FridgeDevice.objects.all()
+        if device_ids is not None:
+            devices = devices.filter(id__in=device_ids)
+        device_ids = list(devices.values_list('id', flat=True))
+        item_counts = dict(
+            FridgeInventoryItem.objects.filter(fridge_device_id__in=device_ids)
+            .values('fridge_device_id').annotate(count=Count('id')).values_list('fridge_device_id', 'count')
+        )
+        pending_counts = dict(
+            Photo.objects.filter(fridge_device_id__in=device_ids, recognition_status__in=PENDING_STATUSES)
+            .values('fridge_device_id').annotate(count=Count('id')).values_list('fridge_device_id', 'count')
+        )
+        FridgeSummary.objects.bulk_create(
+            [
+                FridgeSummary(
+                    fridge_device_id=device_id,
+                    item_count=item_counts.get(device_id, 0),
+                    pending_photo_count=pending_counts.get(device_id, 0),
+                )
+                for device_id in device_ids
+            ],
+            update_conflicts=True,
+            unique_fields=['fridge_device'],
+            update_fields=['item_count', 'pending_photo_count', 'updated_at'],
+        )
+        return len(device_ids)
+
+    @staticmethod
+    def rebuild_users(user_ids: list[int] | None = None, batch_size: int = 1000) -> int:
+        """
+        以 GROUP BY 從來源資料表重建用戶的統計計數，依用戶 ID 分批進行
+
+        Args:
+            user_ids: 只重建這些用戶，預設為全部
+            batch_size: 每批處理的用戶數
+
+        Returns:
+            int: 重建的用戶數
+        """
+        users = get_user_model().objects.order_by('id')
+        if user_ids is not None:
+            users = users.filter(id__in=user_ids)
+        window = SummaryService.expiring_until()
+        rebuilt = 0
+        last_id = 0
+        while True:
+            batch = list(users.filter(id__gt=last_id).values_list('id', flat=True)[:batch_size])
+            if not batch:
+                break
+            last_id = batch[-1]
+            items = FridgeInventoryItem.objects.filter(owner_id__in=batch).values('owner_id')
+            item_counts = dict(items.annotate(count=Count('id')).values_list('owner_id', 'count'))
+            expiring_counts = dict(
+                items.filter(expiry_min_date__lte=window)
+                .annotate(count=Count('id')).values_list('owner_id', 'count')
+            )
+            UserSummary.objects.bulk_create(
+                [
+                    UserSummary(
+                        user_id=user_id,
+                        item_count=item_counts.get(user_id, 0),
+                        expiring_count=expiring_counts.get(user_id, 0),
+                        expiring_until=window,
+                    )
+                    for user_id in batch
+                ],
+                update_conflicts=True,
+                unique_fields=['user'],
+                update_fields=['item_count', 'expiring_count', 'expiring_until', 'updated_at'],
+            )
+            rebuilt += len(batch)
+        return rebuilt
+
+    @staticmethod
+    def _expiring_subquery(window: date):
+        counts = (
+            FridgeInventoryItem.objects
+            .filter(owner_id=OuterRef('user_id'), expiry_min_date__lte=window)
+            .order_by()
+            .values('owner_id')
+            .annotate(count=Count('id'))
+            .values('count')
+        )
+        return Coalesce(Subquery(counts), Value(0))
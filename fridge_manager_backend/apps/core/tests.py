@@ -1,2 +1,117 @@
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+from django.utils import timezone
+
+from apps.fridges.models import FridgeDevice
+from apps.inventory.models import RecognizedItem
+from apps.inventory.services import ExpiryDateService, InventoryReconciliationService
+from apps.photos.models import Photo
+from apps.photos.services import PhotoStatusService
+
+from .models import FridgeSummary, UserSummary
+from .pagination import KeysetPaginator, paginate_keyset
+from .services import EXPIRING_DAYS, SummaryService
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.device = FridgeDevice.objects.create(name="測試冰箱", device_id_esp='fridge-1')
+        now = timezone.now()
+        # 兩兩相同的上傳時間，確認以 id 區分同一時間的照片
+        for index in range(7):
+            photo = Photo.objects.create(
+                fridge_device=self.device, image='fridge_photos/test.jpg', timestamp_esp=now
+            )
+            Photo.objects.filter(pk=photo.pk).update(uploaded_at=now - timedelta(minutes=index // 2))
+        self.expected = list(Photo.objects.order_by('-uploaded_at', '-id').values_list('id', flat=True))
+        self.paginator = KeysetPaginator(Photo.objects.all(), ('-uploaded_at', '-id'), per_page=3)
+
+    def ids(self, page) -> list[int]:
+        return [photo.id for photo in page]
+
+    def test_walks_forward_and_back(self):
+        pages = [self.paginator.page()]
+        while pages[-1].has_next:
+            pages.append(self.paginator.page(pages[-1].next_cursor))
+
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual([photo_id for page in pages for photo_id in self.ids(page)], self.expected)
+        self.assertFalse(pages[0].has_previous)
+
+        back = self.paginator.page(pages[-1].previous_cursor)
+        self.assertEqual(self.ids(back), self.ids(pages[1]))
+        back = self.paginator.page(back.previous_cursor)
+        self.assertEqual(self.ids(back), self.ids(pages[0]))
+        self.assertFalse(back.has_previous)
+
+    def test_invalid_cursor_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.paginator.page('not-a-cursor')
+
+    def test_paginate_keyset_keeps_filters_and_falls_back_to_first_page(self):
+        request = RequestFactory().get('/photos/', {'device': self.device.id, 'cursor': 'broken'})
+        page = paginate_keyset(request, Photo.objects.all(), ('-uploaded_at', '-id'), per_page=3)
+
+        self.assertEqual(self.ids(page), self.expected[:3])
+        self.assertIn(f'device={self.device.id}', page.next_query)
+        self.assertIn(f'cursor={page.next_cursor}', page.next_query)
+
+
+class SummaryServiceTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice')
+        self.device = FridgeDevice.objects.create(name="測試冰箱", device_id_esp='fridge-1')
+
+    def create_photo(self, *items: dict) -> Photo:
+        photo = Photo.objects.create(
+            fridge_device=self.device, image='fridge_photos/test.jpg', timestamp_esp=timezone.now(),
+            uploaded_by=self.user,
+        )
+        for item in items:
+            RecognizedItem.objects.create(
+                photo=photo, placement_date=timezone.localdate(), owner=self.user, **item
+            )
+        return photo
+
+    def counters(self) -> tuple:
+        fridge = SummaryService.for_fridges([self.device])[self.device.id]
+        user = SummaryService.for_user(self.user)
+        return fridge.item_count, fridge.pending_photo_count, user.item_count, user.expiring_count
+
+    def assert_matches_rebuild(self):
+        counted = self.counters()
+        SummaryService.rebuild_fridges([self.device.id])
+        SummaryService.rebuild_users([self.user.id])
+        self.assertEqual(self.counters(), counted)
+
+    def test_counters_follow_inventory_and_photo_status(self):
+        photo = self.create_photo(
+            {'name': '牛奶', 'quantity': '1 瓶', 'estimated_expiry_info': '約3天'},
+            {'name': '雞蛋', 'quantity': '6 顆', 'estimated_expiry_info': '2-3週'},
+            {'name': '果醬', 'quantity': '1 罐', 'estimated_expiry_info': '一個月內'},
+        )
+        # 第一次讀取時從來源資料表建立統計列
+        self.assertEqual(self.counters(), (0, 1, 0, 0))
+
+        photo = PhotoStatusService.claim(photo.id)
+        InventoryReconciliationService.reconcile(photo)
+        PhotoStatusService.transition(photo, 'completed')
+
+        self.assertEqual(self.counters(), (3, 0, 3, 1))
+        self.assert_matches_rebuild()
+        # 與庫存列表的 ?expiring 篩選及到期提醒採用相同的條件
+        expiring = ExpiryDateService.expiring_within(EXPIRING_DAYS, owner=self.user)
+        self.assertEqual(list(expiring.values_list('name', flat=True)), ['牛奶'])
+
+    def test_removing_an_item_updates_counters(self):
+        photo = self.create_photo({'name': '牛奶', 'quantity': '1 瓶', 'estimated_expiry_info': '約3天'})
+        self.counters()
+        InventoryReconciliationService.reconcile(photo)
+
+        InventoryReconciliationService.remove_item(photo.recognized_items.get())
+
+        self.assertEqual(FridgeSummary.objects.get(fridge_device=self.device).item_count, 0)
+        self.assertEqual(UserSummary.objects.get(user=self.user).expiring_count, 0)
+        self.assert_matches_rebuild()
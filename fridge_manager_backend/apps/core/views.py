@@ -1,11 +1,24 @@
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render
 
+from apps.fridges.models import FridgeDevice
+
+from .services import EXPIRING_DAYS, SummaryService
+
 # Create your views here.
 
 @login_required
 def home(request):
     """
-    首頁視圖
+    首頁視圖 (統計數字直接讀取 UserSummary / FridgeSummary)
     """
-    return render(request, 'core/home.html')
+    context = {
+        'summary': SummaryService.for_user(request.user),
+        'expiring_days': EXPIRING_DAYS,
+    }
+    if request.user.is_staff:
+        devices = list(FridgeDevice.objects.filter(is_active=True).order_by('name'))
+        summaries = SummaryService.for_fridges(devices)
+        context['fridge_summaries'] = [(device, summaries[device.id]) for device in devices]
+        context['pending_photo_total'] = sum(summary.pending_photo_count for summary in summaries.values())
+    return render(request, 'core/home.html', context)
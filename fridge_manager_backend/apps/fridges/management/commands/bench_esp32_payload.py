@@ -0,0 +1,84 @@
+import base64
+import io
+import os
+import statistics
+import time
+import tracemalloc
+
+import requests
+from django.core.management.base import BaseCommand
+
+from apps.fridges.models import FridgeDevice
+from apps.fridges.services import ESP32CamService
+
+BENCH_DEVICE_ID = 'bench_device'
+
+
+def build_payload(image_size: int) -> bytes:
+    """按照 arduino/app_httpd.cpp 的格式組出 /api/photos 響應"""
+    image = os.urandom(image_size)
+    return (
+        '{'
+        f'"id": "{BENCH_DEVICE_ID}",'
+        '"timestamp": "2025-01-01T00:00:00Z",'
+        f'"image_base64": "{base64.b64encode(image).decode()}",'
+        '"content_type": "image/jpeg"'
+        '}'
+    ).encode()
+
+
+def make_response(payload: bytes) -> requests.Response:
+    """以記憶體中的數據模擬一個 ESP32-CAM 的 HTTP 響應"""
+    response = requests.Response()
+    response.status_code = 200
+    response.headers['Content-Type'] = 'application/json; charset=UTF-8'
+    response.encoding = 'utf-8'
+    response.raw = io.BytesIO(payload)
+    return response
+
+
+def run_legacy(payload: bytes, device: FridgeDevice) -> int:
+    data = ESP32CamService.parse_json_response(make_response(payload), device)
+    image_data = ESP32CamService.decode_base64_image(data['image_base64'])
+    return len(image_data)
+
+
+def run_streaming(payload: bytes, device: FridgeDevice) -> int:
+    data = ESP32CamService.parse_stream_response(make_response(payload), device)
+    with data['image']:
+        return data['image_size']
+
+
+class Command(BaseCommand):
+    help = '比較 /api/photos 響應的完整解析與串流解析的耗時與記憶體峰值'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,200,300', help='圖片大小 (KB)，以逗號分隔')
+        parser.add_argument('--repeat', type=int, default=20, help='每種大小重複次數')
+
+    def handle(self, *args, **options):
+        device = FridgeDevice(name='benchmark', device_id_esp=BENCH_DEVICE_ID, api_url='http://benchmark')
+        sizes = [int(size) * 1024 for size in options['sizes'].split(',')]
+        runners = [('legacy', run_legacy), ('streaming', run_streaming)]
+
+        self.stdout.write(f"{'size':>8} {'path':>10} {'median ms':>10} {'peak KB':>10}")
+        for size in sizes:
+            payload = build_payload(size)
+            for name, runner in runners:
+                durations = []
+                for _ in range(options['repeat']):
+                    started = time.perf_counter()
+                    decoded = runner(payload, device)
+                    durations.append((time.perf_counter() - started) * 1000)
+                if decoded != size:
+                    raise RuntimeError(f"{name} 解碼結果大小不正確: {decoded} != {size}")
+
+                # 記憶體峰值另外量測，避免 tracemalloc 影響耗時
+                tracemalloc.start()
+                runner(payload, device)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                self.stdout.write(
+                    f"{size // 1024:>6}KB {name:>10} {statistics.median(durations):>10.2f} {peak / 1024:>10.0f}"
+                )
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from apps.fridges.services import FridgeSnapshotService
+
+
+class Command(BaseCommand):
+    help = '同時對所有啟用中的冰箱拍照，並回報每台設備的耗時與失敗原因'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='同時拍照的設備數上限')
+        parser.add_argument('--no-recognition', action='store_true', help='只拍照上傳，不送出辨識任務')
+
+    def handle(self, *args, **options):
+        results = FridgeSnapshotService.snapshot_active_fridges(
+            max_workers=options['workers'],
+            enqueue_recognition=not options['no_recognition'],
+        )
+        if not results:
+            self.stdout.write('沒有啟用中的冰箱設備。')
+            return
+
+        self.stdout.write(f"{'device':<20} {'status':<8} {'latency ms':>10} {'capture ms':>10} {'upload ms':>10}  detail")
+        for result in sorted(results, key=lambda result: result['latency_ms'], reverse=True):
+            detail = f"photo_id={result['photo_id']}" if result['status'] == 'success' else result['error']
+            self.stdout.write(
+                f"{result['device_id']:<20} {result['status']:<8} {result['latency_ms']:>10.1f} "
+                f"{result.get('capture_ms', 0):>10.1f} {result.get('upload_ms', 0):>10.1f}  {detail}"
+            )
+
+        failed = [result for result in results if result['status'] != 'success']
+        summary = f"完成 {len(results)} 台，成功 {len(results) - len(failed)} 台，失敗 {len(failed)} 台"
+        self.stdout.write(self.style.WARNING(summary) if failed else self.style.SUCCESS(summary))
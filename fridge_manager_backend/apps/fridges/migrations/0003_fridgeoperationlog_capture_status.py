@@ -0,0 +1,23 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fridges', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fridgeoperationlog',
+            name='capture_error',
+            field=models.TextField(blank=True, help_text='拍照失敗時的錯誤訊息'),
+        ),
+        migrations.AddField(
+            model_name='fridgeoperationlog',
+            name='capture_status',
+            field=models.CharField(choices=[('pending', '等待拍照'), ('capturing', '拍照中'), ('captured', '已拍照'), ('failed', '拍照失敗')], default='pending', help_text='拍照與上傳狀態', max_length=20),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fridges', '0003_fridgeoperationlog_capture_status'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fridgedevice',
+            name='capture_protocol',
+            field=models.CharField(choices=[('json', 'Base64 JSON (/api/photos)'), ('binary', '原始 JPEG (/api/photos/raw)')], default='json', help_text='拍照傳輸協定；選擇原始 JPEG 時若韌體不支援會自動改用 Base64 JSON', max_length=10),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fridges', '0004_fridgedevice_capture_protocol'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fridgedevice',
+            name='recognition_crop_box',
+            field=models.JSONField(blank=True, help_text='辨識前裁切的層架區域 [left, top, right, bottom]，以 0~1 的相對比例表示；留空則使用整張照片', null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fridges', '0005_fridgedevice_recognition_crop_box'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fridgedevice',
+            name='inventory_synced_at',
+            field=models.DateTimeField(blank=True, help_text='目前庫存 (FridgeInventoryItem) 所依據照片的上傳時間，較舊的照片不會覆蓋庫存', null=True),
+        ),
+    ]
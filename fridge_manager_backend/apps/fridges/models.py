@@ -1,8 +1,16 @@
 from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
 
+CROP_BOX_LENGTH = 4
+
 
 class FridgeDevice(models.Model):
+    CAPTURE_PROTOCOL_CHOICES = [
+        ('json', 'Base64 JSON (/api/photos)'),
+        ('binary', '原始 JPEG (/api/photos/raw)'),
+    ]
+
     name = models.CharField(max_length=100, help_text="冰箱名稱，例如：一樓茶水間冰箱")
     device_id_esp = models.CharField(max_length=50, unique=True, help_text="ESP32-CAM 的設備 ID")
     api_url = models.URLField(
@@ -10,7 +18,23 @@ class FridgeDevice(models.Model):
         null=True,
         blank=True
     )
+    capture_protocol = models.CharField(
+        max_length=10,
+        choices=CAPTURE_PROTOCOL_CHOICES,
+        default='json',
+        help_text="拍照傳輸協定；選擇原始 JPEG 時若韌體不支援會自動改用 Base64 JSON"
+    )
+    recognition_crop_box = models.JSONField(
+        null=True,
+        blank=True,
+        help_text="辨識前裁切的層架區域 [left, top, right, bottom]，以 0~1 的相對比例表示；留空則使用整張照片"
+    )
     location_description = models.TextField(blank=True, help_text="冰箱位置描述")
+    inventory_synced_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="目前庫存 (FridgeInventoryItem) 所依據照片的上傳時間，較舊的照片不會覆蓋庫存"
+    )
     is_active = models.BooleanField(default=True, help_text="設備是否啟用")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -22,6 +46,21 @@ class FridgeDevice(models.Model):
     def __str__(self):
         return f"{self.name} ({self.device_id_esp})"
 
+    def clean(self):
+        super().clean()
+        box = self.recognition_crop_box
+        if box is None:
+            return
+        if (
+            not isinstance(box, list)
+            or len(box) != CROP_BOX_LENGTH
+            or not all(isinstance(v, int | float) and 0 <= v <= 1 for v in box)
+        ):
+            raise ValidationError({'recognition_crop_box': '格式應為 [left, top, right, bottom]，數值介於 0 與 1 之間'})
+        left, top, right, bottom = box
+        if left >= right or top >= bottom:
+            raise ValidationError({'recognition_crop_box': '裁切區域的右下角必須大於左上角'})
+
     def get_api_endpoint(self) -> str:
         """
         獲取 API 端點 URL
@@ -33,11 +72,26 @@ class FridgeDevice(models.Model):
             raise ValueError("設備未配置有效的 API 端點")
         return f'{self.api_url}/api/photos'
 
+    def get_raw_photo_endpoint(self) -> str:
+        """
+        獲取原始 JPEG 拍照端點 URL
+
+        Returns:
+            str: 完整的 API 端點 URL，格式為 {api_url}/api/photos/raw
+        """
+        return f'{self.get_api_endpoint()}/raw'
+
 class FridgeOperationLog(models.Model):
     OPERATION_TYPE_CHOICES = [
         ('put_in', '放入物品'),
         ('take_out', '取出物品'),
     ]
+    CAPTURE_STATUS_CHOICES = [
+        ('pending', '等待拍照'),
+        ('capturing', '拍照中'),
+        ('captured', '已拍照'),
+        ('failed', '拍照失敗'),
+    ]
 
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -72,6 +126,16 @@ class FridgeOperationLog(models.Model):
         blank=True,
         help_text="操作備註"
     )
+    capture_status = models.CharField(
+        max_length=20,
+        choices=CAPTURE_STATUS_CHOICES,
+        default='pending',
+        help_text="拍照與上傳狀態"
+    )
+    capture_error = models.TextField(
+        blank=True,
+        help_text="拍照失敗時的錯誤訊息"
+    )
 
     class Meta:
         verbose_name = "冰箱操作記錄"
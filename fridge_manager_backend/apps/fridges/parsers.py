@@ -0,0 +1,218 @@
+import base64
+import binascii
+import hashlib
+import json
+import tempfile
+
+from django.conf import settings
+
+# 以串流方式解碼的欄位；其餘欄位 (id, timestamp, content_type) 都很小，直接保留在記憶體
+IMAGE_FIELD = 'image_base64'
+
+# JSON 字串中可能夾雜、但不屬於 base64 字母表的字元 (轉義的 '\/'、換行)
+_BASE64_NOISE = b'\\\r\n\t '
+_WHITESPACE = b' \t\r\n'
+_BARE_KEY_CHARS = frozenset(b'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_')
+_QUOTE = ord('"')
+_BACKSLASH = ord('\\')
+
+
+class ESP32PhotoStreamParser:
+    """
+    增量解析 ESP32-CAM /api/photos 的 JSON 響應
+
+    響應格式見 arduino/app_httpd.cpp 的 handle_api_get_photo_with_meta：
+    一個只包含字串值的扁平物件。`image_base64` 會在資料到達時分段解碼並寫入
+    SpooledTemporaryFile，因此整個過程中只保留一份 JPEG 二進制數據；
+    同時容忍屬性名沒有引號的格式 (取代 _fix_malformed_json 的整段正則替換)。
+
+    用法：
+        parser = ESP32PhotoStreamParser()
+        for chunk in response.iter_content(chunk_size=...):
+            parser.feed(chunk)
+        result = parser.close()
+    """
+    def __init__(self, image_sink=None):
+        self.fields: dict[str, str] = {}
+        self.image = image_sink if image_sink is not None else tempfile.SpooledTemporaryFile(
+            max_size=settings.ESP32_SPOOL_MAX_BYTES
+        )
+        self.image_size = 0
+        self.image_digest = hashlib.sha256()
+        self.image_received = False
+
+        self._state = self._expect_object_start
+        self._key = bytearray()
+        self._value = bytearray()
+        self._escaped = False
+        self._pending_base64 = b''
+
+    def feed(self, chunk: bytes) -> None:
+        """
+        餵入一段響應數據
+
+        Args:
+            chunk: 任意長度的響應片段
+
+        Raises:
+            ValueError: 當數據不是預期的 JSON 格式時拋出
+        """
+        pos = 0
+        length = len(chunk)
+        while pos < length:
+            pos = self._state(chunk, pos)
+
+    def close(self) -> dict:
+        """
+        結束解析並返回結果
+
+        Returns:
+            Dict: 包含 id、timestamp、content_type 等元數據，以及
+            'image' (已定位到開頭的檔案物件)、'image_size' (位元組數) 與 'image_sha256'
+
+        Raises:
+            ValueError: 當響應不完整或缺少圖片欄位時拋出
+        """
+        if self._state != self._done:
+            raise ValueError("ESP32-CAM 返回的 JSON 不完整")
+        if not self.image_received:
+            raise ValueError(f"ESP32-CAM 返回的數據缺少必要字段: {IMAGE_FIELD}")
+        self.image.seek(0)
+        return {
+            **self.fields,
+            'image': self.image,
+            'image_size': self.image_size,
+            'image_sha256': self.image_digest.hexdigest(),
+        }
+
+    # ---- 狀態處理函數：每個都從 pos 開始消耗 chunk，返回下一個處理位置 ----
+
+    def _skip_whitespace(self, chunk: bytes, pos: int) -> int:
+        while pos < len(chunk) and chunk[pos] in _WHITESPACE:
+            pos += 1
+        return pos
+
+    def _expect_object_start(self, chunk: bytes, pos: int) -> int:
+        pos = self._skip_whitespace(chunk, pos)
+        if pos < len(chunk):
+            if chunk[pos] != ord('{'):
+                raise ValueError("ESP32-CAM 返回的數據不是 JSON 物件")
+            self._state = self._expect_key
+            pos += 1
+        return pos
+
+    def _expect_key(self, chunk: bytes, pos: int) -> int:
+        pos = self._skip_whitespace(chunk, pos)
+        if pos >= len(chunk):
+            return pos
+        char = chunk[pos]
+        if char == ord(','):
+            return pos + 1
+        if char == ord('}'):
+            self._state = self._done
+            return pos + 1
+        self._key.clear()
+        if char == _QUOTE:
+            self._state = self._in_quoted_key
+            return pos + 1
+        if char in _BARE_KEY_CHARS:
+            self._state = self._in_bare_key
+            return pos
+        raise ValueError(f"ESP32-CAM 返回的 JSON 格式不正確: 非預期的字元 {chr(char)!r}")
+
+    def _in_quoted_key(self, chunk: bytes, pos: int) -> int:
+        end = chunk.find(b'"', pos)
+        if end == -1:
+            self._key += chunk[pos:]
+            return len(chunk)
+        self._key += chunk[pos:end]
+        self._state = self._expect_colon
+        return end + 1
+
+    def _in_bare_key(self, chunk: bytes, pos: int) -> int:
+        while pos < len(chunk) and chunk[pos] in _BARE_KEY_CHARS:
+            self._key.append(chunk[pos])
+            pos += 1
+        if pos < len(chunk):
+            self._state = self._expect_colon
+        return pos
+
+    def _expect_colon(self, chunk: bytes, pos: int) -> int:
+        pos = self._skip_whitespace(chunk, pos)
+        if pos < len(chunk):
+            if chunk[pos] != ord(':'):
+                raise ValueError("ESP32-CAM 返回的 JSON 格式不正確: 缺少 ':'")
+            self._state = self._expect_value
+            pos += 1
+        return pos
+
+    def _expect_value(self, chunk: bytes, pos: int) -> int:
+        pos = self._skip_whitespace(chunk, pos)
+        if pos >= len(chunk):
+            return pos
+        if chunk[pos] != _QUOTE:
+            raise ValueError(f"ESP32-CAM 返回的欄位 {self._key.decode(errors='replace')} 不是字串")
+        self._value.clear()
+        self._escaped = False
+        if self._key == IMAGE_FIELD.encode():
+            self.image_received = True
+            self._state = self._in_image
+        else:
+            self._state = self._in_string
+        return pos + 1
+
+    def _in_string(self, chunk: bytes, pos: int) -> int:
+        while pos < len(chunk):
+            char = chunk[pos]
+            pos += 1
+            if self._escaped:
+                self._escaped = False
+            elif char == _BACKSLASH:
+                self._escaped = True
+            elif char == _QUOTE:
+                key = self._key.decode()
+                self.fields[key] = json.loads(b'"' + bytes(self._value) + b'"')
+                self._state = self._expect_key
+                return pos
+            self._value.append(char)
+        return pos
+
+    def _in_image(self, chunk: bytes, pos: int) -> int:
+        end = chunk.find(b'"', pos)
+        segment = chunk[pos:] if end == -1 else chunk[pos:end]
+        self._write_base64(segment.translate(None, _BASE64_NOISE))
+        if end == -1:
+            return len(chunk)
+        self._flush_base64()
+        self._state = self._expect_key
+        return end + 1
+
+    def _done(self, chunk: bytes, pos: int) -> int:
+        pos = self._skip_whitespace(chunk, pos)
+        if pos < len(chunk):
+            raise ValueError("ESP32-CAM 返回的 JSON 物件之後還有多餘數據")
+        return pos
+
+    # ---- base64 分段解碼 ----
+
+    def _write_base64(self, data: bytes) -> None:
+        if self._pending_base64:
+            data = self._pending_base64 + data
+        usable = len(data) - len(data) % 4
+        self._pending_base64 = data[usable:]
+        if usable:
+            self._decode_into_sink(data[:usable])
+
+    def _flush_base64(self) -> None:
+        if self._pending_base64:
+            self._decode_into_sink(self._pending_base64)
+            self._pending_base64 = b''
+
+    def _decode_into_sink(self, data: bytes) -> None:
+        try:
+            decoded = base64.b64decode(data)
+        except binascii.Error as e:
+            raise ValueError(f"Base64 解碼失敗: {str(e)}") from e
+        self.image.write(decoded)
+        self.image_digest.update(decoded)
+        self.image_size += len(decoded)
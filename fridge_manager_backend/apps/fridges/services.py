@@ -1,14 +1,223 @@
 import base64
+import hashlib
 import json
 import logging
+import random
 import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
+from django.conf import settings
+from django.db import transaction
+from requests.adapters import HTTPAdapter
+
+from apps.core.services import SummaryService
+from apps.inventory.tasks import dispatch_recognition
+from apps.photos.hashing import METADATA_FIELDS, image_metadata
+from apps.photos.models import Photo
+from apps.photos.services import PhotoIngestService
+from apps.photos.tasks import dispatch_renditions
+from apps.photos.timing import STAGES_KEY, elapsed_ms, record_stage, stage_timer
 
 from .models import FridgeDevice
+from .parsers import ESP32PhotoStreamParser
+from .stats import DeviceStats
 
 logger = logging.getLogger(__name__)
 
+# 視為設備端暫時性錯誤、值得重試的 HTTP 狀態碼下限
+SERVER_ERROR_STATUS = 500
+# 韌體不支援原始 JPEG 端點時返回的狀態碼 (esp_http_server 對未註冊的 URI / 方法)
+UNSUPPORTED_ENDPOINT_STATUSES = (404, 405)
+# 判定設備不支援原始 JPEG 協定後，多久之後再重新嘗試 (秒)
+BINARY_PROTOCOL_RETRY_INTERVAL = 600
+
+class DeviceCircuitOpenError(requests.RequestException):
+    """設備的斷路器處於開啟狀態，請求在送出前即被拒絕"""
+
+
+class CaptureProtocolError(ValueError):
+    """設備不支援所要求的拍照協定 (例如舊版韌體沒有 /api/photos/raw)"""
+
+
+class DeviceConnection:
+    """
+    單一 ESP32-CAM 設備的連線狀態：共用的 keep-alive Session 與斷路器
+
+    計數器與斷路器狀態另外寫入共用快取 (DeviceStats)，供網頁進程的 device_stats 讀取。
+    """
+    def __init__(self, api_url: str):
+        self.api_url = api_url
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.ESP32_POOL_MAXSIZE,
+            max_retries=0,  # 重試由 DeviceSessionPool 控制，以便加入 jitter 並更新斷路器
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.lock = threading.Lock()
+        self.consecutive_failures = 0
+        self.opened_at = None  # 斷路器開啟的時間 (time.monotonic())
+        self.probe_started_at = None  # half-open 時放行的試探請求送出的時間
+        self.binary_unsupported_until = None  # 在此時間之前直接使用 JSON 協定
+        self.last_error = ''
+        self.last_latency_ms = None
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= settings.ESP32_CIRCUIT_RESET_TIMEOUT:
+            return 'half_open'
+        return 'open'
+
+    def allow_request(self) -> bool:
+        """
+        斷路器開啟期間直接拒絕；超過重置時間後 (half-open) 只放行一個試探請求，
+        試探結果回報前其他請求繼續快速失敗 (試探超過重置時間仍未回報則再放行一個)
+        """
+        with self.lock:
+            state = self.state
+            now = time.monotonic()
+            probing = (
+                self.probe_started_at is not None
+                and now - self.probe_started_at < settings.ESP32_CIRCUIT_RESET_TIMEOUT
+            )
+            allowed = state == 'closed' or (state == 'half_open' and not probing)
+            if allowed and state == 'half_open':
+                self.probe_started_at = now
+        self.count('requests' if allowed else 'short_circuited')
+        return allowed
+
+    def record_success(self, latency_ms: float) -> None:
+        with self.lock:
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self.probe_started_at = None
+            self.last_latency_ms = round(latency_ms, 1)
+        self.count('successes')
+        self.publish_state()
+
+    def record_failure(self, error: Exception, timed_out: bool) -> None:
+        with self.lock:
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            state = self.state
+            if state == 'half_open' or self.consecutive_failures >= settings.ESP32_CIRCUIT_FAILURE_THRESHOLD:
+                if state != 'open':
+                    logger.warning(f"ESP32-CAM {self.api_url} 連續失敗 {self.consecutive_failures} 次，開啟斷路器")
+                self.opened_at = time.monotonic()
+                self.probe_started_at = None
+        self.count('failures')
+        if timed_out:
+            self.count('timeouts')
+        self.publish_state()
+
+    def binary_supported(self) -> bool:
+        with self.lock:
+            return self.binary_unsupported_until is None or time.monotonic() >= self.binary_unsupported_until
+
+    def mark_binary_unsupported(self) -> None:
+        with self.lock:
+            self.binary_unsupported_until = time.monotonic() + BINARY_PROTOCOL_RETRY_INTERVAL
+        self.count('protocol_fallbacks')
+
+    def count(self, name: str) -> None:
+        DeviceStats.incr(self.api_url, name)
+
+    def publish_state(self) -> None:
+        with self.lock:
+            state = {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'last_error': self.last_error,
+                'last_latency_ms': self.last_latency_ms,
+            }
+        DeviceStats.set_state(self.api_url, state)
+
+
+class DeviceSessionPool:
+    """
+    以 FridgeDevice.api_url 為鍵的連線池
+
+    每台設備共用一個 keep-alive Session，避免每次拍照都重新建立 TCP 連線；
+    請求失敗時以指數退避加 jitter 重試，並在設備持續逾時時開啟斷路器快速失敗。
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._connections: dict[str, DeviceConnection] = {}
+
+    def get_connection(self, device: FridgeDevice) -> DeviceConnection:
+        if not device.api_url:
+            raise ValueError("設備未配置有效的 API 端點")
+        with self._lock:
+            connection = self._connections.get(device.api_url)
+            if connection is None:
+                connection = DeviceConnection(device.api_url)
+                self._connections[device.api_url] = connection
+            return connection
+
+    @staticmethod
+    def _backoff_delay(attempt: int) -> float:
+        # full jitter：在 [0, base * 2^attempt] 之間隨機等待，避免多個 worker 同時重試
+        return random.uniform(0, settings.ESP32_RETRY_BACKOFF * (2 ** attempt))  # noqa: S311 - 非加密用途
+
+    def get(self, device: FridgeDevice, url: str, **kwargs) -> requests.Response:
+        """
+        透過設備共用的 Session 發送 GET 請求
+
+        Args:
+            device: FridgeDevice 實例
+            url: 請求的完整 URL
+            **kwargs: 傳給 requests.Session.get 的其他參數
+
+        Returns:
+            requests.Response: 成功 (非 5xx) 的響應
+
+        Raises:
+            DeviceCircuitOpenError: 斷路器開啟時拋出
+            requests.RequestException: 重試次數用盡後拋出最後一次的錯誤
+        """
+        connection = self.get_connection(device)
+        timeout = (settings.ESP32_CONNECT_TIMEOUT, settings.ESP32_READ_TIMEOUT)
+        last_error = None
+
+        for attempt in range(settings.ESP32_MAX_RETRIES + 1):
+            if attempt > 0:
+                connection.count('retries')
+                time.sleep(self._backoff_delay(attempt - 1))
+
+            if not connection.allow_request():
+                raise DeviceCircuitOpenError(f"ESP32-CAM {device.api_url} 斷路器開啟中，暫停發送請求")
+
+            started = time.monotonic()
+            try:
+                response = connection.session.get(url, timeout=timeout, **kwargs)
+                if response.status_code >= SERVER_ERROR_STATUS:
+                    response.close()
+                    raise requests.HTTPError(f"ESP32-CAM 返回錯誤狀態碼 {response.status_code}", response=response)
+            except (requests.ConnectionError, requests.Timeout, requests.HTTPError) as e:
+                timed_out = isinstance(e, requests.Timeout)
+                connection.record_failure(e, timed_out)
+                logger.warning(f"ESP32-CAM 請求失敗 (第 {attempt + 1} 次): {str(e)}")
+                last_error = e
+                continue
+
+            connection.record_success((time.monotonic() - started) * 1000)
+            return response
+
+        raise last_error
+
+
+# 每個進程共用一個連線池 (Celery prefork 的子進程在首次使用時才建立 Session)
+device_session_pool = DeviceSessionPool()
+
+
 class ESP32CamService:
     @staticmethod
     def _fix_malformed_json(json_str: str) -> str:
@@ -33,11 +242,176 @@ class ESP32CamService:
         fixed_json = re.sub(pattern, replace_property, json_str)
         return fixed_json
 
+    @staticmethod
+    def _validate_photo_data(data: dict, device: FridgeDevice, required_fields: list[str]) -> None:
+        """
+        驗證 ESP32-CAM 返回的元數據
+
+        Args:
+            data: 解析後的響應數據
+            device: FridgeDevice 實例
+            required_fields: 必須存在的欄位
+
+        Raises:
+            ValueError: 缺少欄位或設備 ID 不匹配時拋出
+        """
+        missing_fields = [field for field in required_fields if field not in data]
+        if missing_fields:
+            raise ValueError(f"ESP32-CAM 返回的數據缺少必要字段: {', '.join(missing_fields)}")
+
+        # 驗證設備 ID 是否匹配
+        if data['id'] != device.device_id_esp:
+            raise ValueError(f"ESP32-CAM 返回的設備 ID ({data['id']}) 與配置的 ID ({device.device_id_esp}) 不匹配")
+
+    @staticmethod
+    def parse_json_response(response: requests.Response, device: FridgeDevice) -> dict:
+        """
+        一次讀入整個響應並解析 JSON (fetch_photo_data 使用的完整複製路徑)
+
+        Args:
+            response: ESP32-CAM 的 HTTP 響應
+            device: FridgeDevice 實例
+
+        Returns:
+            Dict: 包含 id、timestamp、image_base64、content_type 的字典
+        """
+        try:
+            # 首先嘗試直接解析 JSON
+            data = response.json()
+        except json.JSONDecodeError as e:
+            logger.warning(f"Initial JSON parsing failed, attempting to fix malformed JSON: {str(e)}")
+            try:
+                # 嘗試修復 JSON 格式
+                fixed_json = ESP32CamService._fix_malformed_json(response.text)
+                data = json.loads(fixed_json)
+            except (json.JSONDecodeError, Exception) as e:
+                logger.error(f"Failed to parse JSON response after fixing: {str(e)} (response length={len(response.content)})")
+                raise ValueError(f"ESP32-CAM 返回的 JSON 格式不正確且無法修復: {str(e)}") from e
+
+        ESP32CamService._validate_photo_data(data, device, ['id', 'timestamp', 'image_base64', 'content_type'])
+        return data
+
+    @staticmethod
+    def parse_stream_response(response: requests.Response, device: FridgeDevice) -> dict:
+        """
+        以串流方式解析響應，圖片邊接收邊解碼，不保留完整的響應文字
+
+        Args:
+            response: 以 stream=True 發出的 ESP32-CAM HTTP 響應
+            device: FridgeDevice 實例
+
+        Returns:
+            Dict: 包含 id、timestamp、content_type、image (檔案物件)、image_size 與 image_sha256 的字典
+        """
+        parser = ESP32PhotoStreamParser()
+        try:
+            for chunk in response.iter_content(chunk_size=settings.ESP32_STREAM_CHUNK_SIZE):
+                parser.feed(chunk)
+            data = parser.close()
+        except Exception:
+            parser.image.close()
+            raise
+        finally:
+            response.close()
+
+        try:
+            ESP32CamService._validate_photo_data(data, device, ['id', 'timestamp', 'content_type'])
+        except ValueError:
+            data['image'].close()
+            raise
+        return data
+
+    @staticmethod
+    def parse_binary_response(response: requests.Response, device: FridgeDevice) -> dict:
+        """
+        解析 /api/photos/raw 的原始 JPEG 響應，元數據位於 X-Device-Id 與 X-Timestamp 標頭
+
+        Args:
+            response: 以 stream=True 發出的 ESP32-CAM HTTP 響應
+            device: FridgeDevice 實例
+
+        Returns:
+            Dict: 與 parse_stream_response 相同格式的字典
+
+        Raises:
+            CaptureProtocolError: 設備不支援原始 JPEG 協定時拋出
+            ValueError: 元數據缺少或不匹配時拋出
+        """
+        try:
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+            if response.status_code in UNSUPPORTED_ENDPOINT_STATUSES or not content_type.startswith('image/'):
+                raise CaptureProtocolError(
+                    f"ESP32-CAM 不支援原始 JPEG 協定 (status={response.status_code}, content_type={content_type or 'N/A'})"
+                )
+            response.raise_for_status()
+
+            data = {
+                'id': response.headers.get('X-Device-Id'),
+                'timestamp': response.headers.get('X-Timestamp'),
+                'content_type': content_type,
+            }
+            missing_headers = [name for name, value in data.items() if not value]
+            if missing_headers:
+                raise CaptureProtocolError(f"ESP32-CAM 原始 JPEG 響應缺少元數據標頭: {', '.join(missing_headers)}")
+            ESP32CamService._validate_photo_data(data, device, ['id', 'timestamp', 'content_type'])
+
+            image = tempfile.SpooledTemporaryFile(max_size=settings.ESP32_SPOOL_MAX_BYTES)
+            image_size = 0
+            digest = hashlib.sha256()
+            try:
+                for chunk in response.iter_content(chunk_size=settings.ESP32_STREAM_CHUNK_SIZE):
+                    image.write(chunk)
+                    digest.update(chunk)
+                    image_size += len(chunk)
+            except Exception:
+                # 讀取中斷 (例如連線逾時) 時關閉暫存檔，與 parse_stream_response 相同
+                image.close()
+                raise
+        finally:
+            response.close()
+
+        image.seek(0)
+        return {**data, 'image': image, 'image_size': image_size, 'image_sha256': digest.hexdigest()}
+
+    @staticmethod
+    def _fetch_binary_photo(device: FridgeDevice) -> dict | None:
+        """
+        嘗試以原始 JPEG 協定拍照；設備不支援時返回 None 以便改用 JSON 協定
+        """
+        connection = device_session_pool.get_connection(device)
+        if not connection.binary_supported():
+            return None
+
+        endpoint = device.get_raw_photo_endpoint()
+        logger.debug(f"Requesting ESP32-CAM endpoint: {endpoint}")
+        response = device_session_pool.get(device, endpoint, stream=True, headers={'Accept': 'image/jpeg'})
+        try:
+            return ESP32CamService.parse_binary_response(response, device)
+        except CaptureProtocolError as e:
+            logger.warning(f"{str(e)}，改用 Base64 JSON 協定")
+            connection.mark_binary_unsupported()
+            return None
+
+    @staticmethod
+    def _request_photo(device: FridgeDevice, stream: bool) -> requests.Response:
+        endpoint = device.get_api_endpoint()
+        logger.debug(f"Requesting ESP32-CAM endpoint: {endpoint}")
+
+        response = device_session_pool.get(device, endpoint, stream=stream)
+
+        # 記錄響應狀態碼和頭部 (不記錄響應內容，其中包含整張圖片)
+        logger.debug(f"ESP32-CAM response status: {response.status_code}")
+        logger.debug(f"ESP32-CAM response headers: {dict(response.headers)}")
+        return response
+
     @staticmethod
     def fetch_photo_data(device: FridgeDevice) -> dict:
         """
         從 ESP32-CAM 獲取照片數據
 
+        整個響應會以文字、解析後字典等形式在記憶體中保留多份；
+        一般拍照流程請改用 fetch_photo。
+
         Args:
             device: FridgeDevice 實例
 
@@ -54,58 +428,76 @@ class ESP32CamService:
             requests.RequestException: 當請求失敗時拋出
         """
         try:
-            # 記錄請求的端點
-            endpoint = device.get_api_endpoint()
-            logger.debug(f"Requesting ESP32-CAM endpoint: {endpoint}")
+            response = ESP32CamService._request_photo(device, stream=False)
+            return ESP32CamService.parse_json_response(response, device)
 
-            response = requests.get(
-                endpoint,
-                timeout=10
-            )
+        except requests.RequestException as e:
+            # 記錄錯誤並重新拋出
+            logger.error(f"ESP32-CAM request failed: {str(e)}")
+            raise requests.RequestException(f"從 ESP32-CAM 獲取照片失敗: {str(e)}") from e
+        except ValueError as e:
+            # 記錄 JSON 解析錯誤
+            logger.error(f"ESP32-CAM data validation error: {str(e)}")
+            raise
 
-            # 記錄響應狀態碼和頭部
-            logger.debug(f"ESP32-CAM response status: {response.status_code}")
-            logger.debug(f"ESP32-CAM response headers: {dict(response.headers)}")
+    @staticmethod
+    def fetch_photo(device: FridgeDevice) -> dict:
+        """
+        從 ESP32-CAM 獲取照片，以串流方式解碼圖片
 
-            # 打印原始響應內容
-            logger.debug(f"ESP32-CAM raw response: {response.text}")
+        設備的 capture_protocol 為 'binary' 時優先使用 /api/photos/raw 取得原始 JPEG，
+        省去 Base64 編碼約 33% 的傳輸量；韌體不支援時自動改用 /api/photos 的 JSON 協定。
 
-            try:
-                # 首先嘗試直接解析 JSON
-                data = response.json()
-            except json.JSONDecodeError as e:
-                logger.warning(f"Initial JSON parsing failed, attempting to fix malformed JSON: {str(e)}")
-                try:
-                    # 嘗試修復 JSON 格式
-                    fixed_json = ESP32CamService._fix_malformed_json(response.text)
-                    logger.debug(f"Fixed JSON: {fixed_json}")
-                    data = json.loads(fixed_json)
-                except (json.JSONDecodeError, Exception) as e:
-                    logger.error(f"Failed to parse JSON response after fixing: {str(e)}")
-                    logger.error(f"Original response content: {response.text}")
-                    raise ValueError(f"ESP32-CAM 返回的 JSON 格式不正確且無法修復: {str(e)}") from e
-
-            # 驗證返回的數據格式
-            required_fields = ['id', 'timestamp', 'image_base64', 'content_type']
-            missing_fields = [field for field in required_fields if field not in data]
-            if missing_fields:
-                raise ValueError(f"ESP32-CAM 返回的數據缺少必要字段: {', '.join(missing_fields)}")
-
-            # 驗證設備 ID 是否匹配
-            if data['id'] != device.device_id_esp:
-                raise ValueError(f"ESP32-CAM 返回的設備 ID ({data['id']}) 與配置的 ID ({device.device_id_esp}) 不匹配")
+        Args:
+            device: FridgeDevice 實例
 
+        Returns:
+            Dict: 包含照片數據的字典，格式如下：
+            {
+                'id': str,  # ESP32-CAM 設備 ID
+                'timestamp': str,  # 拍攝時間戳
+                'content_type': str,  # 圖片 MIME 類型
+                'image': SpooledTemporaryFile,  # 解碼後的圖片 (已定位到開頭，使用後需關閉)
+                'image_size': int,  # 圖片位元組數
+                'image_sha256': str,  # 接收時邊寫入邊計算的 SHA-256
+                'stages': dict  # {'capture': 拍照與接收耗時 (毫秒)}
+            }
+
+        Raises:
+            requests.RequestException: 當請求失敗時拋出
+            ValueError: 當響應格式不正確時拋出
+        """
+        try:
+            started = time.perf_counter()
+            data = None
+            if device.capture_protocol == 'binary':
+                data = ESP32CamService._fetch_binary_photo(device)
+            if data is None:
+                response = ESP32CamService._request_photo(device, stream=True)
+                data = ESP32CamService.parse_stream_response(response, device)
+            # 拍照與接收的耗時隨 photo_data 帶入 Photo.processing_metrics['stages']
+            record_stage(data, 'capture', elapsed_ms(started))
+            logger.debug(f"ESP32-CAM 圖片接收完成: {data['image_size']} bytes")
             return data
 
         except requests.RequestException as e:
-            # 記錄錯誤並重新拋出
             logger.error(f"ESP32-CAM request failed: {str(e)}")
             raise requests.RequestException(f"從 ESP32-CAM 獲取照片失敗: {str(e)}") from e
         except ValueError as e:
-            # 記錄 JSON 解析錯誤
             logger.error(f"ESP32-CAM data validation error: {str(e)}")
             raise
 
+    @staticmethod
+    def get_device_stats() -> dict[str, dict]:
+        """
+        獲取各 ESP32-CAM 設備的連線計數器 (所有 Celery worker 與網頁進程的累計)
+
+        Returns:
+            Dict: 以 api_url 為鍵，包含請求、成功、失敗、逾時、重試、斷路次數及斷路器狀態
+        """
+        api_urls = FridgeDevice.objects.exclude(api_url__isnull=True).exclude(api_url='').values_list('api_url', flat=True)
+        return DeviceStats.get_many(sorted(set(api_urls)))
+
     @staticmethod
     def decode_base64_image(image_base64: str) -> bytes:
         """
@@ -121,3 +513,97 @@ class ESP32CamService:
         except Exception as e:
             logger.error(f"Base64 decode failed: {str(e)}")
             raise ValueError(f"Base64 解碼失敗: {str(e)}") from e
+
+
+class FridgeSnapshotService:
+    @staticmethod
+    def _capture_and_upload(device: FridgeDevice) -> dict:
+        """
+        在工作執行緒中對單一設備拍照並上傳至 S3 (不存取資料庫)
+
+        Args:
+            device: FridgeDevice 實例
+
+        Returns:
+            Dict: 單一設備的快照結果
+        """
+        result = {'device_id': device.device_id_esp, 'device_name': device.name}
+        started = time.monotonic()
+        try:
+            photo_data = ESP32CamService.fetch_photo(device)
+            captured = time.monotonic()
+            with photo_data['image'] as image:
+                with stage_timer(photo_data, 'hash'):
+                    photo_data.update(image_metadata(image, photo_data['image_sha256'], photo_data['image_size']))
+                with stage_timer(photo_data, 'upload'):
+                    storage_key = PhotoIngestService.upload_image(image, PhotoIngestService.build_filename(None))
+        except Exception as e:
+            logger.error(f"設備 {device.device_id_esp} 快照失敗: {str(e)}")
+            result.update({
+                'status': 'failed',
+                'error': str(e),
+                'latency_ms': round((time.monotonic() - started) * 1000, 1),
+            })
+            return result
+
+        finished = time.monotonic()
+        result.update({
+            'status': 'success',
+            'storage_key': storage_key,
+            'photo_data': {key: photo_data[key] for key in ('timestamp', 'content_type', STAGES_KEY, *METADATA_FIELDS)},
+            'image_size': photo_data['image_size'],
+            'capture_ms': round((captured - started) * 1000, 1),
+            'upload_ms': round((finished - captured) * 1000, 1),
+            'latency_ms': round((finished - started) * 1000, 1),
+        })
+        return result
+
+    @staticmethod
+    def snapshot_active_fridges(max_workers: int | None = None, enqueue_recognition: bool = True) -> list[dict]:
+        """
+        同時對所有啟用中的冰箱拍照，批量建立 Photo 記錄並一次送出辨識任務
+
+        拍照與上傳在有上限的執行緒池中並行執行；資料庫寫入只在呼叫端執行緒
+        以一次 bulk_create 完成。
+
+        Args:
+            max_workers: 同時拍照的設備數上限，預設為 settings.FRIDGE_SNAPSHOT_MAX_WORKERS
+            enqueue_recognition: 是否為新照片送出辨識工作
+
+        Returns:
+            List[Dict]: 每台設備的結果，包含 status、latency_ms，成功時另含 photo_id，
+            失敗時另含 error
+        """
+        devices = list(FridgeDevice.objects.filter(is_active=True).exclude(api_url__isnull=True).exclude(api_url=''))
+        if not devices:
+            return []
+
+        max_workers = max_workers or settings.FRIDGE_SNAPSHOT_MAX_WORKERS
+        logger.info(f"開始快照 {len(devices)} 台冰箱，並行數 {max_workers}")
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fridge-snapshot') as executor:
+            results = list(executor.map(FridgeSnapshotService._capture_and_upload, devices))
+
+        devices_by_id = {device.device_id_esp: device for device in devices}
+        succeeded = [result for result in results if result['status'] == 'success']
+        photos = [
+            PhotoIngestService.build_photo(
+                devices_by_id[result['device_id']], result['storage_key'], result['photo_data'], None
+            )
+            for result in succeeded
+        ]
+        if photos:
+            with transaction.atomic():
+                Photo.objects.bulk_create(photos)
+                SummaryService.record_pending_photos([photo.fridge_device_id for photo in photos])
+            for result, photo in zip(succeeded, photos, strict=True):
+                result['photo_id'] = photo.id
+            dispatch_renditions(*(photo.id for photo in photos))
+
+            if enqueue_recognition:
+                dispatch_recognition(*(photo.id for photo in photos))
+
+        for result in results:
+            # 只保留可序列化、對報表有用的欄位
+            result.pop('photo_data', None)
+        logger.info(f"冰箱快照完成: 成功 {len(succeeded)} 台，失敗 {len(results) - len(succeeded)} 台")
+        return results
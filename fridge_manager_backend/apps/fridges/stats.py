@@ -0,0 +1,78 @@
+import logging
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'devices'
+KEY_PREFIX = 'devices:stats:'
+COUNTERS = ('requests', 'successes', 'failures', 'timeouts', 'retries', 'short_circuited', 'protocol_fallbacks')
+# 尚未記錄任何請求的設備顯示的狀態
+INITIAL_STATE = {'state': 'closed', 'consecutive_failures': 0, 'last_error': '', 'last_latency_ms': None}
+
+
+class DeviceStats:
+    """
+    跨行程累計的 ESP32-CAM 連線計數器
+
+    拍照預設在 Celery worker 中執行 (FRIDGE_CAPTURE_ASYNC)，計數器與最近一次的斷路器
+    狀態存放於 'devices' 快取 (Redis)，網頁進程的 device_stats 視圖才能讀到所有進程的
+    統計；Redis 無法連線時只會略過計數，不影響拍照。
+    """
+    @staticmethod
+    def incr(api_url: str, name: str, delta: int = 1) -> None:
+        """
+        增加設備的計數器
+
+        Args:
+            api_url: 設備的 api_url
+            name: COUNTERS 中的計數器名稱
+            delta: 增加的數值
+        """
+        key = f"{KEY_PREFIX}{api_url}:{name}"
+        try:
+            cache = caches[CACHE_ALIAS]
+            if not cache.add(key, delta, timeout=None):
+                cache.incr(key, delta)
+        except Exception:  # noqa: S110 - 計數失敗不影響拍照
+            pass
+
+    @staticmethod
+    def set_state(api_url: str, state: dict) -> None:
+        """
+        記錄設備最近一次的斷路器狀態 (各進程的斷路器各自獨立，以最後寫入者為準)
+
+        Args:
+            api_url: 設備的 api_url
+            state: state、consecutive_failures、last_error 與 last_latency_ms
+        """
+        try:
+            cache = caches[CACHE_ALIAS]
+            cache.set(f"{KEY_PREFIX}{api_url}:state", state, timeout=None)
+        except Exception:  # noqa: S110 - 計數失敗不影響拍照
+            pass
+
+    @staticmethod
+    def get_many(api_urls: list[str]) -> dict[str, dict]:
+        """
+        讀取多台設備的計數器與狀態
+
+        Args:
+            api_urls: 設備的 api_url
+
+        Returns:
+            Dict: 以 api_url 為鍵，未設定或讀取失敗的計數器為 0
+        """
+        keys = [f"{KEY_PREFIX}{api_url}:{name}" for api_url in api_urls for name in (*COUNTERS, 'state')]
+        try:
+            values = caches[CACHE_ALIAS].get_many(keys)
+        except Exception as e:
+            logger.warning(f"讀取設備連線計數器失敗: {str(e)}")
+            values = {}
+        return {
+            api_url: {
+                **{name: values.get(f"{KEY_PREFIX}{api_url}:{name}", 0) for name in COUNTERS},
+                **values.get(f"{KEY_PREFIX}{api_url}:state", INITIAL_STATE),
+            }
+            for api_url in api_urls
+        }
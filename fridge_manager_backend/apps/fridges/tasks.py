@@ -0,0 +1,66 @@
+import logging
+
+from celery import shared_task
+
+from apps.inventory.tasks import dispatch_recognition
+from apps.photos.services import PhotoIngestService
+
+from .models import FridgeOperationLog
+from .services import ESP32CamService, FridgeSnapshotService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def capture_fridge_photo(operation_log_id: int) -> None:
+    """
+    在背景向 ESP32-CAM 拍照、上傳至 S3，並觸發圖片辨識的 Celery 任務
+
+    Args:
+        operation_log_id: FridgeOperationLog 實例的 ID
+    """
+    try:
+        operation_log = FridgeOperationLog.objects.select_related('fridge_device', 'user').get(id=operation_log_id)
+    except FridgeOperationLog.DoesNotExist:
+        logger.error(f"操作記錄 ID {operation_log_id} 不存在")
+        return
+
+    # 以條件更新取得拍照工作，任務被重複投遞或同時執行時只有一個會拍照
+    claimed = FridgeOperationLog.objects.filter(
+        id=operation_log_id, capture_status='pending'
+    ).update(capture_status='capturing')
+    if not claimed:
+        logger.warning(f"操作記錄 {operation_log_id} 已不是 pending 狀態，略過拍照")
+        return
+    operation_log.capture_status = 'capturing'
+
+    try:
+        device = operation_log.fridge_device
+        photo_data = ESP32CamService.fetch_photo(device)
+        photo = PhotoIngestService.ingest(
+            device, photo_data, operation_log.user, operation_log_factory=lambda: operation_log
+        )
+    except Exception as e:
+        logger.error(f"操作記錄 {operation_log_id} 拍照失敗: {str(e)}", exc_info=True)
+        operation_log.capture_status = 'failed'
+        operation_log.capture_error = str(e)
+        operation_log.save(update_fields=['capture_status', 'capture_error'])
+        return
+
+    logger.info(f"操作記錄 {operation_log_id} 拍照完成: photo_id={photo.id}")
+
+    dispatch_recognition(photo.id)
+
+
+@shared_task
+def snapshot_active_fridges(max_workers: int | None = None) -> list[dict]:
+    """
+    並行拍攝所有啟用中冰箱並送出辨識任務的 Celery 任務 (供稽核與排程庫存更新使用)
+
+    Args:
+        max_workers: 同時拍照的設備數上限，預設為 settings.FRIDGE_SNAPSHOT_MAX_WORKERS
+
+    Returns:
+        List[Dict]: 每台設備的結果 (狀態、耗時、photo_id 或錯誤訊息)
+    """
+    return FridgeSnapshotService.snapshot_active_fridges(max_workers=max_workers)
@@ -1,2 +1,184 @@
+import base64
+import hashlib
+import json
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+import requests
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from .models import FridgeDevice, FridgeOperationLog
+from .parsers import ESP32PhotoStreamParser
+from .services import DeviceSessionPool, ESP32CamService
+from .tasks import capture_fridge_photo
+
+SpooledTemporaryFile = tempfile.SpooledTemporaryFile
+JPEG_BYTES = b'\xff\xd8\xff\xe0' + bytes(range(256)) * 40 + b'\xff\xd9'
+
+
+class FakeResponse:
+    """只提供 ESP32CamService 用到的 requests.Response 介面"""
+    def __init__(self, chunks, headers=None, status_code=200, error_after=None):
+        self.chunks = chunks
+        self.headers = headers or {}
+        self.status_code = status_code
+        self.error_after = error_after
+        self.closed = False
+
+    def iter_content(self, chunk_size=None):
+        for index, chunk in enumerate(self.chunks):
+            if index == self.error_after:
+                raise ConnectionError("連線中斷")
+            yield chunk
+
+    def raise_for_status(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+def split(data: bytes, size: int) -> list[bytes]:
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@override_settings(ESP32_MAX_RETRIES=0, ESP32_CIRCUIT_FAILURE_THRESHOLD=1, ESP32_CIRCUIT_RESET_TIMEOUT=30)
+class DeviceSessionPoolTests(TestCase):
+    def setUp(self):
+        caches['devices'].clear()
+        self.device = FridgeDevice.objects.create(name="測試冰箱", device_id_esp='fridge-1', api_url='http://cam-1:81')
+        self.pool = DeviceSessionPool()
+        self.connection = self.pool.get_connection(self.device)
+
+    def fail_request(self):
+        with (
+            mock.patch.object(self.connection.session, 'get', side_effect=requests.ConnectionError("無法連線")),
+            self.assertRaises(requests.ConnectionError),
+        ):
+            self.pool.get(self.device, self.device.get_api_endpoint())
+
+    def test_half_open_breaker_lets_one_probe_through(self):
+        self.fail_request()
+        self.assertEqual(self.connection.state, 'open')
+        self.assertFalse(self.connection.allow_request())
+
+        self.connection.opened_at -= 30  # 超過重置時間
+        self.assertTrue(self.connection.allow_request())
+        # 試探請求尚未回報，其他請求繼續快速失敗
+        self.assertFalse(self.connection.allow_request())
+
+        self.connection.record_success(5)
+        self.assertEqual(self.connection.state, 'closed')
+        self.assertTrue(self.connection.allow_request())
+
+    def test_counters_are_shared_with_other_processes(self):
+        self.fail_request()
+        self.assertFalse(self.connection.allow_request())
+
+        # 網頁進程沒有這台設備的連線，仍可讀到拍照進程的計數器
+        stats = ESP32CamService.get_device_stats()['http://cam-1:81']
+        self.assertEqual((stats['requests'], stats['failures'], stats['short_circuited']), (1, 1, 1))
+        self.assertEqual(stats['state'], 'open')
+        self.assertEqual(stats['last_error'], "無法連線")
+
+
+class ESP32PhotoStreamParserTests(TestCase):
+    def parse(self, payload: bytes, chunk_size: int) -> dict:
+        parser = ESP32PhotoStreamParser()
+        for chunk in split(payload, chunk_size):
+            parser.feed(chunk)
+        return parser.close()
+
+    def test_decodes_image_across_chunk_boundaries(self):
+        # 韌體輸出的 base64 會轉義 '/'，且屬性名可能沒有引號
+        encoded = base64.b64encode(JPEG_BYTES).decode().replace('/', '\\/')
+        payload = (
+            f'{{id: "fridge-1", "timestamp": "2025-01-01T12:00:00", '
+            f'"content_type": "image/jpeg", "image_base64": "{encoded}"}}'
+        ).encode()
+
+        for chunk_size in (1, 7, 4096):
+            with self.subTest(chunk_size=chunk_size):
+                result = self.parse(payload, chunk_size)
+                self.assertEqual(result['id'], 'fridge-1')
+                self.assertEqual(result['content_type'], 'image/jpeg')
+                self.assertEqual(result['image'].read(), JPEG_BYTES)
+                self.assertEqual(result['image_size'], len(JPEG_BYTES))
+                self.assertEqual(result['image_sha256'], hashlib.sha256(JPEG_BYTES).hexdigest())
+
+    def test_truncated_response_is_rejected(self):
+        payload = json.dumps({'id': 'fridge-1', 'image_base64': base64.b64encode(JPEG_BYTES).decode()}).encode()
+        with self.assertRaises(ValueError):
+            self.parse(payload[:-10], 64)
+
+    def test_missing_image_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.parse(b'{"id": "fridge-1", "timestamp": "2025-01-01T12:00:00"}', 16)
+
+
+class ParseBinaryResponseTests(TestCase):
+    def setUp(self):
+        self.device = FridgeDevice.objects.create(name="測試冰箱", device_id_esp='fridge-1')
+        self.headers = {
+            'Content-Type': 'image/jpeg',
+            'X-Device-Id': 'fridge-1',
+            'X-Timestamp': '2025-01-01T12:00:00',
+        }
+
+    def test_reads_image_and_metadata(self):
+        response = FakeResponse(split(JPEG_BYTES, 100), self.headers)
+        result = ESP32CamService.parse_binary_response(response, self.device)
+
+        self.assertTrue(response.closed)
+        self.assertEqual(result['id'], 'fridge-1')
+        self.assertEqual(result['image'].read(), JPEG_BYTES)
+        self.assertEqual(result['image_sha256'], hashlib.sha256(JPEG_BYTES).hexdigest())
+        result['image'].close()
+
+    def test_closes_spooled_file_when_read_fails(self):
+        created = []
+
+        def spool(**kwargs):
+            created.append(SpooledTemporaryFile(**kwargs))
+            return created[-1]
+
+        response = FakeResponse(split(JPEG_BYTES, 100), self.headers, error_after=3)
+        with (
+            mock.patch('apps.fridges.services.tempfile.SpooledTemporaryFile', side_effect=spool),
+            self.assertRaises(ConnectionError),
+        ):
+            ESP32CamService.parse_binary_response(response, self.device)
+
+        self.assertTrue(response.closed)
+        self.assertEqual(len(created), 1)
+        self.assertTrue(created[0].closed)
+
+
+class CaptureFridgePhotoTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice')
+        self.device = FridgeDevice.objects.create(name="測試冰箱", device_id_esp='fridge-1')
+
+    def create_log(self, **kwargs) -> FridgeOperationLog:
+        return FridgeOperationLog.objects.create(
+            user=self.user, fridge_device=self.device, operation_type='put_in', **kwargs
+        )
+
+    def test_skips_log_claimed_by_another_worker(self):
+        operation_log = self.create_log(capture_status='capturing')
+        with mock.patch.object(ESP32CamService, 'fetch_photo') as fetch_photo:
+            capture_fridge_photo(operation_log.id)
+        fetch_photo.assert_not_called()
+
+    def test_redelivered_task_does_not_capture_twice(self):
+        operation_log = self.create_log()
+        with mock.patch.object(ESP32CamService, 'fetch_photo', side_effect=ConnectionError("無法連線")) as fetch_photo:
+            capture_fridge_photo(operation_log.id)
+            capture_fridge_photo(operation_log.id)
+
+        self.assertEqual(fetch_photo.call_count, 1)
+        operation_log.refresh_from_db()
+        self.assertEqual(operation_log.capture_status, 'failed')
+        self.assertEqual(operation_log.capture_error, "無法連線")
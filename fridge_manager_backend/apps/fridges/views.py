@@ -1,24 +1,21 @@
 import logging
 import os
-import tempfile
-import uuid
 
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.files import File
-from django.core.files.base import ContentFile
 from django.http import JsonResponse
 from django.shortcuts import get_object_or_404, render
-from django.utils import timezone
+from django.urls import reverse
 from django.views.decorators.http import require_http_methods
 from django.views.generic import DetailView, ListView, View
 
-from apps.inventory.tasks import process_fridge_image
-from apps.photos.models import Photo
+from apps.inventory.tasks import dispatch_recognition
+from apps.photos.services import PhotoIngestService
 
 from .models import FridgeDevice, FridgeOperationLog
 from .services import ESP32CamService
+from .tasks import capture_fridge_photo
 
 # 獲取 logger 實例
 logger = logging.getLogger(__name__)
@@ -59,30 +56,6 @@ class UserOpenFridgeView(LoginRequiredMixin, View):
         logger.debug(f"AWS_STORAGE_BUCKET_NAME: {os.getenv('AWS_STORAGE_BUCKET_NAME')}")
         logger.debug(f"AWS_S3_REGION_NAME: {os.getenv('AWS_S3_REGION_NAME')}")
 
-    def _create_photo(self, device, image_data, photo_data, user):
-        """Create a Photo instance from image data."""
-        timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"user_{user.id}_{timestamp}_{uuid.uuid4().hex[:8]}.jpg"
-
-        # Create a temporary file in memory instead of on disk
-        django_file = ContentFile(image_data, name=unique_filename)
-
-        try:
-            photo = Photo.objects.create(
-                fridge_device=device,
-                image=django_file,
-                timestamp_esp=timezone.datetime.fromisoformat(photo_data['timestamp']),
-                content_type_esp=photo_data['content_type'],
-                uploaded_by=user,
-                uploaded_at=timezone.now(),
-                recognition_status='pending'
-            )
-            logger.info(f"Photo 實例創建成功: id={photo.id}")
-            return photo
-        except Exception as e:
-            logger.error(f"創建 Photo 實例時發生錯誤: {str(e)}", exc_info=True)
-            raise
-
     def post(self, request, device_id):
         """Handle fridge opening and photo capture."""
         self._log_aws_settings()
@@ -97,28 +70,46 @@ class UserOpenFridgeView(LoginRequiredMixin, View):
                 logger.warning(f"無效的操作類型: {operation_type}")
                 return JsonResponse({'status': 'error', 'message': '無效的操作類型'}, status=400)
 
-            operation_log = FridgeOperationLog.objects.create(
-                user=request.user,
-                fridge_device=device,
-                operation_type=operation_type,
-                notes="用戶點擊開啟冰箱按鈕"
+            def create_operation_log(**extra_fields):
+                return FridgeOperationLog.objects.create(
+                    user=request.user,
+                    fridge_device=device,
+                    operation_type=operation_type,
+                    notes="用戶點擊開啟冰箱按鈕",
+                    **extra_fields
+                )
+
+            if settings.FRIDGE_CAPTURE_ASYNC:
+                operation_log = create_operation_log()
+                logger.info(f"創建操作記錄: id={operation_log.id}")
+                # 拍照與上傳交由 Celery 任務處理，避免 web worker 被 ESP32-CAM 阻塞
+                capture_fridge_photo.delay(operation_log.id)
+                return JsonResponse({
+                    'status': 'accepted',
+                    'message': '操作已記錄，正在背景拍照中。',
+                    'operation_id': operation_log.id,
+                    'status_url': reverse('fridges:operation_status_api', args=[operation_log.id]),
+                }, status=202)
+
+            try:
+                photo_data = ESP32CamService.fetch_photo(device)
+            except Exception as e:
+                # 拍照失敗仍保留操作記錄
+                create_operation_log(capture_status='failed', capture_error=str(e))
+                raise
+
+            # 操作記錄在上傳至 S3 的同時寫入
+            photo = PhotoIngestService.ingest(
+                device, photo_data, request.user, operation_log_factory=create_operation_log
             )
+            operation_log = photo.operation_log
             logger.info(f"創建操作記錄: id={operation_log.id}")
-
-            photo_data = ESP32CamService.fetch_photo_data(device)
-            image_data = ESP32CamService.decode_base64_image(photo_data['image_base64'])
-
-            photo = self._create_photo(device, image_data, photo_data, request.user)
-            logger.debug(f"Photo image storage backend: {photo.image.storage.__class__.__name__}")
-            logger.debug(f"Photo image URL: {photo.image.url}")
-
-            operation_log.photo_taken = photo
-            operation_log.save()
-            process_fridge_image.delay(photo.id)
+            dispatch_recognition(photo.id)
 
             return JsonResponse({
                 'status': 'success',
                 'message': '操作已記錄，照片已拍攝並正在處理中。您可以關閉此頁面。',
+                'operation_id': operation_log.id,
                 'photo_id': photo.id
             })
 
@@ -126,6 +117,68 @@ class UserOpenFridgeView(LoginRequiredMixin, View):
             logger.error(f"處理冰箱操作時發生錯誤: {str(e)}", exc_info=True)
             return JsonResponse({'status': 'error', 'message': str(e)}, status=500)
 
+def _operation_status_payload(operation_log: FridgeOperationLog) -> dict:
+    """
+    組合操作記錄目前的拍照與辨識狀態
+
+    Args:
+        operation_log: FridgeOperationLog 實例
+
+    Returns:
+        Dict: 可直接作為 JSON 響應的狀態資料
+    """
+    photo = operation_log.photo_taken
+    payload = {
+        'operation_id': operation_log.id,
+        'operation_type': operation_log.operation_type,
+        'capture_status': operation_log.capture_status,
+        'photo_id': photo.id if photo else None,
+        'recognition_status': photo.recognition_status if photo else None,
+        # 串流辨識時物品會逐一寫入，輪詢即可看到目前的進度
+        'recognized_items': list(photo.recognized_items.order_by('id').values_list('name', flat=True)) if photo else [],
+    }
+
+    if operation_log.capture_status == 'failed':
+        payload['status'] = 'error'
+        payload['message'] = f"拍照失敗: {operation_log.capture_error}"
+    elif photo is None:
+        payload['status'] = 'pending'
+        payload['message'] = '正在拍照並上傳照片...'
+    elif photo.recognition_status == 'failed':
+        payload['status'] = 'error'
+        payload['message'] = '照片已拍攝，但物品辨識失敗。'
+    elif photo.recognition_status == 'completed':
+        payload['status'] = 'success'
+        payload['message'] = '照片已拍攝並完成物品辨識。'
+    elif payload['recognized_items']:
+        payload['status'] = 'success'
+        payload['message'] = f"正在辨識物品，目前已辨識 {len(payload['recognized_items'])} 項: {'、'.join(payload['recognized_items'])}"
+    else:
+        payload['status'] = 'success'
+        payload['message'] = '操作已記錄，照片已拍攝並正在處理中。您可以關閉此頁面。'
+    return payload
+
+class UserOperationStatusView(LoginRequiredMixin, View):
+    """
+    查詢冰箱操作狀態的視圖，供 operation_status.html 輪詢
+    """
+    def get(self, request, operation_id):
+        operation_log = get_object_or_404(
+            FridgeOperationLog.objects.select_related('photo_taken', 'fridge_device'),
+            id=operation_id,
+            user=request.user
+        )
+        payload = _operation_status_payload(operation_log)
+
+        if request.resolver_match.url_name == 'operation_status_api':
+            return JsonResponse(payload)
+
+        return render(request, 'fridges/operation_status.html', {
+            **payload,
+            'operation': operation_log,
+            'status_url': reverse('fridges:operation_status_api', args=[operation_log.id]),
+        })
+
 @login_required
 def fridge_list(request):
     """
@@ -134,6 +187,20 @@ def fridge_list(request):
     fridges = FridgeDevice.objects.all()
     return render(request, 'fridges/list.html', {'fridges': fridges})
 
+@login_required
+def device_stats(request):
+    """
+    顯示各 ESP32-CAM 設備連線計數器的視圖 (僅限管理員)
+
+    計數器存放於共用快取，包含在 Celery worker 中執行的拍照。
+    """
+    if not request.user.is_staff:
+        return JsonResponse({'status': 'error', 'message': '權限不足'}, status=403)
+    return JsonResponse({
+        'status': 'success',
+        'devices': ESP32CamService.get_device_stats()
+    })
+
 @login_required
 @require_http_methods(["POST"])
 def trigger_photo_capture(request, device_id):
@@ -151,40 +218,12 @@ def trigger_photo_capture(request, device_id):
         # 獲取冰箱設備
         device = get_object_or_404(FridgeDevice, device_id_esp=device_id)
 
-        # 從 ESP32-CAM 獲取照片數據
-        photo_data = ESP32CamService.fetch_photo_data(device)
-
-        # 解碼 Base64 圖片數據
-        image_data = ESP32CamService.decode_base64_image(photo_data['image_base64'])
-
-        # 生成唯一的文件名
-        timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
-        unique_filename = f"user_{request.user.id}_{timestamp}_{uuid.uuid4().hex[:8]}.jpg"
-        temp_file_path = os.path.join(tempfile.gettempdir(), unique_filename)
-
-        # 創建臨時文件
-        with open(temp_file_path, 'wb') as temp_file:
-            temp_file.write(image_data)
-            temp_file.flush()
-
-            # 創建 Photo 實例
-            with open(temp_file_path, 'rb') as image_file:
-                django_file = File(image_file, name=unique_filename)
-                photo = Photo.objects.create(
-                    fridge_device=device,
-                    image=django_file,
-                    timestamp_esp=timezone.datetime.fromisoformat(photo_data['timestamp']),
-                    content_type_esp=photo_data['content_type'],
-                    uploaded_by=request.user,
-                    uploaded_at=timezone.now(),
-                    recognition_status='pending'
-                )
-
-        # 刪除臨時文件
-        os.unlink(temp_file_path)
+        # 從 ESP32-CAM 獲取照片並直接上傳至 S3
+        photo_data = ESP32CamService.fetch_photo(device)
+        photo = PhotoIngestService.ingest(device, photo_data, request.user)
 
         # 觸發異步任務處理圖片
-        process_fridge_image.delay(photo.id)
+        dispatch_recognition(photo.id)
 
         return JsonResponse({
             'status': 'success',
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import RecognizedItem
+from .models import FridgeInventoryItem, RecognitionCacheEntry, RecognizedItem
 
 
 @admin.register(RecognizedItem)
@@ -10,3 +10,18 @@ class RecognizedItemAdmin(admin.ModelAdmin):
     search_fields = ('name', 'owner__username', 'notes')
     ordering = ('-added_at',)
     readonly_fields = ('added_at',)
+
+@admin.register(FridgeInventoryItem)
+class FridgeInventoryItemAdmin(admin.ModelAdmin):
+    list_display = ('name', 'quantity', 'fridge_device', 'owner', 'placement_date', 'expiry_min_date', 'updated_at')
+    list_filter = ('fridge_device', 'placement_date')
+    search_fields = ('name', 'owner__username')
+    ordering = ('fridge_device', 'placement_date')
+    readonly_fields = ('normalized_name', 'source_item', 'expiry_notified_at', 'updated_at')
+
+@admin.register(RecognitionCacheEntry)
+class RecognitionCacheEntryAdmin(admin.ModelAdmin):
+    list_display = ('key', 'hit_count', 'created_at', 'last_used_at', 'expires_at')
+    search_fields = ('key',)
+    ordering = ('-last_used_at',)
+    readonly_fields = ('created_at',)
@@ -0,0 +1,152 @@
+import hashlib
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F
+from django.utils import timezone
+
+from .models import RecognitionCacheEntry
+from .stats import CACHE_ALIAS, RecognitionStats
+
+logger = logging.getLogger(__name__)
+
+STATS_KEYS = ('hits_redis', 'hits_db', 'misses', 'errors')
+
+
+class RecognitionCache:
+    """
+    以圖片內容定址的辨識結果快取
+
+    鍵值由送交 LLM 的圖片 SHA-256、模型名稱與提示詞版本組成，同一張圖片
+    (重試、重新上傳、不同拍照端點) 只會呼叫一次 LM Studio。
+    讀取順序為 Redis → 資料庫 (RecognitionCacheEntry)；寫入時兩者同時寫入，
+    Redis 無法連線時只使用資料庫。Redis 以 TTL 過期並依伺服器的
+    maxmemory-policy (建議 allkeys-lru) 淘汰；資料庫層依 expires_at 過期，
+    並在超過 RECOGNITION_CACHE_DB_MAX_ENTRIES 時淘汰最久未使用的項目。
+    """
+    @staticmethod
+    def build_key(image_data: bytes, model_name: str, prompt_version: str) -> str:
+        """
+        產生快取鍵
+
+        Args:
+            image_data: 實際送交 LLM 的圖片數據 (前處理之後)
+            model_name: LLM 模型名稱
+            prompt_version: 提示詞版本
+
+        Returns:
+            str: 固定長度的快取鍵
+        """
+        image_digest = hashlib.sha256(image_data).hexdigest()
+        model_digest = hashlib.sha256(model_name.encode()).hexdigest()[:12]
+        return f"recognition:{prompt_version}:{model_digest}:{image_digest}"
+
+    @staticmethod
+    def get(key: str) -> list[dict] | None:
+        """
+        查詢快取
+
+        Args:
+            key: build_key 產生的鍵值
+
+        Returns:
+            List[Dict] | None: 命中時返回 recognized_items，未命中返回 None
+        """
+        if not settings.RECOGNITION_CACHE_ENABLED:
+            return None
+
+        try:
+            items = caches[CACHE_ALIAS].get(key)
+        except Exception as e:
+            logger.warning(f"讀取 Redis 辨識快取失敗，改用資料庫: {str(e)}")
+            RecognitionStats.incr('errors')
+            items = None
+        if items is not None:
+            RecognitionStats.incr('hits_redis')
+            logger.info(f"辨識快取命中 (Redis): {key}")
+            return items
+
+        now = timezone.now()
+        entry = RecognitionCacheEntry.objects.filter(key=key, expires_at__gt=now).first()
+        if entry is None:
+            RecognitionStats.incr('misses')
+            return None
+
+        RecognitionCacheEntry.objects.filter(pk=entry.pk).update(last_used_at=now, hit_count=F('hit_count') + 1)
+        RecognitionCache._set_redis(key, entry.recognized_items, (entry.expires_at - now).total_seconds())
+        RecognitionStats.incr('hits_db')
+        logger.info(f"辨識快取命中 (資料庫): {key}")
+        return entry.recognized_items
+
+    @staticmethod
+    def set(key: str, recognized_items: list[dict]) -> None:
+        """
+        寫入快取
+
+        Args:
+            key: build_key 產生的鍵值
+            recognized_items: LLM 成功解析出的物品列表
+        """
+        if not settings.RECOGNITION_CACHE_ENABLED:
+            return
+
+        ttl = settings.RECOGNITION_CACHE_TTL
+        RecognitionCache._set_redis(key, recognized_items, ttl)
+
+        now = timezone.now()
+        RecognitionCacheEntry.objects.update_or_create(
+            key=key,
+            defaults={
+                'recognized_items': recognized_items,
+                'last_used_at': now,
+                'expires_at': now + timedelta(seconds=ttl),
+            },
+        )
+        RecognitionCache.evict()
+
+    @staticmethod
+    def evict() -> int:
+        """
+        刪除資料庫中已過期的項目，並依 LRU 淘汰超過上限的項目
+
+        Returns:
+            int: 刪除的項目數量
+        """
+        deleted, _ = RecognitionCacheEntry.objects.filter(expires_at__lte=timezone.now()).delete()
+
+        max_entries = settings.RECOGNITION_CACHE_DB_MAX_ENTRIES
+        cutoff = (
+            RecognitionCacheEntry.objects
+            .order_by('-last_used_at')
+            .values_list('last_used_at', flat=True)[max_entries:max_entries + 1]
+            .first()
+        )
+        if cutoff is not None:
+            evicted, _ = RecognitionCacheEntry.objects.filter(last_used_at__lte=cutoff).delete()
+            deleted += evicted
+        return deleted
+
+    @staticmethod
+    def stats() -> dict:
+        """
+        獲取命中與未命中的計數
+
+        Returns:
+            Dict: 各計數值、命中率與資料庫項目數
+        """
+        stats = RecognitionStats.get_many(STATS_KEYS)
+        stats['hit_rate'] = RecognitionStats.rate(
+            stats, ('hits_redis', 'hits_db'), ('hits_redis', 'hits_db', 'misses')
+        )
+        stats['db_entries'] = RecognitionCacheEntry.objects.count()
+        return stats
+
+    @staticmethod
+    def _set_redis(key: str, recognized_items: list[dict], ttl: float) -> None:
+        try:
+            caches[CACHE_ALIAS].set(key, recognized_items, timeout=max(int(ttl), 1))
+        except Exception as e:
+            logger.warning(f"寫入 Redis 辨識快取失敗: {str(e)}")
+            RecognitionStats.incr('errors')
@@ -0,0 +1,165 @@
+import io
+import logging
+import time
+
+import numpy as np
+from django.conf import settings
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+MIN_REGION_CELLS = 2  # 少於此格數的變化區域視為雜訊 (反光、壓縮雜訊)
+REGION_PADDING_CELLS = 1  # 裁切時向外多保留的格數，避免物品被切到邊緣
+COMPOSITE_GAP = 8  # 拼接多個裁切區域時的間隔 (像素)
+COMPOSITE_BACKGROUND = (255, 255, 255)
+NEIGHBOURS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class FrameDiffService:
+    """
+    比對同一冰箱前後兩張照片，只把有變化的區域送交 LLM
+
+    兩張圖片縮成 FRAME_DIFF_GRID 格的灰階網格，扣除各自的平均亮度 (抵銷自動曝光
+    造成的整體明暗差異) 後計算每格的平均差異，超過 FRAME_DIFF_THRESHOLD 的格子
+    視為有變化。相鄰的變化格合併成區域，裁切後垂直拼接成一張圖。變化的格子比例
+    超過 FRAME_DIFF_MAX_CHANGED_RATIO、或找不到任何變化區域時返回 None，改送整張照片。
+
+    裁切圖只包含新放入的物品；變化區域外的物品不會被辨識，也不會從上一張照片複製，
+    由庫存依放入操作的提示保留 (見 ImageRecognitionService.crop_to_changes)。
+    """
+    @staticmethod
+    def _grid(image: Image.Image, columns: int, rows: int) -> np.ndarray:
+        cells = image.convert('L').resize((columns, rows), Image.Resampling.BOX)
+        grid = np.asarray(cells, dtype=np.float32)
+        return grid - grid.mean()
+
+    @staticmethod
+    def _regions(changed: np.ndarray) -> list[tuple[int, int, int, int]]:
+        # 以 4-連通合併變化格，返回每個區域的格子邊界 (left, top, right, bottom)，右下為開區間
+        rows, columns = changed.shape
+        seen = np.zeros_like(changed)
+        regions = []
+        for row, column in np.argwhere(changed):
+            if seen[row, column]:
+                continue
+            seen[row, column] = True
+            stack = [(row, column)]
+            cells = []
+            while stack:
+                r, c = stack.pop()
+                cells.append((r, c))
+                for dr, dc in NEIGHBOURS:
+                    nr, nc = r + dr, c + dc
+                    if 0 <= nr < rows and 0 <= nc < columns and changed[nr, nc] and not seen[nr, nc]:
+                        seen[nr, nc] = True
+                        stack.append((nr, nc))
+            if len(cells) < MIN_REGION_CELLS:
+                continue
+            cell_rows = [r for r, _ in cells]
+            cell_columns = [c for _, c in cells]
+            regions.append((
+                max(min(cell_columns) - REGION_PADDING_CELLS, 0),
+                max(min(cell_rows) - REGION_PADDING_CELLS, 0),
+                min(max(cell_columns) + 1 + REGION_PADDING_CELLS, columns),
+                min(max(cell_rows) + 1 + REGION_PADDING_CELLS, rows),
+            ))
+        return FrameDiffService._merge_overlapping(regions)
+
+    @staticmethod
+    def _merge_overlapping(regions: list[tuple[int, int, int, int]]) -> list[tuple[int, int, int, int]]:
+        # 加上邊距後可能重疊，重疊的區域合併成一個，拼接圖中不會重複出現同一塊畫面
+        merged = list(regions)
+        changed = True
+        while changed:
+            changed = False
+            for i in range(len(merged)):
+                for j in range(i + 1, len(merged)):
+                    a, b = merged[i], merged[j]
+                    if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                        merged[i] = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                        del merged[j]
+                        changed = True
+                        break
+                if changed:
+                    break
+        return merged
+
+    @staticmethod
+    def _composite(image: Image.Image, boxes: list[tuple[int, int, int, int]]) -> Image.Image:
+        crops = [image.crop(box) for box in boxes]
+        if len(crops) == 1:
+            return crops[0]
+        width = max(crop.width for crop in crops)
+        height = sum(crop.height for crop in crops) + COMPOSITE_GAP * (len(crops) - 1)
+        composite = Image.new('RGB', (width, height), COMPOSITE_BACKGROUND)
+        top = 0
+        for crop in crops:
+            composite.paste(crop, (0, top))
+            top += crop.height + COMPOSITE_GAP
+        return composite
+
+    @staticmethod
+    def crop_changes(before_data: bytes, after_data: bytes) -> tuple[bytes | None, dict]:
+        """
+        找出前後兩張圖片的變化區域並裁切拼接
+
+        兩張圖片應經過相同的前處理 (相同的裁切與尺寸)，尺寸不同時直接返回 None。
+
+        Args:
+            before_data: 上一張已辨識照片的 JPEG 數據
+            after_data: 本次照片的 JPEG 數據
+
+        Returns:
+            Tuple[bytes | None, Dict]: 變化區域拼接後的 JPEG 數據 (需要改送整張照片時為 None)，
+            以及記錄變化比例、區域數、輸出大小與耗時的指標
+        """
+        started = time.perf_counter()
+        metrics = {}
+        try:
+            with Image.open(io.BytesIO(before_data)) as before, Image.open(io.BytesIO(after_data)) as after:
+                if before.size != after.size:
+                    metrics['fallback'] = 'size_mismatch'
+                    return None, metrics
+
+                after.load()
+                width, height = after.size
+                columns = max(round(settings.FRAME_DIFF_GRID * width / max(width, height)), 1)
+                rows = max(round(settings.FRAME_DIFF_GRID * height / max(width, height)), 1)
+                difference = np.abs(
+                    FrameDiffService._grid(after, columns, rows) - FrameDiffService._grid(before, columns, rows)
+                )
+                changed = difference > settings.FRAME_DIFF_THRESHOLD
+                metrics['changed_ratio'] = round(float(changed.mean()), 3)
+                if metrics['changed_ratio'] > settings.FRAME_DIFF_MAX_CHANGED_RATIO:
+                    metrics['fallback'] = 'too_much_changed'
+                    return None, metrics
+
+                regions = FrameDiffService._regions(changed)
+                if not regions:
+                    metrics['fallback'] = 'no_region'
+                    return None, metrics
+
+                # 格子座標換算回像素座標
+                boxes = [
+                    (
+                        left * width // columns, top * height // rows,
+                        right * width // columns, bottom * height // rows,
+                    )
+                    for left, top, right, bottom in regions
+                ]
+                composite = FrameDiffService._composite(after.convert('RGB'), boxes)
+                buffer = io.BytesIO()
+                composite.save(buffer, format='JPEG', quality=settings.LLM_IMAGE_JPEG_QUALITY, optimize=True)
+        except (OSError, ValueError) as e:
+            logger.warning(f"前後照片比對失敗，改送整張照片: {str(e)}")
+            metrics['fallback'] = 'error'
+            return None, metrics
+        finally:
+            metrics['diff_ms'] = round((time.perf_counter() - started) * 1000, 1)
+
+        metrics.update({
+            'regions': len(boxes),
+            'output_size': list(composite.size),
+            'output_bytes': buffer.tell(),
+        })
+        return buffer.getvalue(), metrics
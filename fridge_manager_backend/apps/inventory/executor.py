@@ -0,0 +1,297 @@
+import asyncio
+import contextlib
+import logging
+import time
+from datetime import timedelta
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from openai import AsyncOpenAI, BadRequestError
+
+from apps.photos.models import Photo
+from apps.photos.timing import elapsed_ms, record_stage
+
+from .parsing import RecognizedItemStreamParser
+from .router import LLMBackend, LLMRouter, get_router
+from .services import STREAM_PARAMS, ImageRecognitionService, RecognitionJobService
+
+logger = logging.getLogger(__name__)
+
+
+def _in_thread(func):
+    # 資料庫、S3 與圖片前處理都是阻塞操作，放到執行緒池中執行，
+    # 不使用 thread_sensitive 以免所有工作排隊在同一個執行緒
+    return sync_to_async(func, thread_sensitive=False)
+
+
+class AsyncRecognitionExecutor:
+    """
+    以 asyncio 與 AsyncOpenAI 在單一行程中維持多個 LM Studio 請求的辨識執行器
+
+    同步的 Celery 任務在等待 LLM 時整個行程閒置，吞吐量受限於 prefork 的行程數；
+    此執行器讓一個行程對每個後端同時保持最多 concurrency 個請求 (每個後端一個
+    Semaphore)，每個請求由 LLMRouter 選擇負載最小的後端。待辨識的照片放入容量為 queue_size 的佇列，佇列已滿時 submit
+    會等待、offer 會拒絕，藉此對上游 (資料庫輪詢) 施加背壓。
+
+    用法：
+        executor = AsyncRecognitionExecutor()
+        await executor.run(stop_event)  # 見 manage.py recognition_worker
+    """
+    def __init__(self, concurrency: int | None = None, queue_size: int | None = None, router: LLMRouter | None = None):
+        self.router = router or get_router()
+        self.concurrency = concurrency or settings.LLM_ASYNC_CONCURRENCY
+        self.queue: asyncio.Queue[int] = asyncio.Queue(maxsize=queue_size or settings.LLM_ASYNC_QUEUE_SIZE)
+        self.stats = {'submitted': 0, 'rejected': 0, 'completed': 0, 'failed': 0, 'in_flight': 0}
+        self._clients: dict[str, AsyncOpenAI] = {}
+        self._semaphores: dict[str, asyncio.Semaphore] = {}
+        self._queued_ids: set[int] = set()
+
+    def _backend(self, base_url: str) -> tuple[AsyncOpenAI, asyncio.Semaphore]:
+        if base_url not in self._clients:
+            self._clients[base_url] = AsyncOpenAI(
+                base_url=base_url,
+                api_key="lm-studio",  # LM Studio 不需要真正的 API Key
+                timeout=settings.LMSTUDIO_TIMEOUT,
+                http_client=httpx.AsyncClient(
+                    limits=httpx.Limits(
+                        max_connections=self.concurrency,
+                        max_keepalive_connections=self.concurrency,
+                        keepalive_expiry=settings.LMSTUDIO_KEEPALIVE_EXPIRY,
+                    ),
+                ),
+            )
+            self._semaphores[base_url] = asyncio.Semaphore(self.concurrency)
+        return self._clients[base_url], self._semaphores[base_url]
+
+    @staticmethod
+    async def _create(client: AsyncOpenAI, request: dict, backend: LLMBackend):
+        # 與 ImageRecognitionService.create_completion 相同：後端不支援選用參數時重試
+        request = ImageRecognitionService.request_for_backend(request, backend)
+        try:
+            return await client.chat.completions.create(**request)
+        except BadRequestError as e:
+            fallback = ImageRecognitionService.optional_params_fallback(request, backend.url, e)
+            if fallback is None:
+                raise
+            return await client.chat.completions.create(**fallback)
+
+    async def complete(self, request: dict, photo: Photo | None = None):
+        """
+        送出一個 chat.completions 請求，同一後端同時最多 concurrency 個
+
+        Args:
+            request: ImageRecognitionService.prepare_request 返回的請求參數
+            photo: 可選，所選後端與 LLM 耗時 (llm_total) 會記錄於其 processing_metrics
+
+        Returns:
+            ChatCompletion: LLM 響應
+        """
+        async with self.router.route_async() as backend:
+            client, semaphore = self._backend(backend.url)
+            if photo is not None:
+                photo.processing_metrics['backend'] = backend.url
+            async with semaphore:
+                started = time.perf_counter()
+                self.stats['in_flight'] += 1
+                try:
+                    return await self._create(client, request, backend)
+                finally:
+                    self.stats['in_flight'] -= 1
+                    if photo is not None:
+                        record_stage(photo.processing_metrics, 'llm_total', elapsed_ms(started))
+
+    async def stream(self, request: dict, cache_key: str, photo: Photo) -> list[dict]:
+        """
+        以串流方式送出請求，每完成一個物品就立即建立 RecognizedItem
+
+        Args:
+            request: ImageRecognitionService.prepare_request 返回的請求參數
+            cache_key: prepare_request 返回的快取鍵
+            photo: 處理中的 Photo 實例，LLM 各階段耗時、token 用量與所選後端會寫入其 processing_metrics
+
+        Returns:
+            List[Dict]: 識別出的物品列表
+        """
+        save_item = _in_thread(RecognitionJobService.save_item)
+        parser = RecognizedItemStreamParser()
+        chunks = []
+        first_token_at = first_item_at = None
+        parse_ms = 0.0
+        finish_reason = None
+
+        async with self.router.route_async() as backend:
+            client, semaphore = self._backend(backend.url)
+            photo.processing_metrics['backend'] = backend.url
+            async with semaphore:
+                # 取得名額後才開始計時，不含排隊等待的時間
+                started = time.perf_counter()
+                self.stats['in_flight'] += 1
+                try:
+                    stream = await self._create(client, {**request, **STREAM_PARAMS}, backend)
+                    async for chunk in stream:
+                        ImageRecognitionService.record_usage(photo, getattr(chunk, 'usage', None))
+                        if chunk.choices and chunk.choices[0].finish_reason:
+                            finish_reason = chunk.choices[0].finish_reason
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if not delta:
+                            continue
+                        if first_token_at is None:
+                            first_token_at = time.perf_counter()
+                        chunks.append(delta)
+                        feed_started = time.perf_counter()
+                        items = parser.feed(delta)
+                        parse_ms += (time.perf_counter() - feed_started) * 1000
+                        for item in items:
+                            if first_item_at is None:
+                                first_item_at = time.perf_counter()
+                            await save_item(photo, item)
+                finally:
+                    self.stats['in_flight'] -= 1
+
+        ImageRecognitionService.record_stream_metrics(photo, started, first_token_at, first_item_at, parse_ms)
+        recognized_items, undelivered = await _in_thread(ImageRecognitionService.finish_stream)(
+            parser, ''.join(chunks), cache_key, photo, finish_reason
+        )
+        for item in undelivered:
+            await save_item(photo, item)
+        return recognized_items
+
+    def offer(self, photo_id: int) -> bool:
+        """
+        不等待地將照片放入佇列
+
+        Args:
+            photo_id: Photo 實例的 ID
+
+        Returns:
+            bool: 已放入或已在佇列中時返回 True；佇列已滿時返回 False
+        """
+        if photo_id in self._queued_ids:
+            return True
+        try:
+            self.queue.put_nowait(photo_id)
+        except asyncio.QueueFull:
+            self.stats['rejected'] += 1
+            return False
+        self._queued_ids.add(photo_id)
+        self.stats['submitted'] += 1
+        return True
+
+    async def submit(self, photo_id: int) -> None:
+        """
+        將照片放入佇列，佇列已滿時等待空位 (背壓)
+
+        Args:
+            photo_id: Photo 實例的 ID
+        """
+        if photo_id in self._queued_ids:
+            return
+        self._queued_ids.add(photo_id)
+        await self.queue.put(photo_id)
+        self.stats['submitted'] += 1
+
+    async def recognize(self, photo_id: int) -> None:
+        """
+        辨識單張照片：與 process_fridge_image 相同的步驟，但以非同步方式等待 LLM
+
+        Args:
+            photo_id: Photo 實例的 ID
+        """
+        photo = await _in_thread(RecognitionJobService.start)(photo_id)
+        if photo is None:
+            # 已被其他工作者處理或不再是 pending
+            return
+
+        try:
+            if await _in_thread(RecognitionJobService.reuse_previous_result)(photo):
+                self.stats['completed'] += 1
+                return
+
+            image_data = await _in_thread(RecognitionJobService.read_image)(photo)
+            cache_key, recognized_items, request = await _in_thread(ImageRecognitionService.prepare_request)(
+                image_data, photo
+            )
+            if recognized_items is None and settings.LLM_STREAMING:
+                recognized_items = await self.stream(request, cache_key, photo)
+            else:
+                if recognized_items is None:
+                    response = await self.complete(request, photo)
+                    ImageRecognitionService.record_usage(photo, getattr(response, 'usage', None))
+                    recognized_items = await _in_thread(ImageRecognitionService.parse_response)(
+                        response, cache_key, photo
+                    )
+                for item in recognized_items:
+                    await _in_thread(RecognitionJobService.save_item)(photo, item)
+
+            await _in_thread(RecognitionJobService.finish)(photo)
+            self.stats['completed'] += 1
+            logger.info(f"照片 {photo_id} 非同步辨識完成: {len(recognized_items)} 個物品")
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"照片 {photo_id} 非同步辨識失敗: {str(e)}", exc_info=True)
+            await _in_thread(RecognitionJobService.fail)(photo)
+
+    async def _consume(self) -> None:
+        while True:
+            photo_id = await self.queue.get()
+            try:
+                await self.recognize(photo_id)
+            finally:
+                self._queued_ids.discard(photo_id)
+                self.queue.task_done()
+
+    @staticmethod
+    def _pending_photo_ids(exclude: set[int], limit: int) -> list[int]:
+        # 包含處理中超過 RECOGNITION_STALE_SECONDS 的照片 (工作者中斷)，由 start 重新取得
+        stale_before = timezone.now() - timedelta(seconds=settings.RECOGNITION_STALE_SECONDS)
+        return list(
+            Photo.objects
+            .filter(
+                Q(recognition_status='pending')
+                | Q(recognition_status='processing', recognition_started_at__lt=stale_before)
+            )
+            .exclude(id__in=exclude)
+            .order_by('uploaded_at')
+            .values_list('id', flat=True)[:limit]
+        )
+
+    async def run(self, stop_event: asyncio.Event, poll_interval: float | None = None) -> None:
+        """
+        持續輪詢 'pending' (及逾時未完成) 的照片並辨識，直到 stop_event 被設定
+
+        Args:
+            stop_event: 設定後停止輪詢，並等待佇列中的照片處理完畢
+            poll_interval: 輪詢間隔 (秒)，預設為 settings.RECOGNITION_WORKER_POLL_INTERVAL
+        """
+        poll_interval = poll_interval or settings.RECOGNITION_WORKER_POLL_INTERVAL
+        # 每個後端各有 concurrency 個名額，消費者數量須足以讓所有後端同時滿載
+        consumers = [
+            asyncio.create_task(self._consume()) for _ in range(self.concurrency * len(self.router.backends))
+        ]
+        logger.info(
+            f"非同步辨識工作者啟動: backends={len(self.router.backends)}, "
+            f"concurrency={self.concurrency}, queue_size={self.queue.maxsize}"
+        )
+        try:
+            while not stop_event.is_set():
+                photo_ids = await _in_thread(self._pending_photo_ids)(set(self._queued_ids), self.queue.maxsize)
+                for photo_id in photo_ids:
+                    # 佇列已滿時在此等待，LLM 跟不上時不會無限制地取出照片
+                    await self.submit(photo_id)
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(stop_event.wait(), timeout=poll_interval)
+            await self.queue.join()
+        finally:
+            for consumer in consumers:
+                consumer.cancel()
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        """關閉所有後端的 HTTP 連線池"""
+        for client in self._clients.values():
+            await client.close()
+        self._clients.clear()
+        self._semaphores.clear()
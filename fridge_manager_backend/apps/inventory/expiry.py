@@ -0,0 +1,189 @@
+import math
+import re
+import unicodedata
+from datetime import date, timedelta
+
+# 各單位換算的天數 (月、年以平均天數近似)，換算後無條件進位到整天
+UNIT_DAYS = {'hour': 1 / 24, 'day': 1, 'week': 7, 'month': 30, 'year': 365}
+_UNITS = (
+    ('hour', r'小時|小时|hours?|hrs?\b|h\b'),
+    ('day', r'天|日|days?|d\b'),
+    ('week', r'週|周|星期|禮拜|礼拜|weeks?|wks?\b'),
+    ('month', r'個月|个月|月|months?|mos?\b'),
+    ('year', r'年|years?|yrs?\b'),
+)
+_CN_DIGITS = {'零': 0, '〇': 0, '一': 1, '二': 2, '兩': 2, '两': 2, '三': 3, '四': 4, '五': 5,
+              '六': 6, '七': 7, '八': 8, '九': 9}
+_EN_NUMBERS = {'a': 1, 'an': 1, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6,
+               'seven': 7, 'eight': 8, 'nine': 9, 'ten': 10, 'twelve': 12}
+# 「幾天」、「a few days」之類的模糊數量視為 2~5
+_VAGUE = (2, 5)
+_WORD_NUMBERS = {
+    '半': (0.5, 0.5),
+    **dict.fromkeys(('幾', '几', '數', '数', 'a few', 'few', 'several'), _VAGUE),
+    **dict.fromkeys(('a couple of', 'couple of'), (2, 2)),
+    **{word: (value, value) for word, value in _EN_NUMBERS.items()},
+}
+
+_NUMBER = (
+    r'\d+(?:\.\d+)?|[零〇一二兩两三四五六七八九十]+|半|幾|几|數|数'
+    r'|a\s+few|few|several|a\s+couple\s+of|couple\s+of|' + '|'.join(sorted(_EN_NUMBERS, key=len, reverse=True))
+)
+_UNIT = '|'.join(f'(?P<{{prefix}}{name}>{pattern})' for name, pattern in _UNITS)
+_RANGE_SEPARATOR = r'-|~|–|—|至|到|to'
+
+
+def _quantity(prefix: str, unit_optional: bool = False) -> str:
+    # 數量 + (個) + (半) + 單位 + (半)，例如「一個半月」、「兩週半」、「3 days」
+    unit = _UNIT.format(prefix=prefix)
+    unit_part = f'(?:\\s*(?:個|个)?\\s*(?P<{prefix}half>半)?\\s*(?:{unit})(?P<{prefix}half2>半)?)'
+    # 只排除緊接在英數字之後的數量 (例如 "b2 days")，中文字之後仍可匹配 (例如「約3天」)
+    return f'(?<![a-z0-9.])(?P<{prefix}num>{_NUMBER}){unit_part}{"?" if unit_optional else ""}'
+
+
+_RANGE_RE = re.compile(f'{_quantity("a_", unit_optional=True)}\\s*(?:{_RANGE_SEPARATOR})\\s*{_quantity("b_")}')
+_SINGLE_RE = re.compile(_quantity('s_'))
+_DATE_RE = re.compile(r'(?P<year>\d{4})\s*[-/.年]\s*(?P<month>\d{1,2})\s*[-/.月]\s*(?P<day>\d{1,2})')
+_WITHIN_BEFORE = re.compile(r'(within|up\s+to|no\s+more\s+than|不超過|不超过|最多)\s*$')
+_WITHIN_AFTER = re.compile(r'^\s*(內|内|以內|以内|之內|之内)')
+_OVER_BEFORE = re.compile(r'(more\s+than|over|at\s+least|超過|超过|至少)\s*$')
+_OVER_AFTER = re.compile(r'^\s*(以上|or\s+more|\+)')
+# (關鍵字, 距離放入日期的天數)
+_KEYWORDS = (
+    (re.compile(r'已過期|已经过期|已經過期|過期了|expired'), 0),
+    (re.compile(r'今天|當天|当天|今日|today'), 0),
+    (re.compile(r'明天|明日|tomorrow'), 1),
+    (re.compile(r'後天|后天'), 2),
+)
+
+
+def _chinese_number(text: str) -> int | None:
+    if '十' in text:
+        tens, _, units = text.partition('十')
+        if any(char not in _CN_DIGITS for char in tens + units) or len(tens) > 1 or len(units) > 1:
+            return None
+        return _CN_DIGITS.get(tens, 1) * 10 + _CN_DIGITS.get(units, 0)
+    if len(text) != 1:
+        return None
+    return _CN_DIGITS.get(text)
+
+
+def _number(text: str) -> tuple[float, float] | None:
+    # 返回數量的 (下限, 上限)
+    text = re.sub(r'\s+', ' ', text)
+    if text[0].isdigit():
+        value = float(text)
+        return value, value
+    if text in _WORD_NUMBERS:
+        return _WORD_NUMBERS[text]
+    if len(text) == 2 and all(char in _CN_DIGITS for char in text):  # noqa: PLR2004 - 「兩三天」、「五六天」
+        low, high = _CN_DIGITS[text[0]], _CN_DIGITS[text[1]]
+        return (low, high) if high == low + 1 else None
+    value = _chinese_number(text)
+    return (value, value) if value is not None else None
+
+
+def _days(match: re.Match, prefix: str, default_unit: str | None = None) -> tuple[int, int] | None:
+    number = _number(match.group(f'{prefix}num'))
+    unit = next((name for name, _ in _UNITS if match.group(f'{prefix}{name}')), default_unit)
+    if number is None or unit is None:
+        return None
+    half = 0.5 if match.group(f'{prefix}half') or match.group(f'{prefix}half2') else 0
+    low, high = number
+    return math.ceil((low + half) * UNIT_DAYS[unit]), math.ceil((high + half) * UNIT_DAYS[unit])
+
+
+def _range_unit(match: re.Match) -> str | None:
+    return next((name for name, _ in _UNITS if match.group(f'b_{name}')), None)
+
+
+def _keyword_days(text: str) -> tuple[int, int] | None:
+    return next(((days, days) for pattern, days in _KEYWORDS if pattern.search(text)), None)
+
+
+def _range_days(text: str) -> tuple[int, int] | None:
+    match = _RANGE_RE.search(text)
+    if match is None:
+        return None
+    low = _days(match, 'a_', default_unit=_range_unit(match))
+    high = _days(match, 'b_')
+    if low is None or high is None:
+        return None
+    return min(low[0], high[0]), max(low[1], high[1])
+
+
+def _single_days(text: str) -> tuple[int | None, int | None] | None:
+    match = _SINGLE_RE.search(text)
+    days = _days(match, 's_') if match else None
+    if days is None:
+        return None
+    before, after = text[:match.start()], text[match.end():]
+    if _WITHIN_BEFORE.search(before) or _WITHIN_AFTER.search(after):
+        # 「一週內」是模型對保存期限的估計，不表示放入當天就可能到期
+        return days[1], days[1]
+    if _OVER_BEFORE.search(before) or _OVER_AFTER.search(after):
+        return days[0], None
+    return days
+
+
+def parse_expiry_days(text: str) -> tuple[int | None, int | None] | None:
+    """
+    將保質期描述解析為距離放入日期的天數範圍
+
+    支援中英文的常見說法，例如「一週內」、「2-3週」、「約3天」、「一個半月」、「半年」、
+    「幾天」、「明天」、「已過期」、「within a week」、「1-2 weeks」、「about 5 days」、
+    「a few days」、「3 months or more」。
+
+    「N 內 / within N」視為 N 天後到期；「N 以上 / more than N」沒有上限。
+
+    Args:
+        text: 保質期描述
+
+    Returns:
+        Tuple[int | None, int | None] | None: (最早, 最晚) 的天數，上限未知時為 None；
+        無法解析時返回 None
+    """
+    if not text:
+        return None
+    normalized = unicodedata.normalize('NFKC', text).lower()
+    for parser in (_keyword_days, _range_days, _single_days):
+        days = parser(normalized)
+        if days is not None:
+            return days
+    return None
+
+
+def expiry_range(text: str, placement_date: date | None) -> tuple[date | None, date | None]:
+    """
+    由保質期描述與放入日期計算到期日期範圍
+
+    描述中寫明的日期 (例如「2025-06-01」) 直接作為到期日。
+
+    Args:
+        text: estimated_expiry_info
+        placement_date: 放入日期
+
+    Returns:
+        Tuple[date | None, date | None]: (expiry_min_date, expiry_max_date)；
+        無法解析或沒有放入日期時為 (None, None)
+    """
+    if text:
+        match = _DATE_RE.search(unicodedata.normalize('NFKC', text))
+        if match:
+            try:
+                explicit = date(int(match['year']), int(match['month']), int(match['day']))
+            except ValueError:
+                explicit = None
+            if explicit is not None:
+                return explicit, explicit
+
+    if placement_date is None:
+        return None, None
+    days = parse_expiry_days(text)
+    if days is None:
+        return None, None
+    low, high = days
+    return (
+        placement_date + timedelta(days=low),
+        placement_date + timedelta(days=high) if high is not None else None,
+    )
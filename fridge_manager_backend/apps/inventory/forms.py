@@ -1,4 +1,7 @@
 from django import forms
+from django.utils import timezone
+
+from apps.fridges.models import FridgeDevice
 
 from .models import RecognizedItem
 
@@ -13,3 +16,24 @@ class RecognizedItemForm(forms.ModelForm):
             'estimated_expiry_info': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
             'notes': forms.Textarea(attrs={'class': 'form-control', 'rows': 3}),
         }
+
+
+class ManualItemForm(RecognizedItemForm):
+    """手動新增物品：另外選擇冰箱與放入日期，保存後加入冰箱的目前庫存"""
+    fridge_device = forms.ModelChoiceField(
+        queryset=FridgeDevice.objects.filter(is_active=True),
+        label="冰箱",
+        widget=forms.Select(attrs={'class': 'form-select'}),
+    )
+    field_order = ['fridge_device']
+
+    class Meta(RecognizedItemForm.Meta):
+        fields = ['name', 'quantity', 'placement_date', 'estimated_expiry_info', 'notes']
+        widgets = {
+            **RecognizedItemForm.Meta.widgets,
+            'placement_date': forms.DateInput(attrs={'class': 'form-control', 'type': 'date'}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['placement_date'].initial = timezone.localdate()
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.inventory.services import ExpiryDateService
+
+
+class Command(BaseCommand):
+    help = '解析 estimated_expiry_info 並回填到期日 (expiry_min_date / expiry_max_date)，以多個行程並行解析'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--model', choices=sorted(ExpiryDateService.MODELS), action='append',
+            help='只回填指定的資料表 (recognized 或 inventory)，可重複指定',
+        )
+        parser.add_argument('--workers', type=int, default=4, help='解析的行程數')
+        parser.add_argument('--batch-size', type=int, default=2000, help='每批讀取並寫入的筆數')
+        parser.add_argument('--all', action='store_true', help='重新計算所有物品 (預設只處理尚未有到期日的物品)')
+
+    def handle(self, *args, **options):
+        for name in options['model'] or sorted(ExpiryDateService.MODELS):
+            started = time.perf_counter()
+            result = ExpiryDateService.backfill(
+                ExpiryDateService.MODELS[name],
+                workers=options['workers'],
+                batch_size=options['batch_size'],
+                recompute=options['all'],
+            )
+            elapsed = time.perf_counter() - started
+            self.stdout.write(self.style.SUCCESS(
+                f"{name}: 讀取 {result['scanned']} 筆，解析出到期日 {result['parsed']} 筆，耗時 {elapsed:.1f} 秒"
+            ))
@@ -0,0 +1,117 @@
+import asyncio
+import http.server
+import io
+import json
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+from openai import OpenAI
+from PIL import Image
+
+from apps.fridges.models import FridgeDevice
+from apps.inventory.executor import AsyncRecognitionExecutor
+from apps.inventory.router import LLMRouter
+from apps.inventory.services import ImageRecognitionService
+from apps.photos.models import Photo
+
+MOCK_CONTENT = '{"recognized_items": [{"name": "牛奶", "quantity": "1 瓶", "estimated_expiry_info": "一週內"}]}'
+
+# 每個 prefork 模擬行程各自持有一個客戶端
+_process_client = None
+
+
+def _build_mock_handler(latency: float, slots: threading.Semaphore):
+    class MockLMStudioHandler(http.server.BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_POST(self):  # noqa: N802 - http.server 的命名慣例
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            # slots 模擬後端能同時推論的請求數
+            with slots:
+                time.sleep(latency)
+            body = json.dumps({
+                'id': 'bench', 'object': 'chat.completion', 'created': 0, 'model': 'mock',
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': MOCK_CONTENT}}],
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return MockLMStudioHandler
+
+
+def _sync_request(base_url: str, request: dict) -> None:
+    # 與 process_fridge_image 相同：每個行程一次只處理一個請求
+    global _process_client  # noqa: PLW0603 - 每個行程共用一個客戶端
+    if _process_client is None:
+        _process_client = OpenAI(base_url=base_url, api_key='lm-studio')
+    _process_client.chat.completions.create(**request)
+
+
+class Command(BaseCommand):
+    help = '以本機模擬的 LM Studio 比較 prefork 同步任務與非同步辨識執行器的吞吐量 (照片/分鐘)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--photos', type=int, default=48, help='每種模式辨識的照片數')
+        parser.add_argument('--latency', type=float, default=0.5, help='模擬 LLM 每個請求的耗時 (秒)')
+        parser.add_argument('--server-slots', type=int, default=16, help='模擬後端同時推論的請求數')
+        parser.add_argument('--processes', type=int, default=2, help='prefork 模式的行程數')
+        parser.add_argument('--concurrency', type=int, default=8, help='非同步模式每個後端同時進行的請求數')
+
+    def handle(self, *args, **options):
+        slots = threading.Semaphore(options['server_slots'])
+        server = http.server.ThreadingHTTPServer(
+            ('127.0.0.1', 0), _build_mock_handler(options['latency'], slots)
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_port}/v1"
+
+        try:
+            request = self._build_request()
+            photos = options['photos']
+
+            started = time.perf_counter()
+            with ProcessPoolExecutor(max_workers=options['processes']) as pool:
+                list(pool.map(_sync_request, [base_url] * photos, [request] * photos))
+            prefork_elapsed = time.perf_counter() - started
+
+            router = LLMRouter([{'url': base_url, 'model': request['model']}])
+            async_elapsed = asyncio.run(self._run_async(request, photos, options['concurrency'], router))
+        finally:
+            server.shutdown()
+
+        self.stdout.write(f"{'mode':<28} {'elapsed s':>10} {'photos/min':>12}")
+        for label, elapsed in (
+            (f"prefork ({options['processes']} processes)", prefork_elapsed),
+            (f"async (concurrency={options['concurrency']})", async_elapsed),
+        ):
+            self.stdout.write(f"{label:<28} {elapsed:>10.2f} {photos / elapsed * 60:>12.1f}")
+
+    @staticmethod
+    def _build_request() -> dict:
+        buffer = io.BytesIO()
+        Image.effect_noise((1600, 1200), 40).convert('RGB').save(buffer, format='JPEG', quality=85)
+        photo = Photo(fridge_device=FridgeDevice(name='bench'), timestamp_esp=timezone.now())
+        with override_settings(RECOGNITION_CACHE_ENABLED=False):
+            _, _, request = ImageRecognitionService.prepare_request(buffer.getvalue(), photo)
+        return request
+
+    @staticmethod
+    async def _run_async(request: dict, photos: int, concurrency: int, router: LLMRouter) -> float:
+        executor = AsyncRecognitionExecutor(concurrency=concurrency, router=router)
+        started = time.perf_counter()
+        try:
+            await asyncio.gather(*(executor.complete(request) for _ in range(photos)))
+        finally:
+            await executor.aclose()
+        return time.perf_counter() - started
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.router import LLMRouter
+
+
+class Command(BaseCommand):
+    help = '探測各 LM Studio 後端的健康狀態，並顯示跨行程累計的請求數、失敗數與平均耗時'
+
+    def handle(self, *args, **options):
+        router = LLMRouter()
+        totals = {total['url']: total for total in router.totals()}
+
+        self.stdout.write(
+            f"{'url':<40} {'model':<24} {'weight':>6} {'healthy':>8} {'requests':>9} {'failures':>9} {'avg_ms':>9}"
+        )
+        for backend in router.backends:
+            healthy = router.probe(backend)
+            total = totals[backend.url]
+            avg_ms = total['avg_ms'] if total['avg_ms'] is not None else '-'
+            self.stdout.write(
+                f"{backend.url:<40} {backend.model:<24} {backend.weight:>6g} {healthy!s:>8} "
+                f"{total['requests']:>9} {total['failures']:>9} {avg_ms:>9}"
+            )
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.notifiers import NOTIFIERS, get_notifiers
+from apps.inventory.services import ExpiryNotificationService
+
+
+class Command(BaseCommand):
+    help = '立即寄出到期提醒 (與 Celery beat 排程的 notify_expiring_items 任務相同)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None, help='提前提醒的天數，預設為 EXPIRY_NOTIFY_DAYS')
+        parser.add_argument(
+            '--notifier', choices=sorted(NOTIFIERS), action='append',
+            help='發送方式，可重複指定，預設為 EXPIRY_NOTIFIERS',
+        )
+        parser.add_argument('--time-budget', type=float, default=None, help='秒數上限，預設為 EXPIRY_NOTIFY_TIME_BUDGET')
+
+    def handle(self, *args, **options):
+        result = ExpiryNotificationService.run(
+            days=options['days'],
+            time_budget=options['time_budget'],
+            notifiers=get_notifiers(options['notifier']),
+        )
+        summary = (
+            f"提醒 {result['users']} 位用戶 ({result['items']} 項物品)，沒有聯絡方式 {result['skipped']} 位，"
+            f"失敗 {result['failed']} 位，耗時 {result['elapsed_ms']} ms"
+            + ("" if result['complete'] else "，尚有待提醒的用戶留待下次執行")
+        )
+        self.stdout.write(self.style.WARNING(summary) if result['failed'] else self.style.SUCCESS(summary))
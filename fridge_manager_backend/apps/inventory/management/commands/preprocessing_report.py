@@ -0,0 +1,58 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.photos.models import Photo
+
+BASELINE_CONFIG = 'off'
+
+
+class Command(BaseCommand):
+    help = '依前處理設定分組統計已辨識照片的圖片大小與 LLM 耗時，用於比較不同設定節省的時間'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='統計最近幾天的照片')
+        parser.add_argument('--device', default=None, help='只統計指定 ESP32 設備 ID 的照片')
+
+    def handle(self, *args, **options):
+        photos = Photo.objects.filter(
+            recognition_status='completed',
+            uploaded_at__gte=timezone.now() - timedelta(days=options['days']),
+        )
+        if options['device']:
+            photos = photos.filter(fridge_device__device_id_esp=options['device'])
+
+        groups = defaultdict(list)
+        for metrics in photos.values_list('processing_metrics', flat=True).iterator():
+            preprocessing = (metrics or {}).get('preprocessing')
+            # 舊記錄的 LLM 耗時在 'llm_ms'，之後記錄於 stages['llm_total']
+            llm_ms = metrics.get('stages', {}).get('llm_total', metrics.get('llm_ms')) if metrics else None
+            if preprocessing and llm_ms is not None:
+                groups[preprocessing['config']].append({**preprocessing, 'llm_ms': llm_ms})
+
+        if not groups:
+            self.stdout.write('沒有包含前處理指標的已辨識照片。')
+            return
+
+        def average(rows, key):
+            values = [row[key] for row in rows if key in row]
+            return sum(values) / len(values) if values else 0.0
+
+        baseline_llm_ms = average(groups[BASELINE_CONFIG], 'llm_ms') if BASELINE_CONFIG in groups else None
+
+        self.stdout.write(
+            f"{'config':<32} {'photos':>6} {'in KB':>8} {'out KB':>8} {'prep ms':>8} {'llm ms':>9} {'saved ms':>9}"
+        )
+        for config, rows in sorted(groups.items()):
+            llm_ms = average(rows, 'llm_ms')
+            prep_ms = average(rows, 'preprocess_ms')
+            # 與停用前處理的照片比較；含前處理本身的耗時
+            saved = f"{baseline_llm_ms - llm_ms - prep_ms:>9.1f}" if baseline_llm_ms is not None else f"{'n/a':>9}"
+            self.stdout.write(
+                f"{config:<32} {len(rows):>6} {average(rows, 'input_bytes') / 1024:>8.1f} "
+                f"{average(rows, 'output_bytes') / 1024:>8.1f} {prep_ms:>8.1f} {llm_ms:>9.1f} {saved}"
+            )
+        if baseline_llm_ms is None:
+            self.stdout.write(self.style.WARNING('沒有停用前處理 (LLM_IMAGE_PREPROCESS=False) 的基準照片，無法計算節省時間'))
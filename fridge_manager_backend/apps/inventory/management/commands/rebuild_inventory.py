@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from apps.fridges.models import FridgeDevice
+from apps.inventory.services import InventoryReconciliationService
+
+
+class Command(BaseCommand):
+    help = '清空並以各冰箱最新一張已辨識照片重建目前庫存 (FridgeInventoryItem)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--device', type=int, help='只重建指定 ID 的冰箱')
+
+    def handle(self, *args, **options):
+        devices = FridgeDevice.objects.all()
+        if options['device']:
+            devices = devices.filter(id=options['device'])
+
+        for device in devices:
+            result = InventoryReconciliationService.rebuild(device)
+            if result is None:
+                self.stdout.write(f"{device.name}: 沒有已辨識的照片，庫存已清空")
+            else:
+                self.stdout.write(f"{device.name}: 新增 {result['added']} 個物品")
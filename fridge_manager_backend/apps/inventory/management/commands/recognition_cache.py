@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from apps.inventory.cache import RecognitionCache
+from apps.inventory.services import ImageRecognitionService
+
+
+class Command(BaseCommand):
+    help = '顯示辨識結果快取的命中統計與 LLM 輸出的解析統計，並可淘汰資料庫中過期或超過上限的項目'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--evict', action='store_true', help='先執行資料庫層的 TTL/LRU 淘汰')
+
+    def handle(self, *args, **options):
+        if options['evict']:
+            deleted = RecognitionCache.evict()
+            self.stdout.write(f"已淘汰 {deleted} 筆資料庫快取項目")
+
+        for name, value in RecognitionCache.stats().items():
+            self.stdout.write(f"{name:<16} {value}")
+        for name, value in ImageRecognitionService.parse_stats().items():
+            self.stdout.write(f"{name:<16} {value}")
@@ -0,0 +1,31 @@
+import asyncio
+import signal
+
+from django.core.management.base import BaseCommand
+
+from apps.inventory.executor import AsyncRecognitionExecutor
+
+
+class Command(BaseCommand):
+    help = '以非同步執行器持續辨識 pending 照片 (搭配 RECOGNITION_EXECUTOR=async)，每個後端同時保持多個 LLM 請求'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=None, help='每個後端同時進行的 LLM 請求數')
+        parser.add_argument('--queue-size', type=int, default=None, help='待辨識佇列的容量 (背壓上限)')
+        parser.add_argument('--poll-interval', type=float, default=None, help='輪詢 pending 照片的間隔 (秒)')
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run(options))
+
+    async def _run(self, options):
+        executor = AsyncRecognitionExecutor(concurrency=options['concurrency'], queue_size=options['queue_size'])
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop_event.set)
+
+        self.stdout.write(
+            f"非同步辨識工作者啟動 (concurrency={executor.concurrency}, queue_size={executor.queue.maxsize})，按 Ctrl+C 停止"
+        )
+        await executor.run(stop_event, poll_interval=options['poll_interval'])
+        self.stdout.write(self.style.SUCCESS(f"工作者已停止: {executor.stats}"))
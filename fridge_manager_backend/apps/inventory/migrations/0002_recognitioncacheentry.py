@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecognitionCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(help_text='圖片摘要、模型與提示詞版本組成的快取鍵', max_length=128, unique=True)),
+                ('recognized_items', models.JSONField(default=list, help_text='LLM 辨識出的物品列表')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, help_text='最後一次命中或寫入的時間 (LRU 淘汰依據)')),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='過期時間')),
+                ('hit_count', models.PositiveIntegerField(default=0, help_text='命中次數')),
+            ],
+            options={
+                'verbose_name': '辨識快取',
+                'verbose_name_plural': '辨識快取',
+            },
+        ),
+    ]
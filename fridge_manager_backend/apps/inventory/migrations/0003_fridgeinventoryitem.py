@@ -0,0 +1,38 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:13
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fridges', '0006_fridgedevice_inventory_synced_at'),
+        ('inventory', '0002_recognitioncacheentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FridgeInventoryItem',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='物品名稱', max_length=100)),
+                ('normalized_name', models.CharField(help_text='比對用的名稱 (去除空白、不分大小寫)', max_length=100)),
+                ('quantity', models.CharField(help_text='數量描述', max_length=50)),
+                ('estimated_expiry_info', models.TextField(help_text='預估保質期信息')),
+                ('placement_date', models.DateField(help_text='放置日期')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('fridge_device', models.ForeignKey(help_text='物品所在的冰箱', on_delete=django.db.models.deletion.CASCADE, related_name='inventory_items', to='fridges.fridgedevice')),
+                ('owner', models.ForeignKey(help_text='物品擁有者', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='inventory_items', to=settings.AUTH_USER_MODEL)),
+                ('source_item', models.ForeignKey(blank=True, help_text='最近一次改變此物品內容的辨識記錄', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='inventory.recognizeditem')),
+            ],
+            options={
+                'verbose_name': '冰箱庫存',
+                'verbose_name_plural': '冰箱庫存',
+                'ordering': ['placement_date', 'id'],
+                'indexes': [models.Index(fields=['fridge_device', 'normalized_name'], name='inventory_device_name_idx')],
+            },
+        ),
+    ]
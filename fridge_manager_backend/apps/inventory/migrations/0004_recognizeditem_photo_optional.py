@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_fridgeinventoryitem'),
+        ('photos', '0003_photo_duplicate_of_photo_perceptual_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recognizeditem',
+            name='photo',
+            field=models.ForeignKey(blank=True, help_text='物品來源照片，手動新增的物品為空', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='recognized_items', to='photos.photo'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+from django.db import migrations
+
+
+def populate_inventory(apps, schema_editor):
+    # 與 InventoryReconciliationService.rebuild 相同：以各冰箱最新一張已辨識照片建立目前庫存，
+    # 已有庫存的冰箱不更動
+    FridgeDevice = apps.get_model('fridges', 'FridgeDevice')
+    FridgeInventoryItem = apps.get_model('inventory', 'FridgeInventoryItem')
+    Photo = apps.get_model('photos', 'Photo')
+    RecognizedItem = apps.get_model('inventory', 'RecognizedItem')
+
+    stocked = set(FridgeInventoryItem.objects.values_list('fridge_device_id', flat=True).distinct())
+    for device in FridgeDevice.objects.exclude(id__in=stocked):
+        latest = (
+            Photo.objects
+            .filter(fridge_device=device, recognition_status='completed')
+            .order_by('-uploaded_at')
+            .first()
+        )
+        if latest is None:
+            continue
+        items = [
+            FridgeInventoryItem(
+                fridge_device=device,
+                name=item.name,
+                normalized_name=''.join(item.name.split()).casefold(),
+                quantity=item.quantity,
+                estimated_expiry_info=item.estimated_expiry_info,
+                placement_date=item.placement_date,
+                owner_id=item.owner_id,
+                source_item=item,
+            )
+            for item in RecognizedItem.objects.filter(photo=latest)
+        ]
+        FridgeInventoryItem.objects.bulk_create(items)
+        FridgeDevice.objects.filter(pk=device.pk).update(inventory_synced_at=latest.uploaded_at)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fridges', '0006_fridgedevice_inventory_synced_at'),
+        ('inventory', '0004_recognizeditem_photo_optional'),
+        ('photos', '0003_photo_duplicate_of_photo_perceptual_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_inventory, migrations.RunPython.noop),
+    ]
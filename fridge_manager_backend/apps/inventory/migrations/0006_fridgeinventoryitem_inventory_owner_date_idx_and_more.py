@@ -0,0 +1,29 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fridges', '0006_fridgedevice_inventory_synced_at'),
+        ('inventory', '0005_populate_fridge_inventory'),
+        ('photos', '0006_photo_preview_key_photo_thumbnail_bytes_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='fridgeinventoryitem',
+            index=models.Index(fields=['owner', 'placement_date', 'id'], name='inventory_owner_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recognizeditem',
+            index=models.Index(fields=['-added_at', '-id'], name='item_added_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recognizeditem',
+            index=models.Index(fields=['owner', '-added_at'], name='item_owner_added_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fridges', '0006_fridgedevice_inventory_synced_at'),
+        ('inventory', '0006_fridgeinventoryitem_inventory_owner_date_idx_and_more'),
+        ('photos', '0007_photo_photo_uploaded_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fridgeinventoryitem',
+            name='expiry_max_date',
+            field=models.DateField(blank=True, help_text='由保質期信息推算的最晚到期日 (未知時為空)', null=True),
+        ),
+        migrations.AddField(
+            model_name='fridgeinventoryitem',
+            name='expiry_min_date',
+            field=models.DateField(blank=True, help_text='由保質期信息推算的最早到期日', null=True),
+        ),
+        migrations.AddField(
+            model_name='recognizeditem',
+            name='expiry_max_date',
+            field=models.DateField(blank=True, help_text='由保質期信息推算的最晚到期日 (未知時為空)', null=True),
+        ),
+        migrations.AddField(
+            model_name='recognizeditem',
+            name='expiry_min_date',
+            field=models.DateField(blank=True, help_text='由保質期信息推算的最早到期日', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='fridgeinventoryitem',
+            index=models.Index(fields=['owner', 'expiry_min_date'], name='inventory_owner_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fridgeinventoryitem',
+            index=models.Index(fields=['fridge_device', 'expiry_min_date'], name='inventory_device_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='recognizeditem',
+            index=models.Index(fields=['owner', 'expiry_min_date'], name='item_owner_expiry_idx'),
+        ),
+    ]
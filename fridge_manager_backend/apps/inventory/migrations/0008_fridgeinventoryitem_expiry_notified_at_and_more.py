@@ -0,0 +1,25 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fridges', '0006_fridgedevice_inventory_synced_at'),
+        ('inventory', '0007_fridgeinventoryitem_expiry_max_date_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='fridgeinventoryitem',
+            name='expiry_notified_at',
+            field=models.DateTimeField(blank=True, help_text='已寄出到期提醒的時間，到期日改變時清空以重新提醒', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='fridgeinventoryitem',
+            index=models.Index(condition=models.Q(('expiry_min_date__isnull', False), ('expiry_notified_at__isnull', True), ('owner__isnull', False)), fields=['owner', 'expiry_min_date'], name='inventory_expiry_pending_idx'),
+        ),
+    ]
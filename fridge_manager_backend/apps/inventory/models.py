@@ -1,20 +1,27 @@
 from django.conf import settings
 from django.db import models
 
+from apps.fridges.models import FridgeDevice
 from apps.photos.models import Photo
 
+from .expiry import expiry_range
+
 
 class RecognizedItem(models.Model):
     photo = models.ForeignKey(
         Photo,
         on_delete=models.CASCADE,
+        null=True,
+        blank=True,
         related_name='recognized_items',
-        help_text="物品來源照片"
+        help_text="物品來源照片，手動新增的物品為空"
     )
     name = models.CharField(max_length=100, help_text="物品名稱")
     quantity = models.CharField(max_length=50, help_text="數量描述")
     estimated_expiry_info = models.TextField(help_text="預估保質期信息")
     placement_date = models.DateField(help_text="放置日期")
+    expiry_min_date = models.DateField(null=True, blank=True, help_text="由保質期信息推算的最早到期日")
+    expiry_max_date = models.DateField(null=True, blank=True, help_text="由保質期信息推算的最晚到期日 (未知時為空)")
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.SET_NULL,
@@ -29,6 +36,103 @@ class RecognizedItem(models.Model):
         verbose_name = "辨識物品"
         verbose_name_plural = "辨識物品"
         ordering = ['-added_at']
+        indexes = [
+            # 物品列表的游標分頁 (全部 / 依擁有者)
+            models.Index(fields=['-added_at', '-id'], name='item_added_idx'),
+            models.Index(fields=['owner', '-added_at'], name='item_owner_added_idx'),
+            # 「N 天內到期」以 expiry_min_date 範圍掃描
+            models.Index(fields=['owner', 'expiry_min_date'], name='item_owner_expiry_idx'),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.quantity}) - {self.owner.username if self.owner else '未知擁有者'}"
+
+    def save(self, *args, **kwargs):
+        # 每次保存都依保質期信息重新推算到期日；bulk_create 的呼叫端需自行設定
+        self.expiry_min_date, self.expiry_max_date = expiry_range(self.estimated_expiry_info, self.placement_date)
+        super().save(*args, **kwargs)
+
+
+class FridgeInventoryItem(models.Model):
+    """
+    冰箱目前內容的物化表
+
+    每張照片辨識完成後由 InventoryReconciliationService 與辨識結果比對並增量更新，
+    查詢某台冰箱現有物品時只需讀取目前的物品，不必掃描所有照片的 RecognizedItem。
+    """
+    fridge_device = models.ForeignKey(
+        FridgeDevice,
+        on_delete=models.CASCADE,
+        related_name='inventory_items',
+        help_text="物品所在的冰箱"
+    )
+    name = models.CharField(max_length=100, help_text="物品名稱")
+    normalized_name = models.CharField(max_length=100, help_text="比對用的名稱 (去除空白、不分大小寫)")
+    quantity = models.CharField(max_length=50, help_text="數量描述")
+    estimated_expiry_info = models.TextField(help_text="預估保質期信息")
+    placement_date = models.DateField(help_text="放置日期")
+    expiry_min_date = models.DateField(null=True, blank=True, help_text="由保質期信息推算的最早到期日")
+    expiry_max_date = models.DateField(null=True, blank=True, help_text="由保質期信息推算的最晚到期日 (未知時為空)")
+    expiry_notified_at = models.DateTimeField(
+        null=True, blank=True, help_text="已寄出到期提醒的時間，到期日改變時清空以重新提醒"
+    )
+    owner = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='inventory_items',
+        help_text="物品擁有者"
+    )
+    source_item = models.ForeignKey(
+        RecognizedItem,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        help_text="最近一次改變此物品內容的辨識記錄"
+    )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "冰箱庫存"
+        verbose_name_plural = "冰箱庫存"
+        ordering = ['placement_date', 'id']
+        indexes = [
+            models.Index(fields=['fridge_device', 'normalized_name'], name='inventory_device_name_idx'),
+            # 「我的冰箱物品」依擁有者游標分頁
+            models.Index(fields=['owner', 'placement_date', 'id'], name='inventory_owner_date_idx'),
+            # 「N 天內到期」(依擁有者 / 依冰箱) 以 expiry_min_date 範圍掃描
+            models.Index(fields=['owner', 'expiry_min_date'], name='inventory_owner_expiry_idx'),
+            models.Index(fields=['fridge_device', 'expiry_min_date'], name='inventory_device_expiry_idx'),
+            # 到期提醒排程只掃描尚未提醒的物品，提醒後即離開此部分索引
+            models.Index(
+                fields=['owner', 'expiry_min_date'],
+                name='inventory_expiry_pending_idx',
+                condition=models.Q(expiry_notified_at__isnull=True, expiry_min_date__isnull=False, owner__isnull=False),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.quantity}) - {self.fridge_device.name}"
+
+
+class RecognitionCacheEntry(models.Model):
+    """
+    辨識結果快取的資料庫備援層 (主要快取存放在 Redis)
+
+    以圖片 SHA-256、模型名稱與提示詞版本組成的鍵值索引，
+    Redis 無法使用或鍵值已被淘汰時仍可避免重複呼叫 LLM。
+    """
+    key = models.CharField(max_length=128, unique=True, help_text="圖片摘要、模型與提示詞版本組成的快取鍵")
+    recognized_items = models.JSONField(default=list, help_text="LLM 辨識出的物品列表")
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(db_index=True, help_text="最後一次命中或寫入的時間 (LRU 淘汰依據)")
+    expires_at = models.DateTimeField(db_index=True, help_text="過期時間")
+    hit_count = models.PositiveIntegerField(default=0, help_text="命中次數")
+
+    class Meta:
+        verbose_name = "辨識快取"
+        verbose_name_plural = "辨識快取"
+
+    def __str__(self):
+        return f"{self.key} ({len(self.recognized_items)} 項)"
@@ -0,0 +1,143 @@
+import logging
+
+import httpx
+from django.conf import settings
+from django.core.mail import send_mail
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+def digest_items(items) -> list[dict]:
+    """
+    將即將到期的 FridgeInventoryItem 轉為提醒內容
+
+    Args:
+        items: 同一位用戶、已依到期日排序的 FridgeInventoryItem (需 select_related('fridge_device'))
+
+    Returns:
+        List[Dict]: 每個物品的名稱、數量、冰箱、到期日範圍與剩餘天數 (負數表示已過期)
+    """
+    today = timezone.localdate()
+    return [
+        {
+            'id': item.id,
+            'name': item.name,
+            'quantity': item.quantity,
+            'fridge': item.fridge_device.name,
+            'expiry_min_date': item.expiry_min_date.isoformat(),
+            'expiry_max_date': item.expiry_max_date.isoformat() if item.expiry_max_date else None,
+            'days_left': (item.expiry_min_date - today).days,
+        }
+        for item in items
+    ]
+
+
+def digest_text(entries: list[dict]) -> str:
+    """
+    提醒內容的純文字版本 (控制台與電子郵件共用)
+
+    Args:
+        entries: digest_items 的結果
+
+    Returns:
+        str: 每個物品一行的文字
+    """
+    lines = []
+    for entry in entries:
+        if entry['days_left'] < 0:
+            when = f"已過期 {-entry['days_left']} 天"
+        elif entry['days_left'] == 0:
+            when = "今天到期"
+        else:
+            when = f"{entry['days_left']} 天後到期"
+        lines.append(f"- {entry['name']} ({entry['quantity']})，{entry['fridge']}，{when} ({entry['expiry_min_date']})")
+    return '\n'.join(lines)
+
+
+class ExpiryNotifier:
+    """
+    到期提醒的發送方式
+
+    子類別實作 send；發送失敗時拋出例外，該用戶的物品會保持未提醒狀態，下次排程重試。
+    """
+    name = ''
+
+    def send(self, user, entries: list[dict]) -> bool:
+        """
+        發送一位用戶的到期提醒
+
+        Args:
+            user: 物品擁有者
+            entries: digest_items 的結果
+
+        Returns:
+            bool: 是否已送出 (用戶沒有可用的聯絡方式時返回 False，物品仍標記為已提醒)
+        """
+        raise NotImplementedError
+
+
+class ConsoleNotifier(ExpiryNotifier):
+    """寫入日誌，供開發環境使用"""
+    name = 'console'
+
+    def send(self, user, entries: list[dict]) -> bool:
+        logger.info(f"到期提醒 → {user.username} ({len(entries)} 項):\n{digest_text(entries)}")
+        return True
+
+
+class EmailNotifier(ExpiryNotifier):
+    """以 Django 郵件寄出，開發環境預設使用 console 郵件後端"""
+    name = 'email'
+
+    def send(self, user, entries: list[dict]) -> bool:
+        if not user.email:
+            return False
+        send_mail(
+            subject=f"冰箱中有 {len(entries)} 項物品即將到期",
+            message=f"{user.username} 您好，以下物品即將到期或已過期：\n\n{digest_text(entries)}\n",
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[user.email],
+        )
+        return True
+
+
+class WebhookNotifier(ExpiryNotifier):
+    """以 JSON POST 到 settings.EXPIRY_WEBHOOK_URL (例如聊天機器人或家庭自動化服務)"""
+    name = 'webhook'
+
+    def __init__(self):
+        if not settings.EXPIRY_WEBHOOK_URL:
+            raise ValueError("使用 webhook 到期提醒需設定 EXPIRY_WEBHOOK_URL")
+        self.client = httpx.Client(timeout=settings.EXPIRY_WEBHOOK_TIMEOUT)
+
+    def send(self, user, entries: list[dict]) -> bool:
+        response = self.client.post(settings.EXPIRY_WEBHOOK_URL, json={
+            'user': {'id': user.id, 'username': user.username, 'email': user.email},
+            'items': entries,
+        })
+        response.raise_for_status()
+        return True
+
+
+NOTIFIERS = {notifier.name: notifier for notifier in (ConsoleNotifier, EmailNotifier, WebhookNotifier)}
+
+
+def get_notifiers(names: list[str] | None = None) -> list[ExpiryNotifier]:
+    """
+    依名稱建立發送方式
+
+    Args:
+        names: 發送方式名稱，預設為 settings.EXPIRY_NOTIFIERS
+
+    Returns:
+        List[ExpiryNotifier]: 發送方式實例
+
+    Raises:
+        ValueError: 未知的發送方式，或使用 webhook 但未設定 EXPIRY_WEBHOOK_URL
+    """
+    names = names or settings.EXPIRY_NOTIFIERS
+    unknown = [name for name in names if name not in NOTIFIERS]
+    if unknown:
+        raise ValueError(f"未知的到期提醒方式: {', '.join(unknown)} (可用: {', '.join(NOTIFIERS)})")
+    return [NOTIFIERS[name]() for name in names]
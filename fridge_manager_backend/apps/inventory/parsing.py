@@ -0,0 +1,256 @@
+import json
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+ITEMS_KEY = 'recognized_items'
+REQUIRED_FIELDS = ('name', 'quantity', 'estimated_expiry_info')
+
+# 支援結構化輸出的後端 (response_format=json_schema) 會依此 schema 限制模型輸出
+RECOGNITION_SCHEMA = {
+    'type': 'object',
+    'properties': {
+        ITEMS_KEY: {
+            'type': 'array',
+            'items': {
+                'type': 'object',
+                'properties': {field: {'type': 'string'} for field in REQUIRED_FIELDS},
+                'required': list(REQUIRED_FIELDS),
+                'additionalProperties': False,
+            },
+        },
+    },
+    'required': [ITEMS_KEY],
+    'additionalProperties': False,
+}
+
+_WHITESPACE = ' \t\r\n'
+# 提示詞要求模型以 ```json 代碼塊輸出，包住整段回覆的代碼塊不算格式錯誤
+_CODE_FENCE = re.compile(r'\s*```[\w-]*[ \t]*\r?\n(?P<body>.*?)\s*```\s*', re.DOTALL)
+
+
+def normalize_item(item) -> dict | None:
+    """
+    檢查並整理單一辨識物品
+
+    Args:
+        item: JSON 解析出的物品
+
+    Returns:
+        Dict | None: 只包含必要欄位且值為字串的物品；缺少欄位時返回 None
+    """
+    if not isinstance(item, dict) or any(item.get(field) in (None, '') for field in REQUIRED_FIELDS):
+        logger.warning(f"忽略格式不正確的辨識物品: {item!r}")
+        return None
+    return {field: str(item[field]).strip() for field in REQUIRED_FIELDS}
+
+
+def strip_trailing_commas(text: str) -> str:
+    """
+    移除 '}' 或 ']' 之前多餘的逗號 (略過字串內容)
+
+    Args:
+        text: JSON 文字
+
+    Returns:
+        str: 移除多餘逗號後的文字
+    """
+    result = []
+    pending_comma = None
+    in_string = False
+    escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == ',':
+            pending_comma = len(result)
+        elif char in '}]' and pending_comma is not None:
+            # 逗號與結束符號之間只有空白，丟棄該逗號
+            del result[pending_comma]
+            pending_comma = None
+        elif char == '"':
+            in_string = True
+            pending_comma = None
+        elif char not in _WHITESPACE:
+            pending_comma = None
+        result.append(char)
+    return ''.join(result)
+
+
+def strip_code_fence(text: str) -> str:
+    """
+    去除包住整段文字的單一 markdown 代碼塊標記
+
+    Args:
+        text: 模型返回的文字內容
+
+    Returns:
+        str: 代碼塊內的文字；沒有代碼塊時返回原文字
+    """
+    match = _CODE_FENCE.fullmatch(text)
+    return match['body'] if match else text
+
+
+def extract_items(content: str) -> tuple[list[dict], bool]:
+    """
+    從模型返回的完整文字中取出物品列表
+
+    內容 (去除包住整段回覆的代碼塊後) 是合法 JSON 時直接解析；否則以
+    RecognizedItemStreamParser 單次掃描，容忍前置說明文字、多餘的逗號與被截斷的陣列。
+    只有移除多餘逗號、陣列被截斷或丟棄格式不正確的物品時才算經過容錯修復。
+
+    Args:
+        content: 模型返回的文字內容
+
+    Returns:
+        Tuple[List[Dict], bool]: (物品列表, 是否經過容錯修復)
+
+    Raises:
+        ValueError: 當內容中找不到 recognized_items 陣列時拋出 (包含缺少該鍵的合法 JSON 物件)
+    """
+    try:
+        parsed = json.loads(strip_code_fence(content))
+    except json.JSONDecodeError:
+        parsed = None
+    # 缺少 recognized_items 的物件不是有效的辨識結果，交由下方掃描 (找不到陣列即拋出 ValueError)
+    if isinstance(parsed, dict) and isinstance(parsed.get(ITEMS_KEY), list):
+        items = [item for item in map(normalize_item, parsed[ITEMS_KEY]) if item is not None]
+        return items, len(items) < len(parsed[ITEMS_KEY])
+
+    parser = RecognizedItemStreamParser()
+    parser.feed(content)
+    if not parser.array_found:
+        raise ValueError(f"內容中找不到 '{ITEMS_KEY}' 陣列")
+    return parser.items, parser.recovered
+
+
+class RecognizedItemStreamParser:
+    """
+    在 LLM 串流輸出的同時增量解析 `recognized_items` 陣列
+
+    每當陣列中的一個物品物件完整出現，feed() 就會返回該物品，不需等待整個
+    回覆結束。會略過陣列之前的任何文字 (說明文字、markdown 代碼塊標記)，
+    物品內多餘的逗號會被移除；移除逗號、丟棄無法解析的物品或陣列未結束時
+    recovered 為 True。
+
+    用法：
+        parser = RecognizedItemStreamParser()
+        for delta in stream:
+            for item in parser.feed(delta):
+                ...  # 立即建立 RecognizedItem
+        parser.items  # 所有已解析的物品
+    """
+    def __init__(self):
+        self.items: list[dict] = []
+        self.array_found = False
+        self.array_closed = False
+        self.repaired = False
+
+        self._text = ''
+        self._pos = 0
+        self._object_start = None
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+
+    def feed(self, delta: str) -> list[dict]:
+        """
+        餵入一段模型輸出
+
+        Args:
+            delta: 串流中新增的文字
+
+        Returns:
+            List[Dict]: 這段文字中新完成的物品
+        """
+        if self.array_closed or not delta:
+            return []
+        self._text += delta
+        completed = []
+
+        if not self.array_found and not self._find_array():
+            return completed
+
+        text = self._text
+        pos = self._pos
+        while pos < len(text):
+            char = text[pos]
+            if self._object_start is None:
+                if char == '{':
+                    self._object_start = pos
+                    self._depth = 1
+                elif char == ']':
+                    self.array_closed = True
+                    pos += 1
+                    break
+            elif self._advance_object(char):
+                item = self._decode_object(text[self._object_start:pos + 1])
+                self._object_start = None
+                if item is not None:
+                    self.items.append(item)
+                    completed.append(item)
+            pos += 1
+        self._pos = pos
+        return completed
+
+    @property
+    def recovered(self) -> bool:
+        """物品經過修復、被丟棄或陣列被截斷 (陣列前後的文字不算)"""
+        return self.repaired or (self.array_found and not self.array_closed)
+
+    def _advance_object(self, char: str) -> bool:
+        # 追蹤物品物件內的字串與巢狀層級，物件結束時返回 True
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif char == '\\':
+                self._escaped = True
+            elif char == '"':
+                self._in_string = False
+        elif char == '"':
+            self._in_string = True
+        elif char == '{':
+            self._depth += 1
+        elif char == '}':
+            self._depth -= 1
+            return self._depth == 0
+        return False
+
+    def _find_array(self) -> bool:
+        key_index = self._text.find(f'"{ITEMS_KEY}"')
+        if key_index == -1:
+            return False
+        pos = key_index + len(ITEMS_KEY) + 2
+        # 跳過 ':' 與空白，直到陣列開頭
+        while pos < len(self._text) and (self._text[pos] in _WHITESPACE or self._text[pos] == ':'):
+            pos += 1
+        if pos >= len(self._text):
+            return False
+        if self._text[pos] != '[':
+            # 鍵值不是陣列，交由完整解析處理
+            self.array_closed = True
+            return False
+        self.array_found = True
+        self._pos = pos + 1
+        return True
+
+    def _decode_object(self, text: str) -> dict | None:
+        try:
+            item = normalize_item(json.loads(text))
+        except json.JSONDecodeError:
+            self.repaired = True
+            try:
+                item = normalize_item(json.loads(strip_trailing_commas(text)))
+            except json.JSONDecodeError as e:
+                logger.warning(f"無法解析辨識物品 JSON: {str(e)}: {text[:200]}")
+                return None
+        if item is None:
+            # 丟棄缺少欄位的物品同樣表示輸出不完整
+            self.repaired = True
+        return item
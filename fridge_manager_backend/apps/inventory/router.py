@@ -0,0 +1,314 @@
+import asyncio
+import logging
+import math
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+import httpx
+from django.conf import settings
+from openai import APIConnectionError, APITimeoutError, InternalServerError
+
+from .stats import RecognitionStats
+
+logger = logging.getLogger(__name__)
+
+LATENCY_WINDOW = 200  # 每個後端保留最近幾次請求的耗時，用於計算百分位數
+PERCENTILES = 100
+# 共用進行中計數器的過期時間為請求逾時的倍數，每次加減都會重設；被強制結束的工作行程
+# 未歸還的計數在這段時間內沒有任何請求進出時隨計數器過期而清除
+OUTSTANDING_TTL_FACTOR = 2
+# 這些錯誤代表後端本身有問題 (無法連線、逾時、5xx)，累計後會被暫時移出
+BACKEND_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError)
+
+# 行程內共用的路由器，由 get_router 延遲建立
+_router = None
+_router_lock = threading.Lock()
+
+
+class LLMBackend:
+    """
+    一個 LM Studio 後端與其路由狀態
+
+    Args:
+        url: API 地址，例如 "http://192.168.1.10:1234/v1"
+        model: 該後端載入的模型名稱
+        weight: 權重，權重越高分到的請求越多
+    """
+    def __init__(self, url: str, model: str, weight: float = 1):
+        self.url = url.rstrip('/')
+        self.model = model
+        self.weight = max(float(weight), 0.1)
+        self.outstanding = 0
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+        self.latencies_ms: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def outstanding_counter(self) -> str:
+        """跨行程共用的進行中請求計數器名稱 (RecognitionStats)"""
+        return f"backend:{self.url}:outstanding"
+
+    def load(self, shared_outstanding: int = 0) -> float:
+        """
+        加上本次請求後，每單位權重的進行中請求數
+
+        Args:
+            shared_outstanding: 所有行程合計的進行中請求數；讀取失敗時為 0，此時改用本行程的計數
+        """
+        return (max(shared_outstanding, self.outstanding) + 1) / self.weight
+
+    def snapshot(self) -> dict:
+        """
+        獲取後端狀態與最近請求的耗時
+
+        Returns:
+            Dict: url、model、weight、healthy、outstanding、requests、failures 以及
+            最近 LATENCY_WINDOW 次請求的 avg_ms / p50_ms / p95_ms
+        """
+        latencies = list(self.latencies_ms)
+        snapshot = {
+            'url': self.url,
+            'model': self.model,
+            'weight': self.weight,
+            'healthy': self.healthy,
+            'outstanding': self.outstanding,
+            'requests': self.requests,
+            'failures': self.failures,
+            'avg_ms': round(statistics.fmean(latencies), 1) if latencies else None,
+            'p50_ms': None,
+            'p95_ms': None,
+        }
+        if len(latencies) >= 2:  # noqa: PLR2004 - quantiles 至少需要兩個樣本
+            cuts = statistics.quantiles(latencies, n=PERCENTILES)
+            snapshot['p50_ms'] = round(cuts[49], 1)
+            snapshot['p95_ms'] = round(cuts[94], 1)
+        return snapshot
+
+
+class LLMRouter:
+    """
+    在多個 LM Studio 後端之間分配辨識請求
+
+    每個請求送往「進行中請求數 / 權重」最小的健康後端，負載相同時依權重隨機選擇。
+    路由器與健康狀態是每個行程各自一份；進行中請求數另外記在 'recognition' 快取
+    (Redis) 中讓 Celery prefork 的各子行程共用，Redis 無法連線時退回只計算本行程的
+    請求，此時各行程的分配僅靠隨機選擇分散。連續失敗 LMSTUDIO_EJECT_FAILURES 次的
+    後端會被移出，背景執行緒每 LMSTUDIO_HEALTH_INTERVAL 秒探測各後端的 /models，
+    探測成功即重新加入、失敗即移出。所有後端都不健康時仍會送出請求 (選負載最小者)，
+    不讓辨識完全停擺。
+
+    用法：
+        with get_router().route() as backend:
+            client = ImageRecognitionService.get_client(backend.url)
+            ...
+    """
+    def __init__(self, backends: list[dict] | None = None):
+        configs = backends or settings.LMSTUDIO_BACKENDS or [
+            {'url': settings.LMSTUDIO_API_URL, 'model': settings.LMSTUDIO_MODEL_NAME}
+        ]
+        self.backends = [
+            LLMBackend(config['url'], config.get('model') or settings.LMSTUDIO_MODEL_NAME, config.get('weight', 1))
+            for config in configs
+        ]
+        self._lock = threading.Lock()
+        self._health_thread = None
+
+    @property
+    def model_signature(self) -> str:
+        """所有後端模型名稱的組合，作為辨識快取鍵的一部分"""
+        return ','.join(sorted({backend.model for backend in self.backends}))
+
+    @property
+    def outstanding_ttl(self) -> float:
+        """共用進行中計數器的過期秒數"""
+        return settings.LMSTUDIO_TIMEOUT * OUTSTANDING_TTL_FACTOR
+
+    def acquire(self) -> LLMBackend:
+        """
+        選出負載最小的健康後端並將其進行中請求數 (本行程與共用計數器) 加一
+
+        Returns:
+            LLMBackend: 選中的後端，使用完畢後須呼叫 release
+        """
+        shared = RecognitionStats.get_many([backend.outstanding_counter for backend in self.backends])
+        with self._lock:
+            candidates = [backend for backend in self.backends if backend.healthy]
+            if not candidates:
+                logger.warning("所有 LLM 後端都被標記為不健康，仍選擇負載最小的後端送出請求")
+                candidates = self.backends
+            loads = [backend.load(shared[backend.outstanding_counter]) for backend in candidates]
+            lowest = min(loads)
+            # 負載相同時依權重隨機選擇，避免各行程在計數相同時都選中同一個後端
+            tied = [backend for backend, load in zip(candidates, loads, strict=True) if math.isclose(load, lowest)]
+            backend = random.choices(tied, weights=[b.weight for b in tied])[0]  # noqa: S311 - 非加密用途
+            backend.outstanding += 1
+
+        RecognitionStats.incr(backend.outstanding_counter, timeout=self.outstanding_ttl)
+        return backend
+
+    def release(self, backend: LLMBackend, elapsed_ms: float, error: Exception | None = None) -> None:
+        """
+        請求結束後更新後端狀態與耗時統計
+
+        Args:
+            backend: acquire 返回的後端
+            elapsed_ms: 請求耗時 (毫秒)
+            error: 請求失敗時的例外
+        """
+        with self._lock:
+            backend.outstanding -= 1
+            backend.requests += 1
+            if isinstance(error, BACKEND_ERRORS):
+                backend.failures += 1
+                backend.consecutive_failures += 1
+                if backend.healthy and backend.consecutive_failures >= settings.LMSTUDIO_EJECT_FAILURES:
+                    backend.healthy = False
+                    logger.warning(f"LLM 後端連續失敗 {backend.consecutive_failures} 次，暫時移出: {backend.url}")
+            else:
+                backend.consecutive_failures = 0
+                backend.latencies_ms.append(elapsed_ms)
+
+        RecognitionStats.decr(backend.outstanding_counter, timeout=self.outstanding_ttl)
+        RecognitionStats.incr(f"backend:{backend.url}:requests")
+        if isinstance(error, BACKEND_ERRORS):
+            RecognitionStats.incr(f"backend:{backend.url}:failures")
+        else:
+            RecognitionStats.incr(f"backend:{backend.url}:latency_ms", int(elapsed_ms))
+
+    @contextmanager
+    def route(self):
+        """
+        選出後端並在區塊結束時記錄耗時與成功/失敗
+
+        Yields:
+            LLMBackend: 選中的後端
+        """
+        backend = self.acquire()
+        started = time.perf_counter()
+        error = None
+        try:
+            yield backend
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self.release(backend, (time.perf_counter() - started) * 1000, error)
+
+    @asynccontextmanager
+    async def route_async(self):
+        """
+        route 的非同步版本 (AsyncRecognitionExecutor 使用)
+
+        acquire / release 會讀寫 Redis 上的共用計數器，放到執行緒中執行，不阻塞事件迴圈。
+
+        Yields:
+            LLMBackend: 選中的後端
+        """
+        backend = await asyncio.to_thread(self.acquire)
+        started = time.perf_counter()
+        error = None
+        try:
+            yield backend
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            await asyncio.to_thread(self.release, backend, (time.perf_counter() - started) * 1000, error)
+
+    def probe(self, backend: LLMBackend) -> bool:
+        """
+        探測後端的 /models 並依結果移出或重新加入
+
+        Args:
+            backend: 要探測的後端
+
+        Returns:
+            bool: 後端是否健康
+        """
+        try:
+            response = httpx.get(f"{backend.url}/models", timeout=settings.LMSTUDIO_HEALTH_TIMEOUT)
+            healthy = response.status_code < httpx.codes.INTERNAL_SERVER_ERROR
+        except httpx.HTTPError as e:
+            logger.debug(f"LLM 後端健康檢查失敗: {backend.url}: {str(e)}")
+            healthy = False
+
+        with self._lock:
+            if healthy and not backend.healthy:
+                logger.info(f"LLM 後端恢復健康，重新加入: {backend.url}")
+            elif not healthy and backend.healthy:
+                logger.warning(f"LLM 後端健康檢查失敗，暫時移出: {backend.url}")
+            backend.healthy = healthy
+            if healthy:
+                backend.consecutive_failures = 0
+        return healthy
+
+    def probe_all(self) -> None:
+        """探測所有後端"""
+        for backend in self.backends:
+            self.probe(backend)
+
+    def start_health_checks(self) -> None:
+        """在背景執行緒中定期探測所有後端 (每個行程只啟動一次)"""
+        if self._health_thread is not None or settings.LMSTUDIO_HEALTH_INTERVAL <= 0:
+            return
+
+        def loop():
+            while True:
+                time.sleep(settings.LMSTUDIO_HEALTH_INTERVAL)
+                self.probe_all()
+
+        self._health_thread = threading.Thread(target=loop, name='llm-health-check', daemon=True)
+        self._health_thread.start()
+
+    def snapshot(self) -> list[dict]:
+        """
+        獲取本行程中各後端的狀態
+
+        Returns:
+            List[Dict]: 每個後端的 LLMBackend.snapshot()
+        """
+        with self._lock:
+            return [backend.snapshot() for backend in self.backends]
+
+    def totals(self) -> list[dict]:
+        """
+        獲取各後端跨行程累計的請求數、失敗數與平均耗時
+
+        Returns:
+            List[Dict]: 每個後端的 url、requests、failures、avg_ms
+        """
+        totals = []
+        for backend in self.backends:
+            prefix = f"backend:{backend.url}:"
+            counters = RecognitionStats.get_many([f"{prefix}requests", f"{prefix}failures", f"{prefix}latency_ms"])
+            succeeded = counters[f"{prefix}requests"] - counters[f"{prefix}failures"]
+            totals.append({
+                'url': backend.url,
+                'requests': counters[f"{prefix}requests"],
+                'failures': counters[f"{prefix}failures"],
+                'avg_ms': round(counters[f"{prefix}latency_ms"] / succeeded, 1) if succeeded > 0 else None,
+            })
+        return totals
+
+
+def get_router() -> LLMRouter:
+    """
+    獲取行程內共用的路由器，第一次呼叫時啟動健康檢查執行緒
+
+    Returns:
+        LLMRouter: 共用的路由器
+    """
+    global _router  # noqa: PLW0603 - 每個行程共用一個路由器
+    if _router is None:
+        with _router_lock:
+            if _router is None:
+                _router = LLMRouter()
+                _router.start_health_checks()
+                logger.info(f"LLM 路由器已建立: {[backend.url for backend in _router.backends]}")
+    return _router
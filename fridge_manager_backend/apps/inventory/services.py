@@ -1,52 +1,52 @@
 import base64
-import json
+import difflib
+import hashlib
 import logging
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import groupby
+from operator import attrgetter
 
+import httpx
 from django.conf import settings
-from openai import OpenAI
+from django.db import transaction
+from django.utils import timezone
+from openai import BadRequestError, OpenAI
 
+from apps.core.services import SummaryService
+from apps.fridges.models import FridgeDevice
+from apps.photos.hashing import hamming_distance
 from apps.photos.models import Photo
+from apps.photos.services import PhotoStatusService
+from apps.photos.timing import elapsed_ms, record_stage, stage_timer
+
+from .cache import RecognitionCache
+from .diffing import FrameDiffService
+from .expiry import expiry_range
+from .models import FridgeInventoryItem, RecognizedItem
+from .notifiers import ExpiryNotifier, digest_items, get_notifiers
+from .parsing import RECOGNITION_SCHEMA, RecognizedItemStreamParser, extract_items
+from .preprocessing import ImagePreprocessingService
+from .router import LLMBackend, get_router
+from .stats import RecognitionStats
 
 logger = logging.getLogger(__name__)
 
 # Constants
 CONTENT_PREVIEW_LENGTH = 500
+PARSE_OUTCOMES = ('strict', 'recovered', 'failed')
+# 結構化輸出與串流用量回報並非所有後端都支援，被拒絕時移除後重試
+OPTIONAL_PARAMS = ('response_format', 'stream_options')
+# 串流請求在最後一個 chunk 回報 token 用量
+STREAM_PARAMS = {'stream': True, 'stream_options': {'include_usage': True}}
+# 名稱相似度達此值的未配對物品視為同一物品 (LLM 每次命名略有不同)
+RENAME_SIMILARITY = 0.6
 
-class ImageRecognitionService:
-    @staticmethod
-    def analyze_image_with_llm(image_file_path: str, photo_instance: Photo) -> list[dict]:
-        """
-        使用 LM Studio API 分析圖片
-
-        Args:
-            image_file_path: 圖片文件路徑
-            photo_instance: Photo 實例
-
-        Returns:
-            List[Dict]: 識別出的物品列表，每個物品包含：
-            {
-                'name': str,  # 物品名稱
-                'quantity': str,  # 數量描述
-                'estimated_expiry_info': str  # 預估保質期信息
-            }
-        """
-        try:
-            logger.info(f"開始分析圖片: {image_file_path}")
-
-            # 讀取圖片文件並進行 Base64 編碼
-            with open(image_file_path, 'rb') as f:
-                image_data = f.read()
-                base64_image = base64.b64encode(image_data).decode('utf-8')
-                # 假設圖片格式為 JPEG，如果可能有多種格式，需要更複雜的處理
-                base64_image_url = f"data:image/jpeg;base64,{base64_image}"
-
-            # 初始化 OpenAI 客戶端，指向本地 LM Studio API
-            client = OpenAI(
-                base_url=settings.LMSTUDIO_API_URL,  # 例如: "http://localhost:1234/v1"
-                api_key="lm-studio"  # LM Studio 不需要真正的 API Key
-            )
-
-            prompt = """
+RECOGNITION_PROMPT = """
 你是一個專門食品圖片並推估保存期限的AI助手。
 
 當接收到一張圖片時，請執行以下分析並生成 JSON 輸出：
@@ -81,87 +81,1203 @@ class ImageRecognitionService:
 *   如果無法識別任何物品，請返回一個空的 `recognized_items` 數組：`{ "recognized_items": [] }`。
 
 請嚴格遵守上述所有要求和 JSON 格式進行分析和返回。
-            """
-
-            # 發送請求到 LM Studio API
-            logger.info(f"正在向 LLM API 發送請求: {settings.LMSTUDIO_API_URL}/chat/completions")
-            response = client.chat.completions.create(
-                model=settings.LMSTUDIO_MODEL_NAME,  # 在 settings.py 中配置的模型名稱
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": prompt},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": base64_image_url,
-                                    "detail": "auto"
-                                }
+"""
+# 提示詞內容的雜湊，修改提示詞後舊的辨識快取自然失效
+RECOGNITION_PROMPT_VERSION = hashlib.sha256(RECOGNITION_PROMPT.encode()).hexdigest()[:12]
+
+# 行程內共用的 LM Studio 客戶端 (每個後端一個)，由 ImageRecognitionService.get_client 延遲建立
+_llm_clients: dict[str, OpenAI] = {}
+_llm_client_lock = threading.Lock()
+# 拒絕選用參數的後端 (API 地址)，之後的請求不再附上 OPTIONAL_PARAMS
+_optional_params_unsupported: set[str] = set()
+
+class ImageRecognitionService:
+    @staticmethod
+    def get_client(base_url: str) -> OpenAI:
+        """
+        獲取行程內共用的 OpenAI 客戶端 (指向本地 LM Studio API)
+
+        客戶端在第一次使用時才建立，因此 Celery prefork 的每個子行程各自擁有
+        連線池，並在多個任務之間保持與各後端的 keep-alive 連線。
+
+        Args:
+            base_url: LM Studio API 地址，例如: "http://localhost:1234/v1"
+
+        Returns:
+            OpenAI: 該後端共用的客戶端實例
+        """
+        if base_url not in _llm_clients:
+            with _llm_client_lock:
+                if base_url not in _llm_clients:
+                    _llm_clients[base_url] = OpenAI(
+                        base_url=base_url,
+                        api_key="lm-studio",  # LM Studio 不需要真正的 API Key
+                        timeout=settings.LMSTUDIO_TIMEOUT,
+                        http_client=httpx.Client(
+                            limits=httpx.Limits(
+                                max_connections=settings.LMSTUDIO_MAX_CONNECTIONS,
+                                max_keepalive_connections=settings.LMSTUDIO_MAX_CONNECTIONS,
+                                keepalive_expiry=settings.LMSTUDIO_KEEPALIVE_EXPIRY,
+                            ),
+                        ),
+                    )
+                    logger.info(f"已建立 LM Studio 客戶端: {base_url}")
+        return _llm_clients[base_url]
+
+    @staticmethod
+    def prepare_request(image, photo_instance: Photo) -> tuple[str, list[dict] | None, dict]:
+        """
+        前處理圖片、查詢辨識快取並組出 chat.completions 的請求參數
+
+        同步 (analyze_image_with_llm) 與非同步 (AsyncRecognitionExecutor) 辨識共用此步驟。
+
+        Args:
+            image: 圖片數據，可為 bytes 或可讀取的檔案物件 (例如 photo.image.open('rb'))
+            photo_instance: Photo 實例，前處理指標會寫入其 processing_metrics
+
+        Returns:
+            Tuple[str, List[Dict] | None, Dict]: (快取鍵, 快取命中的物品列表或 None, 請求參數)
+        """
+        # 直接在記憶體中前處理後進行 Base64 編碼，不經過暫存檔
+        image_data = image if isinstance(image, bytes | bytearray) else image.read()
+        image_data, preprocessing_metrics = ImagePreprocessingService.preprocess(
+            image_data, photo_instance.fridge_device
+        )
+        photo_instance.processing_metrics['preprocessing'] = preprocessing_metrics
+        record_stage(photo_instance.processing_metrics, 'preprocess', preprocessing_metrics.get('preprocess_ms', 0))
+        with stage_timer(photo_instance.processing_metrics, 'diff'):
+            image_data = ImageRecognitionService.crop_to_changes(image_data, photo_instance)
+        photo_instance.processing_metrics['sent_bytes'] = len(image_data)
+
+        # 相同的圖片、模型與提示詞直接返回快取結果，不呼叫 LM Studio
+        with stage_timer(photo_instance.processing_metrics, 'cache_lookup'):
+            cache_key = RecognitionCache.build_key(
+                image_data, get_router().model_signature, RECOGNITION_PROMPT_VERSION
+            )
+            cached_items = RecognitionCache.get(cache_key)
+        photo_instance.processing_metrics['cache'] = 'hit' if cached_items is not None else 'miss'
+        if cached_items is not None:
+            return cache_key, cached_items, {}
+
+        with stage_timer(photo_instance.processing_metrics, 'encode'):
+            base64_image = base64.b64encode(image_data).decode('utf-8')
+            # 前處理一律輸出 JPEG
+            base64_image_url = f"data:image/jpeg;base64,{base64_image}"
+
+        request = {
+            'model': settings.LMSTUDIO_MODEL_NAME,  # 送出時會換成所選後端的模型名稱
+            'messages': [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "text", "text": RECOGNITION_PROMPT},
+                        {
+                            "type": "image_url",
+                            "image_url": {
+                                "url": base64_image_url,
+                                "detail": "auto"
                             }
-                        ]
-                    }
-                ],
-                max_tokens=1024 # 保持 max_tokens 不變或適當調整
+                        }
+                    ]
+                }
+            ],
+            'max_tokens': 1024,
+        }
+        if settings.LLM_STRUCTURED_OUTPUT:
+            # 支援的後端會依 schema 限制輸出，返回可直接解析的 JSON
+            request['response_format'] = {
+                'type': 'json_schema',
+                'json_schema': {'name': 'fridge_recognition', 'strict': True, 'schema': RECOGNITION_SCHEMA},
+            }
+        return cache_key, None, request
+
+    @staticmethod
+    def crop_to_changes(image_data: bytes, photo_instance: Photo) -> bytes:
+        """
+        放入物品時只送出與上一張已辨識照片不同的區域
+
+        取出物品時變化區域只剩空位，無法從中辨識被取走的物品，因此仍送出整張照片。
+        辨識結果只包含變化區域內的物品，不複製上一張照片的物品：庫存更新以放入操作的
+        提示進行，不會移除這次沒有出現的物品。成功裁切時 processing_metrics['diff_crop']
+        記錄來源照片，這張照片之後也不會被當作沿用辨識結果的來源。
+
+        Args:
+            image_data: 前處理後的圖片數據
+            photo_instance: Photo 實例
+
+        Returns:
+            bytes: 變化區域的拼接圖；不適用或變化過多時返回原圖片數據
+        """
+        if not settings.FRAME_DIFF_ENABLED:
+            return image_data
+        operation_log = getattr(photo_instance, 'operation_log', None)
+        if operation_log is None or operation_log.operation_type != 'put_in':
+            return image_data
+        source = PhotoDedupeService.previous_completed(photo_instance)
+        if source is None:
+            return image_data
+
+        with source.image.open('rb') as source_file:
+            before_data, _ = ImagePreprocessingService.preprocess(source_file.read(), photo_instance.fridge_device)
+        cropped_data, metrics = FrameDiffService.crop_changes(before_data, image_data)
+        metrics['source_photo_id'] = source.id
+        photo_instance.processing_metrics['diff_crop'] = metrics
+        if cropped_data is None:
+            logger.info(f"照片 {photo_instance.id} 改送整張照片: {metrics['fallback']}")
+            return image_data
+        logger.info(
+            f"照片 {photo_instance.id} 只送出 {metrics['regions']} 個變化區域: "
+            f"{len(image_data)} -> {len(cropped_data)} bytes"
+        )
+        return cropped_data
+
+    @staticmethod
+    def request_for_backend(request: dict, backend: LLMBackend) -> dict:
+        """
+        換上後端的模型名稱，並移除已知不被該後端接受的請求參數
+
+        Args:
+            request: prepare_request 返回的請求參數
+            backend: LLMRouter 選出的後端
+
+        Returns:
+            Dict: 可送往該後端的請求參數
+        """
+        request = {**request, 'model': backend.model}
+        if backend.url in _optional_params_unsupported:
+            for param in OPTIONAL_PARAMS:
+                request.pop(param, None)
+        return request
+
+    @staticmethod
+    def optional_params_fallback(request: dict, base_url: str, error: Exception) -> dict | None:
+        """
+        後端拒絕選用參數 (結構化輸出、串流用量回報) 時，記錄該後端並返回不含這些參數的請求
+
+        Args:
+            request: 送出的請求參數
+            base_url: LM Studio API 地址
+            error: 請求拋出的例外
+
+        Returns:
+            Dict | None: 重試用的請求參數；請求沒有選用參數或錯誤與其無關時返回 None
+        """
+        if not any(param in request for param in OPTIONAL_PARAMS) or not isinstance(error, BadRequestError):
+            return None
+        _optional_params_unsupported.add(base_url)
+        logger.warning(f"LLM 後端不支援 {'/'.join(OPTIONAL_PARAMS)}，改用一般輸出並容錯解析: {base_url}: {str(error)}")
+        return {key: value for key, value in request.items() if key not in OPTIONAL_PARAMS}
+
+    @staticmethod
+    def create_completion(backend: LLMBackend, request: dict):
+        """
+        以共用客戶端向指定後端送出 chat.completions 請求，後端不支援選用參數時自動重試
+
+        Args:
+            backend: LLMRouter 選出的後端
+            request: prepare_request 返回的請求參數 (串流時再加上 STREAM_PARAMS)
+
+        Returns:
+            ChatCompletion | Stream: LLM 響應
+        """
+        client = ImageRecognitionService.get_client(backend.url)
+        request = ImageRecognitionService.request_for_backend(request, backend)
+        try:
+            return client.chat.completions.create(**request)
+        except BadRequestError as e:
+            fallback = ImageRecognitionService.optional_params_fallback(request, backend.url, e)
+            if fallback is None:
+                raise
+            return client.chat.completions.create(**fallback)
+
+    @staticmethod
+    def record_usage(photo_instance: Photo, usage) -> None:
+        """
+        記錄 LLM 響應回報的 token 用量
+
+        Args:
+            photo_instance: Photo 實例
+            usage: response.usage (CompletionUsage)，後端未回報時為 None
+        """
+        if usage is None:
+            return
+        photo_instance.processing_metrics['usage'] = {
+            'prompt_tokens': usage.prompt_tokens,
+            'completion_tokens': usage.completion_tokens,
+            'total_tokens': usage.total_tokens,
+        }
+
+    @staticmethod
+    def record_parse_outcome(photo_instance: Photo, outcome: str) -> None:
+        """
+        記錄解析結果：'strict' (合法 JSON)、'recovered' (經容錯修復) 或 'failed'
+
+        Args:
+            photo_instance: Photo 實例
+            outcome: 解析結果
+        """
+        photo_instance.processing_metrics['parse'] = outcome
+        RecognitionStats.incr(f"parse_{outcome}")
+
+    @staticmethod
+    def parse_stats() -> dict:
+        """
+        獲取解析結果的計數與失敗率、修復率
+
+        Returns:
+            Dict: 各結果的計數、failure_rate 與 recovery_rate
+        """
+        names = tuple(f"parse_{outcome}" for outcome in PARSE_OUTCOMES)
+        stats = RecognitionStats.get_many(names)
+        stats['failure_rate'] = RecognitionStats.rate(stats, ('parse_failed',), names)
+        stats['recovery_rate'] = RecognitionStats.rate(stats, ('parse_recovered',), names)
+        return stats
+
+    @staticmethod
+    def parse_content(content: str, photo_instance: Photo) -> list[dict]:
+        """
+        從模型返回的完整文字中解析物品列表
+
+        Args:
+            content: 模型返回的文字內容
+            photo_instance: Photo 實例，解析結果會寫入其 processing_metrics
+
+        Returns:
+            List[Dict]: 識別出的物品列表 (已略過缺少必要欄位的物品)
+
+        Raises:
+            ValueError: 當內容中找不到物品陣列時拋出
+        """
+        logger.debug(f"LLM 返回的原始 content:\n{content}") # 打印原始返回內容供除錯
+        try:
+            with stage_timer(photo_instance.processing_metrics, 'parse', accumulate=True):
+                recognized_items, recovered = extract_items(content or '')
+        except ValueError as e:
+            ImageRecognitionService.record_parse_outcome(photo_instance, 'failed')
+            error_message = f"解析 LLM 返回的數據失敗: {str(e)}"
+            # 在錯誤信息中包含部分原始 content 內容，以便除錯
+            content = content or ''
+            raw_content_preview = content[:CONTENT_PREVIEW_LENGTH] + ('...' if len(content) > CONTENT_PREVIEW_LENGTH else '')
+            logger.error(f"{error_message}. 原始LLM內容開頭: '{raw_content_preview}'")
+            raise ValueError(f"{error_message}. 請檢查 LLM 返回內容是否符合預期格式。") from e
+
+        if recovered:
+            logger.warning("LLM 返回內容被截斷或含格式不正確的物品，已以容錯解析取出物品")
+        ImageRecognitionService.record_parse_outcome(photo_instance, 'recovered' if recovered else 'strict')
+        logger.info(f"識別出的物品數量: {len(recognized_items)}")
+        return recognized_items
+
+    @staticmethod
+    def parse_response(response, cache_key: str, photo_instance: Photo) -> list[dict]:
+        """
+        解析 chat.completions 的響應，成功時寫入辨識快取
+
+        Args:
+            response: chat.completions.create 返回的響應
+            cache_key: prepare_request 返回的快取鍵
+            photo_instance: Photo 實例
+
+        Returns:
+            List[Dict]: 識別出的物品列表
+
+        Raises:
+            ValueError: 當響應結構或 JSON 內容不符合預期時拋出
+        """
+        try:
+            # 從響應中獲取模型的文字內容
+            content = response.choices[0].message.content
+            finish_reason = response.choices[0].finish_reason
+        except IndexError as e:
+            # 捕獲 choices[0] 或 message 為空的情況
+            logger.error(f"從 LLM 響應中提取 content 失敗，響應結構不符合預期: {str(e)}", exc_info=True)
+            raise ValueError(f"從 LLM 響應中提取 content 失敗，響應結構不符合預期: {str(e)}") from e
+
+        recognized_items = ImageRecognitionService.parse_content(content, photo_instance)
+        ImageRecognitionService.cache_result(cache_key, recognized_items, photo_instance, finish_reason)
+        return recognized_items
+
+    @staticmethod
+    def cache_result(cache_key: str, recognized_items: list[dict], photo_instance: Photo, finish_reason: str | None) -> bool:
+        """
+        只快取完整的辨識結果
+
+        輸出被截斷 (finish_reason 不是 'stop'，例如 'length') 或需要容錯修復才取得的物品
+        可能缺漏，不寫入快取，相同圖片下次會重新辨識。
+
+        Args:
+            cache_key: prepare_request 返回的快取鍵
+            recognized_items: 識別出的物品列表
+            photo_instance: Photo 實例 (processing_metrics 中已記錄解析結果)
+            finish_reason: LLM 回覆的結束原因
+
+        Returns:
+            bool: 是否已寫入快取
+        """
+        if finish_reason != 'stop' or photo_instance.processing_metrics.get('parse') != 'strict':
+            logger.warning(
+                f"辨識結果不完整 (finish_reason={finish_reason}，"
+                f"解析={photo_instance.processing_metrics.get('parse')})，不寫入快取"
             )
-            logger.info("成功接收到 LLM API 響應")
-
-
-            # 解析 LLM 返回的內容
-            try:
-                # 從響應中獲取模型的文字內容
-                content = response.choices[0].message.content
-                logger.debug(f"LLM 返回的原始 content:\n{content}") # 打印原始返回內容供除錯
-
-                # --- 新增邏輯：處理模型可能返回的 markdown 代碼塊包裹的 JSON ---
-                json_string_to_parse = content
-
-                # 尋找 markdown JSON 代碼塊的標記
-                json_start_marker = '```json\n'
-                json_end_marker = '\n```' # 根據之前的測試輸出調整結束標記，注意換行符
-
-                start_index = content.find(json_start_marker)
-                end_index = content.rfind(json_end_marker) # 使用 rfind 尋找最後一個結束標記
-
-                if start_index != -1 and end_index != -1 and end_index > start_index:
-                    # 如果找到了標記，提取中間的部分作為 JSON 字串
-                    # start_index + len(json_start_marker) 是 JSON 內容的實際開始位置
-                    json_string_to_parse = content[start_index + len(json_start_marker):end_index].strip()
-                    logger.debug("從 markdown 代碼塊中提取 JSON 成功")
-                else:
-                    # 如果沒有找到標記，假設整個 content 字串就是 JSON
-                    # 或者模型可能返回了非預期格式
-                    logger.warning("LLM 返回內容未包含預期的 '```json\\n' 和 '\\n```' 標記。嘗試直接解析原始內容。")
-                    json_string_to_parse = content.strip() # 移除首尾空白字元
-
-                logger.debug(f"準備解析的 JSON 字串:\n{json_string_to_parse}")
-
-                # 使用提取出的（或原始的）字串進行 JSON 解析
-                parsed_content = json.loads(json_string_to_parse)
-                logger.info("成功解析 LLM 返回的 JSON 內容")
-
-                # 獲取 'recognized_items' 列表，如果 key 不存在則返回空列表
-                recognized_items = parsed_content.get('recognized_items', [])
-                logger.info(f"識別出的物品數量: {len(recognized_items)}")
-
-                return recognized_items
-
-            except (KeyError, json.JSONDecodeError) as e:
-                # 捕獲解析 JSON 或提取 key 時的錯誤
-                error_message = f"解析 LLM 返回的數據失敗: {str(e)}"
-                # 在錯誤信息中包含部分原始 content 內容，以便除錯
-                raw_content_preview = content[:CONTENT_PREVIEW_LENGTH] + ('...' if len(content) > CONTENT_PREVIEW_LENGTH else '') if 'content' in locals() else 'N/A'
-                logger.error(f"{error_message}. 原始LLM內容開頭: '{raw_content_preview}'", exc_info=True)
-                raise ValueError(f"{error_message}. 請檢查 LLM 返回內容是否符合預期格式。") from e
-            except IndexError as e:
-                 # 捕獲 choices[0] 或 message 為空的情況
-                 logger.error(f"從 LLM 響應中提取 content 失敗，響應結構不符合預期: {str(e)}", exc_info=True)
-                 # 可以選擇打印或記錄完整的響應對象結構來除錯
-                 # logger.debug(f"完整 LLM 響應對象: {response.model_dump_json(indent=2)}")
-                 raise ValueError(f"從 LLM 響應中提取 content 失敗，響應結構不符合預期: {str(e)}") from e
+            return False
+        RecognitionCache.set(cache_key, recognized_items)
+        return True
+
+    @staticmethod
+    def finish_stream(
+        parser: RecognizedItemStreamParser,
+        content: str,
+        cache_key: str,
+        photo_instance: Photo,
+        finish_reason: str | None = None,
+    ) -> tuple[list[dict], list[dict]]:
+        """
+        串流結束後整理結果，完整的結果才寫入辨識快取 (見 cache_result)
+
+        Args:
+            parser: 串流過程中使用的解析器
+            content: 串流輸出的完整文字
+            cache_key: prepare_request 返回的快取鍵
+            photo_instance: Photo 實例
+            finish_reason: 串流最後一個 choice 的結束原因，串流中斷時為 None
+
+        Returns:
+            Tuple[List[Dict], List[Dict]]: (所有物品, 串流時尚未交付的物品)
+
+        Raises:
+            ValueError: 當串流中找不到物品陣列且完整解析也失敗時拋出
+        """
+        if parser.array_found:
+            if not parser.array_closed:
+                logger.warning(f"LLM 串流輸出在物品陣列結束前中斷，保留已解析的 {len(parser.items)} 個物品")
+            ImageRecognitionService.record_parse_outcome(photo_instance, 'recovered' if parser.recovered else 'strict')
+            recognized_items, undelivered = parser.items, []
+        else:
+            # 串流中沒有出現 recognized_items 陣列，改以完整文字解析
+            recognized_items = ImageRecognitionService.parse_content(content, photo_instance)
+            undelivered = recognized_items
+        ImageRecognitionService.cache_result(cache_key, recognized_items, photo_instance, finish_reason)
+        return recognized_items, undelivered
+
+    @staticmethod
+    def record_stream_metrics(
+        photo_instance: Photo, started: float, first_token_at: float | None, first_item_at: float | None, parse_ms: float
+    ) -> None:
+        """
+        記錄串流辨識的首個 token (llm_ttft)、首個物品 (llm_ttfi) 與總耗時 (llm_total)
+
+        串流時物品在 LLM 輸出期間逐一建立，llm_total 包含 save_items 的時間。
+
+        Args:
+            photo_instance: Photo 實例
+            started: 送出請求時的 time.perf_counter()
+            first_token_at: 收到第一段文字時的 time.perf_counter()，沒有輸出時為 None
+            first_item_at: 第一個物品完成時的 time.perf_counter()，沒有物品時為 None
+            parse_ms: 增量解析累計的耗時 (毫秒)
+        """
+        metrics = photo_instance.processing_metrics
+        metrics['streamed'] = True
+        record_stage(metrics, 'llm_total', elapsed_ms(started))
+        for stage, at in (('llm_ttft', first_token_at), ('llm_ttfi', first_item_at)):
+            if at is not None:
+                record_stage(metrics, stage, round((at - started) * 1000, 1))
+        record_stage(metrics, 'parse', round(parse_ms, 1), accumulate=True)
+        logger.info(
+            f"LLM 串流完成: 首個 token {metrics['stages'].get('llm_ttft')}ms，"
+            f"首個物品 {metrics['stages'].get('llm_ttfi')}ms，總耗時 {metrics['stages']['llm_total']}ms"
+        )
+
+    @staticmethod
+    def _stream_completion(request: dict, cache_key: str, photo_instance: Photo, on_item) -> list[dict]:
+        parser = RecognizedItemStreamParser()
+        chunks = []
+        first_token_at = first_item_at = None
+        parse_ms = 0.0
+        finish_reason = None
+        started = time.perf_counter()
+
+        with get_router().route() as backend:
+            photo_instance.processing_metrics['backend'] = backend.url
+            stream = ImageRecognitionService.create_completion(backend, {**request, **STREAM_PARAMS})
+            for chunk in stream:
+                # 最後一個 chunk 沒有 choices，只帶 token 用量
+                ImageRecognitionService.record_usage(photo_instance, getattr(chunk, 'usage', None))
+                if chunk.choices and chunk.choices[0].finish_reason:
+                    finish_reason = chunk.choices[0].finish_reason
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if first_token_at is None:
+                    first_token_at = time.perf_counter()
+                chunks.append(delta)
+                feed_started = time.perf_counter()
+                items = parser.feed(delta)
+                parse_ms += (time.perf_counter() - feed_started) * 1000
+                for item in items:
+                    if first_item_at is None:
+                        first_item_at = time.perf_counter()
+                    on_item(item)
+
+        ImageRecognitionService.record_stream_metrics(photo_instance, started, first_token_at, first_item_at, parse_ms)
+        recognized_items, undelivered = ImageRecognitionService.finish_stream(
+            parser, ''.join(chunks), cache_key, photo_instance, finish_reason
+        )
+        for item in undelivered:
+            on_item(item)
+        return recognized_items
+
+    @staticmethod
+    def analyze_image_with_llm(image, photo_instance: Photo, on_item=None) -> list[dict]:
+        """
+        使用 LM Studio API 分析圖片
+
+        Args:
+            image: 圖片數據，可為 bytes 或可讀取的檔案物件 (例如 photo.image.open('rb'))
+            photo_instance: Photo 實例
+            on_item: 可選，每辨識出一個物品就呼叫一次 (包含快取命中)。
+                LLM_STREAMING 開啟時以串流方式請求，物品在模型輸出的同時交付
+
+        Returns:
+            List[Dict]: 識別出的物品列表，每個物品包含：
+            {
+                'name': str,  # 物品名稱
+                'quantity': str,  # 數量描述
+                'estimated_expiry_info': str  # 預估保質期信息
+            }
+        """
+        try:
+            logger.info(f"開始分析圖片: photo_id={photo_instance.id}")
+            cache_key, recognized_items, request = ImageRecognitionService.prepare_request(image, photo_instance)
+
+            if recognized_items is None:
+                # 發送請求到 LM Studio API，由路由器選擇負載最小的後端
+                if settings.LLM_STREAMING and on_item is not None:
+                    return ImageRecognitionService._stream_completion(request, cache_key, photo_instance, on_item)
 
+                llm_started = time.perf_counter()
+                with get_router().route() as backend:
+                    logger.info(f"正在向 LLM API 發送請求: {backend.url}/chat/completions")
+                    photo_instance.processing_metrics['backend'] = backend.url
+                    response = ImageRecognitionService.create_completion(backend, request)
+                record_stage(photo_instance.processing_metrics, 'llm_total', elapsed_ms(llm_started))
+                ImageRecognitionService.record_usage(photo_instance, getattr(response, 'usage', None))
+                logger.info(f"成功接收到 LLM API 響應 ({photo_instance.processing_metrics['stages']['llm_total']}ms)")
+                recognized_items = ImageRecognitionService.parse_response(response, cache_key, photo_instance)
+
+            if on_item is not None:
+                for item in recognized_items:
+                    on_item(item)
+            return recognized_items
 
         except Exception as e:
             # 捕獲其他可能發生的錯誤 (例如網路錯誤)
             logger.error(f"圖像分析過程中發生錯誤: {str(e)}", exc_info=True)
             raise Exception(f"圖像分析過程中發生錯誤: {str(e)}") from e
+
+
+class PhotoDedupeService:
+    @staticmethod
+    def previous_completed(photo: Photo) -> Photo | None:
+        """
+        獲取同一冰箱在此照片之前最新一張已辨識完成的照片
+
+        Args:
+            photo: Photo 實例
+
+        Returns:
+            Photo | None: 上一張已辨識照片，沒有時返回 None
+        """
+        # 由 (fridge_device, recognition_status, -uploaded_at) 索引直接取得最新一筆
+        return (
+            Photo.objects
+            .filter(
+                fridge_device_id=photo.fridge_device_id,
+                recognition_status='completed',
+                uploaded_at__lt=photo.uploaded_at,
+            )
+            .order_by('-uploaded_at')
+            .only('id', 'image', 'perceptual_hash', 'duplicate_of_id', 'processing_metrics')
+            .first()
+        )
+
+    @staticmethod
+    def find_unchanged_source(photo: Photo) -> tuple[Photo, int] | None:
+        """
+        與同一冰箱最新的已辨識照片比較感知雜湊，判斷冰箱內容是否沒有改變
+
+        Args:
+            photo: 等待辨識的 Photo 實例
+
+        Returns:
+            Tuple[Photo, int] | None: 內容相同時返回 (上一張已辨識照片, 漢明距離)，否則返回 None
+        """
+        if not settings.PHOTO_DEDUPE_ENABLED or not photo.perceptual_hash:
+            return None
+
+        previous = PhotoDedupeService.previous_completed(photo)
+        if previous is None or not previous.perceptual_hash:
+            return None
+        diff_crop = previous.processing_metrics.get('diff_crop')
+        if diff_crop and 'fallback' not in diff_crop:
+            # 只辨識了變化區域的照片沒有整個冰箱的物品，不能沿用
+            logger.debug(f"照片 {previous.id} 只辨識了變化區域，照片 {photo.id} 需要重新辨識")
+            return None
+
+        distance = hamming_distance(photo.perceptual_hash, previous.perceptual_hash)
+        if distance > settings.PHOTO_DEDUPE_MAX_DISTANCE:
+            logger.debug(f"照片 {photo.id} 與上一張照片 {previous.id} 的雜湊距離為 {distance}，需要重新辨識")
+            return None
+        return previous, distance
+
+    @staticmethod
+    def copy_recognition(photo: Photo, source: Photo, distance: int) -> int:
+        """
+        沿用上一張照片的辨識結果，不呼叫 LLM
+
+        Args:
+            photo: 等待辨識的 Photo 實例
+            source: find_unchanged_source 返回的來源照片
+            distance: 兩張照片的漢明距離
+
+        Returns:
+            int: 複製的物品數量
+        """
+        items = [
+            RecognizedItem(
+                photo=photo,
+                name=item.name,
+                quantity=item.quantity,
+                estimated_expiry_info=item.estimated_expiry_info,
+                placement_date=item.placement_date,
+                expiry_min_date=item.expiry_min_date,
+                expiry_max_date=item.expiry_max_date,
+                owner_id=item.owner_id,
+                notes=item.notes,
+            )
+            for item in source.recognized_items.all()
+        ]
+        if items:
+            RecognizedItem.objects.bulk_create(items)
+
+        # 連結到最初實際辨識的照片，避免形成一長串的重複鏈
+        photo.duplicate_of_id = source.duplicate_of_id or source.id
+        photo.processing_metrics['dedupe'] = {'source_photo_id': source.id, 'distance': distance}
+        logger.info(f"照片 {photo.id} 與照片 {source.id} 內容相同 (距離 {distance})，沿用 {len(items)} 個辨識物品")
+        return len(items)
+
+
+class InventoryReconciliationService:
+    """
+    依每張照片的辨識結果增量更新冰箱目前的內容 (FridgeInventoryItem)
+
+    照片中的物品與目前庫存以正規化名稱配對，名稱略有不同的以相似度配對；
+    內容有變化的物品才會寫入。FridgeOperationLog.operation_type 作為提示：
+    放入物品時不移除未出現的物品 (多半是被新物品擋住)，取出物品時不新增物品
+    (多半是被擋住的物品重新露出)；沒有操作記錄的照片 (定時快照) 完整同步。
+    """
+    @staticmethod
+    def normalize_name(name: str) -> str:
+        """
+        產生比對用的物品名稱
+
+        Args:
+            name: 物品名稱
+
+        Returns:
+            str: 去除空白並轉為小寫的名稱
+        """
+        return ''.join(name.split()).casefold()
+
+    @staticmethod
+    def similarity(a: str, b: str) -> float:
+        """
+        兩個正規化名稱的相似度
+
+        LLM 常在名稱後加上狀態說明 (例如「牛奶」與「牛奶 (已開封)」)，
+        一方包含另一方時視為同一物品。
+
+        Args:
+            a: 正規化名稱
+            b: 正規化名稱
+
+        Returns:
+            float: 0~1 的相似度
+        """
+        if a and b and (a in b or b in a):
+            return 1.0
+        return difflib.SequenceMatcher(None, a, b).ratio()
+
+    @staticmethod
+    def _pair(current: list[FridgeInventoryItem], observed: list[RecognizedItem]) -> tuple[list, list, list, int]:
+        # 先以相同名稱配對，剩下的再以名稱相似度配對
+        by_name = defaultdict(list)
+        for item in current:
+            by_name[item.normalized_name].append(item)
+        pairs, unmatched_observed = [], []
+        for item in observed:
+            candidates = by_name[InventoryReconciliationService.normalize_name(item.name)]
+            if candidates:
+                pairs.append((candidates.pop(0), item))
+            else:
+                unmatched_observed.append(item)
+        unmatched_current = [item for items in by_name.values() for item in items]
+
+        renamed = 0
+        for item in list(unmatched_observed):
+            if not unmatched_current:
+                break
+            name = InventoryReconciliationService.normalize_name(item.name)
+            scores = [
+                (InventoryReconciliationService.similarity(existing.normalized_name, name), existing)
+                for existing in unmatched_current
+            ]
+            score, best = max(scores, key=lambda scored: scored[0])
+            if score >= RENAME_SIMILARITY:
+                pairs.append((best, item))
+                unmatched_current.remove(best)
+                unmatched_observed.remove(item)
+                renamed += 1
+        return pairs, unmatched_observed, unmatched_current, renamed
+
+    @staticmethod
+    def reconcile(photo: Photo, use_hint: bool = True) -> dict:
+        """
+        以照片的辨識結果更新該冰箱的目前庫存
+
+        Args:
+            photo: 已建立 RecognizedItem 的 Photo 實例
+            use_hint: 是否依操作類型限制新增或移除
+
+        Returns:
+            Dict: 配對、更新、新增、移除的物品數量，比庫存更舊的照片返回 {'skipped': 'stale'}
+        """
+        operation_log = getattr(photo, 'operation_log', None)
+        hint = operation_log.operation_type if use_hint and operation_log is not None else None
+
+        with transaction.atomic():
+            # 鎖住冰箱，同一台冰箱的照片依序更新庫存
+            device = FridgeDevice.objects.select_for_update().get(pk=photo.fridge_device_id)
+            if device.inventory_synced_at is not None and photo.uploaded_at < device.inventory_synced_at:
+                logger.info(f"照片 {photo.id} 比目前庫存依據的照片更舊，不更新庫存")
+                return {'skipped': 'stale'}
+
+            current = list(FridgeInventoryItem.objects.filter(fridge_device=device))
+            observed = list(photo.recognized_items.all())
+            pairs, added, removed, renamed = InventoryReconciliationService._pair(current, observed)
+
+            fields = ('name', 'normalized_name', 'quantity', 'estimated_expiry_info')
+            changed = []
+            # 最早到期日改變的物品，統計計數中視為移除舊值並加入新值
+            expiry_before, expiry_after = [], []
+            for item, seen in pairs:
+                values = (seen.name, InventoryReconciliationService.normalize_name(seen.name),
+                          seen.quantity, seen.estimated_expiry_info)
+                if tuple(getattr(item, field) for field in fields) != values:
+                    for field, value in zip(fields, values, strict=True):
+                        setattr(item, field, value)
+                    # 保質期描述改變時採用新辨識結果推算的到期日，最早到期日改變則重新提醒
+                    if item.expiry_min_date != seen.expiry_min_date:
+                        item.expiry_notified_at = None
+                        expiry_before.append((item.owner_id, item.expiry_min_date))
+                        expiry_after.append((item.owner_id, seen.expiry_min_date))
+                    item.expiry_min_date, item.expiry_max_date = seen.expiry_min_date, seen.expiry_max_date
+                    item.source_item = seen
+                    # bulk_update 不會觸發 auto_now
+                    item.updated_at = timezone.now()
+                    changed.append(item)
+            if changed:
+                FridgeInventoryItem.objects.bulk_update(
+                    changed, [*fields, 'expiry_min_date', 'expiry_max_date', 'expiry_notified_at', 'source_item', 'updated_at']
+                )
+
+            if hint == 'take_out':
+                added = []
+            if added:
+                FridgeInventoryItem.objects.bulk_create([
+                    FridgeInventoryItem(
+                        fridge_device=device,
+                        name=seen.name,
+                        normalized_name=InventoryReconciliationService.normalize_name(seen.name),
+                        quantity=seen.quantity,
+                        estimated_expiry_info=seen.estimated_expiry_info,
+                        placement_date=seen.placement_date,
+                        expiry_min_date=seen.expiry_min_date,
+                        expiry_max_date=seen.expiry_max_date,
+                        owner_id=seen.owner_id,
+                        source_item=seen,
+                    )
+                    for seen in added
+                ])
+
+            if hint == 'put_in':
+                removed = []
+            if removed:
+                FridgeInventoryItem.objects.filter(id__in=[item.id for item in removed]).delete()
+
+            SummaryService.record_inventory(
+                device.id,
+                added=[(seen.owner_id, seen.expiry_min_date) for seen in added] + expiry_after,
+                removed=[(item.owner_id, item.expiry_min_date) for item in removed] + expiry_before,
+            )
+            FridgeDevice.objects.filter(pk=device.pk).update(inventory_synced_at=photo.uploaded_at)
+
+        result = {
+            'hint': hint,
+            'matched': len(pairs),
+            'renamed': renamed,
+            'updated': len(changed),
+            'added': len(added),
+            'removed': len(removed),
+        }
+        logger.info(f"照片 {photo.id} 已更新冰箱 {device.id} 的庫存: {result}")
+        return result
+
+    @staticmethod
+    def add_manual(item: RecognizedItem, device: FridgeDevice) -> FridgeInventoryItem:
+        """
+        將手動新增的物品 (沒有來源照片的 RecognizedItem) 加入冰箱的目前庫存
+
+        Args:
+            item: 已保存的 RecognizedItem
+            device: 物品所在的冰箱
+
+        Returns:
+            FridgeInventoryItem: 新建立的庫存物品
+        """
+        with transaction.atomic():
+            inventory_item = FridgeInventoryItem.objects.create(
+                fridge_device=device,
+                name=item.name,
+                normalized_name=InventoryReconciliationService.normalize_name(item.name),
+                quantity=item.quantity,
+                estimated_expiry_info=item.estimated_expiry_info,
+                placement_date=item.placement_date,
+                expiry_min_date=item.expiry_min_date,
+                expiry_max_date=item.expiry_max_date,
+                owner_id=item.owner_id,
+                source_item=item,
+            )
+            SummaryService.record_inventory(device.id, added=[(item.owner_id, item.expiry_min_date)], removed=[])
+        return inventory_item
+
+    @staticmethod
+    def inventory_items_for(item: RecognizedItem, name: str | None = None):
+        """
+        找出與辨識記錄對應的庫存物品
+
+        優先使用 source_item；沒有時 (物品在後來的照片中沒有變化) 以照片所屬冰箱中
+        同擁有者、同名稱的物品對應。
+
+        Args:
+            item: RecognizedItem 實例
+            name: 比對用的名稱，預設為 item.name (編輯前的名稱)
+
+        Returns:
+            QuerySet: FridgeInventoryItem
+        """
+        linked = FridgeInventoryItem.objects.filter(source_item=item)
+        if linked.exists() or item.photo_id is None:
+            return linked
+        return FridgeInventoryItem.objects.filter(
+            fridge_device_id=item.photo.fridge_device_id,
+            owner_id=item.owner_id,
+            normalized_name=InventoryReconciliationService.normalize_name(name or item.name),
+        )[:1]
+
+    @staticmethod
+    def sync_item(item: RecognizedItem, previous_name: str) -> int:
+        """
+        將編輯後的辨識記錄寫回對應的庫存物品
+
+        Args:
+            item: 已保存的 RecognizedItem
+            previous_name: 編輯前的名稱
+
+        Returns:
+            int: 更新的庫存物品數
+        """
+        with transaction.atomic():
+            targets = list(
+                InventoryReconciliationService.inventory_items_for(item, previous_name).select_for_update()
+            )
+            for inventory_item in targets:
+                if inventory_item.expiry_min_date != item.expiry_min_date:
+                    inventory_item.expiry_notified_at = None
+                    SummaryService.record_inventory(
+                        inventory_item.fridge_device_id,
+                        added=[(inventory_item.owner_id, item.expiry_min_date)],
+                        removed=[(inventory_item.owner_id, inventory_item.expiry_min_date)],
+                    )
+                inventory_item.name = item.name
+                inventory_item.normalized_name = InventoryReconciliationService.normalize_name(item.name)
+                inventory_item.quantity = item.quantity
+                inventory_item.estimated_expiry_info = item.estimated_expiry_info
+                inventory_item.expiry_min_date, inventory_item.expiry_max_date = item.expiry_min_date, item.expiry_max_date
+                inventory_item.source_item = item
+                inventory_item.save()
+        return len(targets)
+
+    @staticmethod
+    def remove_item(item: RecognizedItem) -> int:
+        """
+        刪除辨識記錄並將對應的物品移出庫存
+
+        Args:
+            item: RecognizedItem 實例
+
+        Returns:
+            int: 移出的庫存物品數
+        """
+        with transaction.atomic():
+            targets = list(InventoryReconciliationService.inventory_items_for(item).select_for_update())
+            for inventory_item in targets:
+                SummaryService.record_inventory(
+                    inventory_item.fridge_device_id,
+                    added=[],
+                    removed=[(inventory_item.owner_id, inventory_item.expiry_min_date)],
+                )
+            FridgeInventoryItem.objects.filter(id__in=[target.id for target in targets]).delete()
+            item.delete()
+        return len(targets)
+
+    @staticmethod
+    def rebuild(device: FridgeDevice) -> dict | None:
+        """
+        清空並以最新一張已辨識照片重建冰箱的庫存
+
+        Args:
+            device: FridgeDevice 實例
+
+        Returns:
+            Dict | None: reconcile 的結果，沒有已辨識照片時返回 None
+        """
+        with transaction.atomic():
+            current = FridgeInventoryItem.objects.filter(fridge_device=device)
+            SummaryService.record_inventory(
+                device.id, added=[], removed=list(current.values_list('owner_id', 'expiry_min_date'))
+            )
+            current.delete()
+            FridgeDevice.objects.filter(pk=device.pk).update(inventory_synced_at=None)
+            latest = (
+                Photo.objects
+                .filter(fridge_device=device, recognition_status='completed')
+                .order_by('-uploaded_at')
+                .first()
+            )
+            if latest is None:
+                return None
+            return InventoryReconciliationService.reconcile(latest, use_hint=False)
+
+
+def _parse_expiry_rows(rows: list[tuple]) -> list[tuple]:
+    # 在工作行程中執行：rows 為 (id, estimated_expiry_info, placement_date)
+    return [(row_id, *expiry_range(text, placement_date)) for row_id, text, placement_date in rows]
+
+
+class ExpiryDateService:
+    """
+    由 estimated_expiry_info 推算的到期日 (expiry_min_date / expiry_max_date) 查詢與回填
+
+    「N 天內到期」為 expiry_min_date <= 今天 + N (包含已過期)，配合
+    (owner, expiry_min_date) 與 (fridge_device, expiry_min_date) 索引為範圍掃描。
+    庫存列表的 ?expiring 篩選、到期提醒與首頁的即將到期計數都採用這個條件。
+    """
+    MODELS = {'recognized': RecognizedItem, 'inventory': FridgeInventoryItem}
+
+    @staticmethod
+    def expiring_within(days: int, owner=None, fridge_device: FridgeDevice | None = None):
+        """
+        查詢冰箱目前庫存中 N 天內 (含已過期) 可能到期的物品
+
+        Args:
+            days: 天數
+            owner: 只查詢此用戶的物品
+            fridge_device: 只查詢此冰箱的物品
+
+        Returns:
+            QuerySet: 依最早到期日排序的 FridgeInventoryItem
+        """
+        items = FridgeInventoryItem.objects.filter(
+            expiry_min_date__lte=timezone.localdate() + timedelta(days=days)
+        )
+        if owner is not None:
+            items = items.filter(owner=owner)
+        if fridge_device is not None:
+            items = items.filter(fridge_device=fridge_device)
+        return items.order_by('expiry_min_date', 'id')
+
+    @staticmethod
+    def backfill(model, workers: int = 4, batch_size: int = 2000, recompute: bool = False) -> dict:
+        """
+        以多個行程並行解析保質期描述並回填到期日
+
+        資料庫讀寫都在呼叫端行程中進行，工作行程只執行純文字解析。
+
+        Args:
+            model: RecognizedItem 或 FridgeInventoryItem
+            workers: 解析的行程數
+            batch_size: 每批讀取並寫入的筆數
+            recompute: 為 True 時重新計算所有物品，否則只處理 expiry_min_date 為空的物品
+
+        Returns:
+            Dict: scanned (讀取) 與 parsed (解析出到期日) 的筆數
+        """
+        queryset = model.objects.all() if recompute else model.objects.filter(expiry_min_date__isnull=True)
+        result = {'scanned': 0, 'parsed': 0}
+        chunk_size = max(batch_size // workers, 1)
+        last_id = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            while True:
+                rows = list(
+                    queryset.filter(id__gt=last_id)
+                    .order_by('id')
+                    .values_list('id', 'estimated_expiry_info', 'placement_date')[:batch_size]
+                )
+                if not rows:
+                    break
+                last_id = rows[-1][0]
+                chunks = [rows[start:start + chunk_size] for start in range(0, len(rows), chunk_size)]
+                updates = [
+                    model(id=row_id, expiry_min_date=min_date, expiry_max_date=max_date)
+                    for parsed in executor.map(_parse_expiry_rows, chunks)
+                    for row_id, min_date, max_date in parsed
+                ]
+                model.objects.bulk_update(updates, ['expiry_min_date', 'expiry_max_date'])
+                result['scanned'] += len(rows)
+                result['parsed'] += sum(1 for item in updates if item.expiry_min_date is not None)
+                logger.info(f"{model.__name__} 到期日回填進度: {result}")
+        return result
+
+
+class ExpiryNotificationService:
+    """
+    依用戶彙整並寄出到期提醒 (Celery beat 定時執行 notify_expiring_items)
+
+    以 owner_id 游標一次取出一批有待提醒物品的用戶，用一次條件式 UPDATE 將這些用戶
+    EXPIRY_NOTIFY_DAYS 天內到期 (含已過期) 且尚未提醒的物品標記為已提醒，同時防止
+    重疊的排程重複寄出；之後每位用戶寄出一份摘要，寄送失敗則還原該用戶物品的狀態，
+    留待下次排程重試。已提醒的物品離開 inventory_expiry_pending_idx 部分索引，
+    每次排程只會掃描新進入提醒範圍的物品。
+    """
+
+    @staticmethod
+    def pending(days: int | None = None):
+        """
+        查詢 N 天內到期且尚未提醒的冰箱庫存
+
+        Args:
+            days: 提前提醒的天數，預設為 settings.EXPIRY_NOTIFY_DAYS
+
+        Returns:
+            QuerySet: FridgeInventoryItem
+        """
+        days = settings.EXPIRY_NOTIFY_DAYS if days is None else days
+        return ExpiryDateService.expiring_within(days).filter(expiry_notified_at__isnull=True, owner__isnull=False)
+
+    @staticmethod
+    def run(days: int | None = None, batch_size: int | None = None, time_budget: float | None = None,
+            notifiers: list[ExpiryNotifier] | None = None) -> dict:
+        """
+        寄出到期提醒，直到沒有待提醒的用戶或超過時間預算
+
+        時間預算在每批之間檢查；未處理完的用戶保持未提醒狀態，由下次排程接續。
+
+        Args:
+            days: 提前提醒的天數，預設為 settings.EXPIRY_NOTIFY_DAYS
+            batch_size: 每批處理的用戶數，預設為 settings.EXPIRY_NOTIFY_BATCH_SIZE
+            time_budget: 本次執行的秒數上限，預設為 settings.EXPIRY_NOTIFY_TIME_BUDGET
+            notifiers: 發送方式，預設依 settings.EXPIRY_NOTIFIERS 建立
+
+        Returns:
+            Dict: users (已寄出)、items (已提醒物品)、skipped (沒有聯絡方式)、failed (寄送失敗)
+            的數量，complete 表示是否已處理完所有待提醒的用戶，elapsed_ms 為耗時
+        """
+        started = time.perf_counter()
+        notifiers = notifiers or get_notifiers()
+        batch_size = batch_size or settings.EXPIRY_NOTIFY_BATCH_SIZE
+        deadline = time.monotonic() + (time_budget or settings.EXPIRY_NOTIFY_TIME_BUDGET)
+        pending = ExpiryNotificationService.pending(days)
+        result = {'users': 0, 'items': 0, 'skipped': 0, 'failed': 0, 'complete': False}
+
+        last_owner_id = 0
+        while time.monotonic() < deadline:
+            owner_ids = list(
+                pending.filter(owner_id__gt=last_owner_id)
+                .order_by('owner_id')
+                .values_list('owner_id', flat=True)
+                .distinct()[:batch_size]
+            )
+            if not owner_ids:
+                result['complete'] = True
+                break
+            last_owner_id = owner_ids[-1]
+
+            # 以本批的時間戳記標記，之後只處理由本批標記的物品
+            token = timezone.now()
+            pending.filter(owner_id__in=owner_ids).update(expiry_notified_at=token)
+            claimed = (
+                FridgeInventoryItem.objects
+                .select_related('owner', 'fridge_device')
+                .filter(owner_id__in=owner_ids, expiry_notified_at=token)
+                .order_by('owner_id', 'expiry_min_date', 'id')
+            )
+            for _, items in groupby(claimed, key=attrgetter('owner_id')):
+                ExpiryNotificationService._notify(list(items), notifiers, token, result)
+
+        result['elapsed_ms'] = elapsed_ms(started)
+        logger.info(f"到期提醒排程完成: {result}")
+        return result
+
+    @staticmethod
+    def _notify(items: list[FridgeInventoryItem], notifiers: list[ExpiryNotifier], token, result: dict) -> None:
+        user = items[0].owner
+        entries = digest_items(items)
+        try:
+            sent = [notifier.send(user, entries) for notifier in notifiers]
+        except Exception as e:
+            logger.error(f"寄送到期提醒給用戶 {user.id} 失敗: {e}")
+            FridgeInventoryItem.objects.filter(
+                id__in=[item.id for item in items], expiry_notified_at=token
+            ).update(expiry_notified_at=None)
+            result['failed'] += 1
+            return
+        result['items'] += len(items)
+        if any(sent):
+            result['users'] += 1
+        else:
+            result['skipped'] += 1
+
+
+class RecognitionJobService:
+    """
+    單張照片辨識工作的資料庫步驟 (開始、沿用結果、讀取圖片、完成、失敗)
+
+    Celery 任務 process_fridge_image 與非同步辨識執行器共用這些步驟，
+    兩者只在呼叫 LLM 的方式上不同。
+    """
+    @staticmethod
+    def start(photo_id: int) -> Photo | None:
+        """
+        以條件更新取得照片並標記為處理中
+
+        照片已完成、失敗或正由其他工作者處理時返回 None，因此 Celery 重新投遞
+        或重複送出的任務不會重複辨識同一張照片。
+
+        Args:
+            photo_id: Photo 實例的 ID
+
+        Returns:
+            Photo | None: 處理中的 Photo 實例；未取得時返回 None
+
+        Raises:
+            Photo.DoesNotExist: 當照片不存在時拋出
+        """
+        started = time.perf_counter()
+        photo = PhotoStatusService.claim(photo_id)
+        if photo is None:
+            return None
+        # 供 finish 計算整個辨識工作的耗時 (recognition_total)
+        photo.recognition_started = started
+        return photo
+
+    @staticmethod
+    def reuse_previous_result(photo: Photo) -> bool:
+        """
+        冰箱內容沒有改變時直接沿用上一張照片的辨識結果並完成工作
+
+        Args:
+            photo: 處理中的 Photo 實例
+
+        Returns:
+            bool: 已沿用結果 (不需呼叫 LLM) 時返回 True
+        """
+        unchanged = PhotoDedupeService.find_unchanged_source(photo)
+        if unchanged is None:
+            return False
+        with RecognitionJobService._completing(photo):
+            PhotoDedupeService.copy_recognition(photo, *unchanged)
+        return True
+
+    @staticmethod
+    def read_image(photo: Photo) -> bytes:
+        """
+        從 S3 直接讀入照片內容，不寫入暫存檔 (耗時記錄為 download 階段)
+
+        Args:
+            photo: Photo 實例
+
+        Returns:
+            bytes: 照片內容
+        """
+        with stage_timer(photo.processing_metrics, 'download'), photo.image.open('rb') as image_file:
+            image_data = image_file.read()
+        photo.processing_metrics['original_bytes'] = len(image_data)
+        return image_data
+
+    @staticmethod
+    def save_item(photo: Photo, item_data: dict) -> RecognizedItem:
+        """
+        立即建立一個辨識出的物品 (串流辨識時每完成一個物品就呼叫)
+
+        Args:
+            photo: 處理中的 Photo 實例
+            item_data: 物品資料 (name、quantity、estimated_expiry_info)
+
+        Returns:
+            RecognizedItem: 新建立的物品
+        """
+        with stage_timer(photo.processing_metrics, 'save_items', accumulate=True):
+            return RecognizedItem.objects.create(
+                photo=photo,
+                name=item_data['name'],
+                quantity=item_data['quantity'],
+                estimated_expiry_info=item_data['estimated_expiry_info'],
+                placement_date=photo.uploaded_at.date(),
+                owner=photo.uploaded_by
+            )
+
+    @staticmethod
+    def finish(photo: Photo) -> None:
+        """
+        將照片標記為已完成 (同時保存 processing_metrics)
+
+        完成前以辨識結果更新冰箱的目前庫存；庫存更新與狀態切換在同一個交易中，
+        照片已被其他工作者回收時不會改變庫存。
+
+        Args:
+            photo: 處理中的 Photo 實例
+        """
+        with RecognitionJobService._completing(photo), stage_timer(photo.processing_metrics, 'reconcile'):
+            photo.processing_metrics['reconcile'] = InventoryReconciliationService.reconcile(photo)
+
+    @staticmethod
+    @contextmanager
+    def _completing(photo: Photo):
+        # 區塊內的寫入與完成狀態的切換在同一個交易中；本工作已不持有照片時撤銷這些寫入
+        with transaction.atomic():
+            yield
+            if not RecognitionJobService._complete(photo):
+                transaction.set_rollback(True)
+
+    @staticmethod
+    def _complete(photo: Photo) -> bool:
+        # 只寫入狀態與 processing_metrics (以及 copy_recognition 設定的 duplicate_of)
+        started = getattr(photo, 'recognition_started', None)
+        if started is not None:
+            record_stage(photo.processing_metrics, 'recognition_total', elapsed_ms(started))
+        return PhotoStatusService.transition(photo, 'completed', ('processing_metrics', 'duplicate_of_id'))
+
+    @staticmethod
+    def fail(photo: Photo) -> None:
+        """
+        將照片標記為辨識失敗 (只在本工作仍持有該照片時)
+
+        串流時已逐一建立的物品是不完整的結果，與狀態切換在同一個交易中刪除。
+
+        Args:
+            photo: start 返回的 Photo 實例
+        """
+        with transaction.atomic():
+            if PhotoStatusService.transition(photo, 'failed', ('processing_metrics',)):
+                deleted, _ = RecognizedItem.objects.filter(photo=photo).delete()
+                if deleted:
+                    logger.info(f"照片 {photo.id} 辨識失敗，已刪除 {deleted} 個部分辨識的物品")
@@ -0,0 +1,90 @@
+import logging
+
+from django.core.cache import caches
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'recognition'
+KEY_PREFIX = 'recognition:stats:'
+
+
+class RecognitionStats:
+    """
+    跨行程累計的辨識計數器
+
+    計數器存放於 'recognition' 快取 (Redis)，預設不設過期時間；Redis 無法連線時
+    只會略過計數，不影響辨識流程。
+    """
+    @staticmethod
+    def incr(name: str, delta: int = 1, timeout: float | None = None) -> None:
+        """
+        增加計數器
+
+        Args:
+            name: 計數器名稱
+            delta: 增加的數值
+            timeout: 過期秒數，每次增加都會重設；None 表示不過期
+        """
+        key = f"{KEY_PREFIX}{name}"
+        try:
+            cache = caches[CACHE_ALIAS]
+            if not cache.add(key, delta, timeout=timeout):
+                cache.incr(key, delta)
+                if timeout is not None:
+                    cache.touch(key, timeout)
+        except Exception:  # noqa: S110 - 計數失敗不影響辨識流程
+            pass
+
+    @staticmethod
+    def decr(name: str, delta: int = 1, timeout: float | None = None) -> None:
+        """
+        減少計數器；計數器不存在 (已過期或 Redis 曾無法連線) 時略過，結果小於 0 時歸零
+
+        Args:
+            name: 計數器名稱
+            delta: 減少的數值
+            timeout: 過期秒數，每次減少都會重設；None 表示不過期
+        """
+        key = f"{KEY_PREFIX}{name}"
+        try:
+            cache = caches[CACHE_ALIAS]
+            if cache.decr(key, delta) < 0:
+                cache.set(key, 0, timeout=timeout)
+            elif timeout is not None:
+                cache.touch(key, timeout)
+        except Exception:  # noqa: S110 - 計數失敗不影響辨識流程
+            pass
+
+    @staticmethod
+    def get_many(names) -> dict:
+        """
+        讀取多個計數器
+
+        Args:
+            names: 計數器名稱
+
+        Returns:
+            Dict: 計數器名稱與數值，未設定或讀取失敗時為 0
+        """
+        try:
+            counters = caches[CACHE_ALIAS].get_many([f"{KEY_PREFIX}{name}" for name in names])
+        except Exception as e:
+            logger.warning(f"讀取辨識計數器失敗: {str(e)}")
+            counters = {}
+        return {name: counters.get(f"{KEY_PREFIX}{name}", 0) for name in names}
+
+    @staticmethod
+    def rate(counters: dict, numerator: tuple, denominator: tuple) -> float | None:
+        """
+        計算比例
+
+        Args:
+            counters: get_many 返回的計數器
+            numerator: 分子計數器名稱
+            denominator: 分母計數器名稱
+
+        Returns:
+            float | None: 比例 (小數點後三位)，分母為 0 時為 None
+        """
+        total = sum(counters[name] for name in denominator)
+        return round(sum(counters[name] for name in numerator) / total, 3) if total else None
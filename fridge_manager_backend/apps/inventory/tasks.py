@@ -1,12 +1,18 @@
-import os
-import tempfile
+import logging
+from functools import partial
 
-from celery import shared_task
+from celery import group, shared_task
+from django.conf import settings
 
-from apps.inventory.models import RecognizedItem
-from apps.inventory.services import ImageRecognitionService
+from apps.inventory.services import (
+    ExpiryNotificationService,
+    ImageRecognitionService,
+    RecognitionJobService,
+)
 from apps.photos.models import Photo
 
+logger = logging.getLogger(__name__)
+
 
 @shared_task
 def process_fridge_image(photo_id: int) -> None:
@@ -16,65 +22,64 @@ def process_fridge_image(photo_id: int) -> None:
     Args:
         photo_id: Photo 實例的 ID
     """
+    # 以條件更新取得照片；已完成、失敗或正由其他工作者處理 (例如 Celery 重新投遞) 時直接結束
     try:
-        # 獲取 Photo 實例
-        photo = Photo.objects.get(id=photo_id)
-
-        # 更新狀態為處理中
-        photo.recognition_status = 'processing'
-        photo.save()
-
-        # 創建臨時文件
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-            # 從 S3 下載文件到臨時位置
-            with photo.image.open('rb') as image_file:
-                temp_file.write(image_file.read())
-            temp_file_path = temp_file.name
-
-        try:
-            # 調用 LLM 分析圖片
-            recognized_items = ImageRecognitionService.analyze_image_with_llm(
-                temp_file_path,
-                photo
-            )
-
-            # 創建 RecognizedItem 實例
-            items_to_create = []
-            for item_data in recognized_items:
-                items_to_create.append(
-                    RecognizedItem(
-                        photo=photo,
-                        name=item_data['name'],
-                        quantity=item_data['quantity'],
-                        estimated_expiry_info=item_data['estimated_expiry_info'],
-                        placement_date=photo.uploaded_at.date(),
-                        owner=photo.uploaded_by
-                    )
-                )
-
-            # 批量創建物品
-            if items_to_create:
-                RecognizedItem.objects.bulk_create(items_to_create)
-
-            # 更新照片狀態為已完成
-            photo.recognition_status = 'completed'
-            photo.save()
-
-        finally:
-            # 清理臨時文件
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-
+        photo = RecognitionJobService.start(photo_id)
     except Photo.DoesNotExist:
         # 如果照片不存在，記錄錯誤
-        print(f"照片 ID {photo_id} 不存在")
+        logger.error(f"照片 ID {photo_id} 不存在")
+        return
+    if photo is None:
+        return
+
+    try:
+        # 冰箱內容沒有改變時直接沿用上一張照片的辨識結果，不呼叫 LLM
+        if RecognitionJobService.reuse_previous_result(photo):
+            return
+
+        # 從 S3 直接讀入記憶體並調用 LLM 分析圖片，每辨識出一個物品就立即建立
+        image_data = RecognitionJobService.read_image(photo)
+        ImageRecognitionService.analyze_image_with_llm(
+            image_data, photo, on_item=partial(RecognitionJobService.save_item, photo)
+        )
+
+        # 更新照片狀態為已完成
+        RecognitionJobService.finish(photo)
+
     except Exception:
         # 如果處理過程中發生錯誤，更新照片狀態為失敗
-        try:
-            photo = Photo.objects.get(id=photo_id)
-            photo.recognition_status = 'failed'
-            photo.save()
-        except Photo.DoesNotExist:
-            pass
+        RecognitionJobService.fail(photo)
         # 重新拋出異常，讓 Celery 記錄錯誤
         raise
+
+
+def dispatch_recognition(*photo_ids: int) -> None:
+    """
+    依 RECOGNITION_EXECUTOR 設定送出照片辨識工作
+
+    'celery' 時為每張照片送出 process_fridge_image 任務；'async' 時照片保持
+    'pending'，由 recognition_worker 指令中的非同步執行器輪詢處理。
+
+    Args:
+        photo_ids: 要辨識的 Photo ID
+    """
+    if not photo_ids:
+        return
+    if settings.RECOGNITION_EXECUTOR == 'async':
+        logger.debug(f"照片 {list(photo_ids)} 交由非同步辨識工作者處理")
+        return
+    if len(photo_ids) == 1:
+        process_fridge_image.delay(photo_ids[0])
+    else:
+        group([process_fridge_image.s(photo_id) for photo_id in photo_ids]).apply_async()
+
+
+@shared_task
+def notify_expiring_items() -> dict:
+    """
+    寄出到期提醒的 Celery 任務，由 CELERY_BEAT_SCHEDULE 每 EXPIRY_NOTIFY_INTERVAL 秒執行
+
+    Returns:
+        Dict: ExpiryNotificationService.run 的結果
+    """
+    return ExpiryNotificationService.run()
@@ -1,2 +1,416 @@
+import asyncio
+import base64
+import io
+import json
+from collections import Counter
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from apps.fridges.models import FridgeDevice, FridgeOperationLog
+from apps.photos.models import Photo
+
+from .cache import RecognitionCache
+from .expiry import expiry_range, parse_expiry_days
+from .models import FridgeInventoryItem, RecognizedItem
+from .notifiers import ExpiryNotifier
+from .parsing import RecognizedItemStreamParser, extract_items
+from .router import LLMRouter
+from .services import (
+    ExpiryNotificationService,
+    ImageRecognitionService,
+    InventoryReconciliationService,
+    PhotoDedupeService,
+    RecognitionJobService,
+)
+from .stats import RecognitionStats
+
+MILK = {'name': '牛奶', 'quantity': '1 瓶', 'estimated_expiry_info': '約3天'}
+EGGS = {'name': '雞蛋', 'quantity': '6 顆', 'estimated_expiry_info': '2-3週'}
+
+
+def reply(*items) -> str:
+    return json.dumps({'recognized_items': list(items)}, ensure_ascii=False)
+
+
+class PhotoFixtureMixin:
+    """建立測試用的用戶、冰箱與照片 (照片只有儲存鍵，不存取 S3)"""
+    def setUp(self):
+        super().setUp()
+        caches['recognition'].clear()
+        self.user = get_user_model().objects.create_user(username='alice')
+        self.device = FridgeDevice.objects.create(name="測試冰箱", device_id_esp='fridge-1')
+
+    def create_photo(self, status='pending', operation_type=None, uploaded_at=None) -> Photo:
+        photo = Photo.objects.create(
+            fridge_device=self.device,
+            image='fridge_photos/test.jpg',
+            timestamp_esp=timezone.now(),
+            uploaded_by=self.user,
+            recognition_status=status,
+        )
+        if uploaded_at is not None:
+            # uploaded_at 為 auto_now_add，只能在建立後更新
+            Photo.objects.filter(pk=photo.pk).update(uploaded_at=uploaded_at)
+            photo.uploaded_at = uploaded_at
+        if operation_type is not None:
+            FridgeOperationLog.objects.create(
+                user=self.user, fridge_device=self.device, operation_type=operation_type, photo_taken=photo
+            )
+        return photo
+
+    def recognize(self, photo: Photo, *items: dict) -> Photo:
+        for item in items:
+            RecognizedItem.objects.create(photo=photo, placement_date=photo.uploaded_at.date(), owner=self.user, **item)
+        return photo
+
+
+class RecognizedItemStreamParserTests(TestCase):
+    def test_items_are_returned_as_soon_as_complete(self):
+        text = reply(MILK, EGGS)
+        parser = RecognizedItemStreamParser()
+        completed_at = []
+        for index, char in enumerate(text):
+            if parser.feed(char):
+                completed_at.append(index)
+
+        self.assertEqual(parser.items, [MILK, EGGS])
+        # 第一個物品在第二個物品開始輸出前就已交付
+        self.assertLess(completed_at[0], text.index('雞蛋'))
+        self.assertFalse(parser.recovered)
+
+    def test_tolerates_fences_and_trailing_commas(self):
+        text = (
+            '以下是辨識結果：\n```json\n{"recognized_items": [\n'
+            '{"name": "牛奶", "quantity": "1 瓶", "estimated_expiry_info": "約3天",},\n]}\n```'
+        )
+        parser = RecognizedItemStreamParser()
+        parser.feed(text)
+
+        self.assertEqual(parser.items, [MILK])
+        self.assertTrue(parser.recovered)
+
+    def test_code_fence_is_not_a_repair(self):
+        parser = RecognizedItemStreamParser()
+        parser.feed(f'```json\n{reply(MILK)}\n```')
+
+        self.assertEqual(parser.items, [MILK])
+        self.assertFalse(parser.recovered)
+
+    def test_truncated_array_keeps_completed_items(self):
+        text = reply(MILK, EGGS)
+        parser = RecognizedItemStreamParser()
+        parser.feed(text[:text.index('雞蛋')])
+
+        self.assertEqual(parser.items, [MILK])
+        self.assertTrue(parser.array_found)
+        self.assertTrue(parser.recovered)
+
+
+class ExtractItemsTests(TestCase):
+    def test_strict_json(self):
+        self.assertEqual(extract_items(reply(MILK)), ([MILK], False))
+
+    def test_code_fence_is_strict(self):
+        for content in (f'```json\n{reply(MILK)}\n```', f'```\n{reply(MILK)}\n```\n'):
+            with self.subTest(content=content):
+                self.assertEqual(extract_items(content), ([MILK], False))
+
+    def test_items_missing_fields_are_skipped(self):
+        items, recovered = extract_items(reply(MILK, {'name': '蘋果'}))
+        self.assertEqual(items, [MILK])
+        self.assertTrue(recovered)
+
+    def test_missing_items_key_is_a_parse_failure(self):
+        for content in ('{}', '{"items": []}', '{"recognized_items": null}', '沒有看到任何物品'):
+            with self.subTest(content=content), self.assertRaises(ValueError):
+                extract_items(content)
+
+
+class ExpiryParsingTests(TestCase):
+    def test_parse_expiry_days(self):
+        cases = {
+            '一週內': (7, 7),
+            '2個月內': (60, 60),
+            '2-3週': (14, 21),
+            '約3天': (3, 3),
+            '一個半月': (45, 45),
+            '幾天': (2, 5),
+            '明天': (1, 1),
+            '已過期': (0, 0),
+            'within a week': (7, 7),
+            'within a month': (30, 30),
+            '1-2 weeks': (7, 14),
+            '3 months or more': (90, None),
+            '不知道': None,
+            '': None,
+        }
+        for text, expected in cases.items():
+            with self.subTest(text=text):
+                self.assertEqual(parse_expiry_days(text), expected)
+
+    def test_expiry_range(self):
+        placed = date(2025, 1, 1)
+        self.assertEqual(expiry_range('約3天', placed), (date(2025, 1, 4), date(2025, 1, 4)))
+        self.assertEqual(expiry_range('3 months or more', placed), (date(2025, 4, 1), None))
+        # 描述中寫明的日期直接作為到期日
+        self.assertEqual(expiry_range('2025/06/01 前食用', placed), (date(2025, 6, 1), date(2025, 6, 1)))
+        self.assertEqual(expiry_range('約3天', None), (None, None))
+
+    def test_recognized_item_stores_expiry_dates(self):
+        user = get_user_model().objects.create_user(username='alice')
+        item = RecognizedItem.objects.create(owner=user, placement_date=date(2025, 1, 1), **MILK)
+        self.assertEqual((item.expiry_min_date, item.expiry_max_date), (date(2025, 1, 4), date(2025, 1, 4)))
+
+
+class InventoryReconciliationTests(PhotoFixtureMixin, TestCase):
+    def inventory(self) -> dict:
+        return dict(FridgeInventoryItem.objects.filter(fridge_device=self.device).values_list('name', 'quantity'))
+
+    def test_snapshot_adds_updates_and_removes(self):
+        now = timezone.now()
+        first = self.recognize(self.create_photo(uploaded_at=now - timedelta(hours=1)), MILK, EGGS)
+        result = InventoryReconciliationService.reconcile(first)
+        self.assertEqual(result['added'], 2)
+        self.assertEqual(self.inventory(), {'牛奶': '1 瓶', '雞蛋': '6 顆'})
+
+        # 名稱加上狀態說明的物品視為同一物品；未再出現的物品被移除
+        second = self.recognize(
+            self.create_photo(uploaded_at=now), {**MILK, 'name': '牛奶 (已開封)', 'quantity': '半瓶'}
+        )
+        result = InventoryReconciliationService.reconcile(second)
+
+        self.assertEqual((result['renamed'], result['updated'], result['removed']), (1, 1, 1))
+        self.assertEqual(self.inventory(), {'牛奶 (已開封)': '半瓶'})
+
+    def test_put_in_does_not_remove_hidden_items(self):
+        now = timezone.now()
+        InventoryReconciliationService.reconcile(
+            self.recognize(self.create_photo(uploaded_at=now - timedelta(hours=1)), MILK, EGGS)
+        )
+        photo = self.recognize(self.create_photo(operation_type='put_in', uploaded_at=now), MILK)
+        result = InventoryReconciliationService.reconcile(photo)
+
+        self.assertEqual(result['removed'], 0)
+        self.assertEqual(set(self.inventory()), {'牛奶', '雞蛋'})
+
+    def test_older_photo_does_not_overwrite_inventory(self):
+        now = timezone.now()
+        InventoryReconciliationService.reconcile(self.recognize(self.create_photo(uploaded_at=now), MILK))
+        stale = self.recognize(self.create_photo(uploaded_at=now - timedelta(hours=1)), EGGS)
+
+        self.assertEqual(InventoryReconciliationService.reconcile(stale), {'skipped': 'stale'})
+        self.assertEqual(set(self.inventory()), {'牛奶'})
+
+
+class RecordingNotifier(ExpiryNotifier):
+    name = 'recording'
+
+    def __init__(self):
+        self.sent = []
+
+    def send(self, user, entries: list[dict]) -> bool:
+        self.sent.extend(entry['name'] for entry in entries)
+        return True
+
+
+@override_settings(EXPIRY_NOTIFY_DAYS=2)
+class ExpiryNotificationTests(PhotoFixtureMixin, TestCase):
+    def notify(self) -> list[str]:
+        notifier = RecordingNotifier()
+        ExpiryNotificationService.run(notifiers=[notifier])
+        return notifier.sent
+
+    def test_item_within_a_week_is_not_notified_when_placed(self):
+        photo = self.create_photo(uploaded_at=timezone.now())
+        InventoryReconciliationService.reconcile(self.recognize(photo, {**MILK, 'estimated_expiry_info': '一週內'}))
+
+        self.assertEqual(self.notify(), [])
+
+    def test_item_is_notified_once_near_expiry(self):
+        photo = self.create_photo(uploaded_at=timezone.now() - timedelta(days=5))
+        InventoryReconciliationService.reconcile(self.recognize(photo, {**MILK, 'estimated_expiry_info': '一週內'}))
+
+        self.assertEqual(self.notify(), ['牛奶'])
+        self.assertEqual(self.notify(), [])
+
+
+class RecognitionFailureTests(PhotoFixtureMixin, TestCase):
+    def test_fail_deletes_partial_items(self):
+        photo = RecognitionJobService.start(self.create_photo().id)
+        RecognitionJobService.save_item(photo, MILK)
+
+        RecognitionJobService.fail(photo)
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.recognition_status, 'failed')
+        self.assertFalse(RecognizedItem.objects.filter(photo=photo).exists())
+
+    def test_finish_of_reclaimed_photo_does_not_change_inventory(self):
+        photo = RecognitionJobService.start(self.create_photo().id)
+        RecognitionJobService.save_item(photo, MILK)
+        Photo.objects.filter(pk=photo.pk).update(recognition_started_at=timezone.now() + timedelta(seconds=1))
+
+        RecognitionJobService.finish(photo)
+
+        self.assertEqual(Photo.objects.get(pk=photo.pk).recognition_status, 'processing')
+        self.assertFalse(FridgeInventoryItem.objects.exists())
+
+    def test_fail_keeps_items_of_photo_reclaimed_by_another_worker(self):
+        photo = RecognitionJobService.start(self.create_photo().id)
+        RecognitionJobService.save_item(photo, MILK)
+        # 逾時後被其他工作者重新取得
+        Photo.objects.filter(pk=photo.pk).update(recognition_started_at=timezone.now() + timedelta(seconds=1))
+
+        RecognitionJobService.fail(photo)
+
+        self.assertEqual(Photo.objects.get(pk=photo.pk).recognition_status, 'processing')
+        self.assertTrue(RecognizedItem.objects.filter(photo=photo).exists())
+
+
+@override_settings(RECOGNITION_CACHE_ENABLED=True)
+class RecognitionCacheWriteTests(PhotoFixtureMixin, TestCase):
+    def finish_stream(self, text: str, finish_reason: str | None, key: str) -> list[dict]:
+        photo = self.create_photo(status='processing')
+        parser = RecognizedItemStreamParser()
+        parser.feed(text)
+        items, _ = ImageRecognitionService.finish_stream(parser, text, key, photo, finish_reason)
+        return items
+
+    def test_complete_stream_is_cached(self):
+        self.finish_stream(reply(MILK), 'stop', 'complete')
+        self.assertEqual(RecognitionCache.get('complete'), [MILK])
+
+    def test_fenced_reply_is_cached(self):
+        self.finish_stream(f'```json\n{reply(MILK)}\n```', 'stop', 'fenced')
+        self.assertEqual(RecognitionCache.get('fenced'), [MILK])
+
+    def test_truncated_stream_is_not_cached(self):
+        text = reply(MILK, EGGS)
+        items = self.finish_stream(text[:text.index('雞蛋')], None, 'truncated')
+
+        self.assertEqual(items, [MILK])
+        self.assertIsNone(RecognitionCache.get('truncated'))
+
+    def test_length_limited_reply_is_not_cached(self):
+        self.finish_stream(reply(MILK), 'length', 'length')
+        self.assertIsNone(RecognitionCache.get('length'))
+
+
+def jpeg(*boxes) -> bytes:
+    image = Image.new('RGB', (640, 480), (180, 180, 180))
+    for box in boxes:
+        image.paste((200, 30, 30), box)
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG')
+    return buffer.getvalue()
+
+
+@override_settings(FRAME_DIFF_ENABLED=True, PHOTO_DEDUPE_ENABLED=True, RECOGNITION_CACHE_ENABLED=False)
+class FrameDiffCropTests(PhotoFixtureMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.source = self.recognize(self.create_photo('completed', uploaded_at=now - timedelta(hours=1)), MILK, EGGS)
+        storage = Photo._meta.get_field('image').storage
+        patcher = mock.patch.object(storage, 'open', side_effect=lambda name, mode='rb': ContentFile(jpeg()))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def sent_size(self, request: dict) -> tuple[int, int]:
+        url = request['messages'][0]['content'][1]['image_url']['url']
+        data = base64.b64decode(url.split(',', 1)[1])
+        with Image.open(io.BytesIO(data)) as image:
+            return image.size
+
+    def test_put_in_sends_only_changed_region(self):
+        photo = self.create_photo('processing', operation_type='put_in', uploaded_at=timezone.now())
+        _, _, request = ImageRecognitionService.prepare_request(jpeg((400, 300, 520, 420)), photo)
+
+        width, height = self.sent_size(request)
+        self.assertLess(width * height, 640 * 480 / 4)
+        self.assertEqual(photo.processing_metrics['diff_crop']['source_photo_id'], self.source.id)
+        self.assertEqual(photo.processing_metrics['diff_crop']['regions'], 1)
+        # 未變化區域的物品不複製，由庫存依放入提示保留
+        self.assertFalse(photo.recognized_items.exists())
+
+    def test_snapshot_sends_full_frame(self):
+        photo = self.create_photo('processing', uploaded_at=timezone.now())
+        _, _, request = ImageRecognitionService.prepare_request(jpeg((400, 300, 520, 420)), photo)
+
+        self.assertEqual(self.sent_size(request), (640, 480))
+        self.assertNotIn('diff_crop', photo.processing_metrics)
+
+    def test_cropped_photo_is_not_a_dedupe_source(self):
+        Photo.objects.filter(pk=self.source.pk).update(
+            perceptual_hash='0' * 16, processing_metrics={'diff_crop': {'regions': 1, 'source_photo_id': 1}}
+        )
+        photo = self.create_photo(uploaded_at=timezone.now())
+        photo.perceptual_hash = '0' * 16
+
+        self.assertIsNone(PhotoDedupeService.find_unchanged_source(photo))
+
+
+class LLMRouterTests(TestCase):
+    def setUp(self):
+        caches['recognition'].clear()
+        self.router = LLMRouter([
+            {'url': 'http://llm-a:1234/v1', 'model': 'vision'},
+            {'url': 'http://llm-b:1234/v1', 'model': 'vision'},
+        ])
+        self.a, self.b = self.router.backends
+
+    def test_ties_are_spread_across_backends(self):
+        picked = Counter()
+        for _ in range(200):
+            backend = self.router.acquire()
+            picked[backend.url] += 1
+            self.router.release(backend, 10)
+        self.assertEqual(set(picked), {self.a.url, self.b.url})
+
+    def test_outstanding_requests_of_other_processes_are_counted(self):
+        # 另一個工作行程在 a 上有兩個進行中的請求
+        RecognitionStats.incr(self.a.outstanding_counter, 2)
+
+        backend = self.router.acquire()
+
+        self.assertIs(backend, self.b)
+        self.assertEqual(self.outstanding(self.b), 1)
+        self.router.release(backend, 10)
+        self.assertEqual(self.outstanding(self.b), 0)
+
+    def outstanding(self, backend) -> int:
+        return RecognitionStats.get_many([backend.outstanding_counter])[backend.outstanding_counter]
+
+    def test_outstanding_count_does_not_go_negative(self):
+        backend = self.router.acquire()
+        # 例如計數器在請求進行中過期後，被其他行程重新建立
+        RecognitionStats.decr(backend.outstanding_counter)
+
+        self.router.release(backend, 10)
+
+        self.assertEqual(self.outstanding(backend), 0)
+
+    def test_route_async_counts_outstanding_requests(self):
+        async def route():
+            async with self.router.route_async() as backend:
+                return backend, self.outstanding(backend)
+
+        backend, during = asyncio.run(route())
+
+        self.assertEqual((during, self.outstanding(backend)), (1, 0))
+        self.assertEqual(backend.requests, 1)
+
+    def test_weight_is_respected(self):
+        router = LLMRouter([
+            {'url': 'http://llm-a:1234/v1', 'model': 'vision', 'weight': 3},
+            {'url': 'http://llm-b:1234/v1', 'model': 'vision'},
+        ])
+        held = [router.acquire() for _ in range(4)]
+        self.assertEqual(Counter(backend.url for backend in held)['http://llm-a:1234/v1'], 3)
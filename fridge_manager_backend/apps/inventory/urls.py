@@ -10,5 +10,6 @@ urlpatterns = [
     path('add/', views.item_add, name='add'),
     path('<int:item_id>/edit/', views.item_edit, name='edit'),
     path('<int:item_id>/delete/', views.item_delete, name='delete'),
+    path('fridge/<int:device_id>/', views.fridge_contents, name='fridge_contents'),
     path('my-items/', views.UserItemListView.as_view(), name='user_items'),
 ]
@@ -4,30 +4,60 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.generic import ListView
 
-from .forms import RecognizedItemForm
-from .models import RecognizedItem
+from apps.core.pagination import paginate_keyset
+from apps.fridges.models import FridgeDevice
+
+from .forms import ManualItemForm, RecognizedItemForm
+from .models import FridgeInventoryItem, RecognizedItem
+from .services import ExpiryDateService, InventoryReconciliationService
 
 # Create your views here.
 
 class UserItemListView(LoginRequiredMixin, ListView):
-    model = RecognizedItem
+    model = FridgeInventoryItem
     template_name = 'inventory/user_item_list.html'
     context_object_name = 'items'
 
     def get_queryset(self):
-        qs = RecognizedItem.objects.select_related('photo', 'owner').filter(owner=self.request.user)
+        # 讀取目前庫存，而不是所有照片的辨識記錄
+        items = FridgeInventoryItem.objects.all()
+        # ?expiring=N 只列出 N 天內 (含已過期) 可能到期的物品，與首頁統計及到期提醒的條件相同
+        self.expiring_days = self.request.GET.get('expiring', '')
+        if self.expiring_days.isdigit():
+            items = ExpiryDateService.expiring_within(int(self.expiring_days))
+        qs = items.select_related('fridge_device', 'source_item').filter(owner=self.request.user)
         fridge_id = self.request.GET.get('fridge')
         if fridge_id:
-            qs = qs.filter(photo__fridge_device__id=fridge_id)
+            qs = qs.filter(fridge_device__id=fridge_id)
         return qs
 
+    def get_context_data(self, **kwargs):
+        # 以 (owner, placement_date, id) 或 (owner, expiry_min_date, id) 索引游標分頁
+        ordering = ('expiry_min_date', 'id') if self.expiring_days.isdigit() else ('placement_date', 'id')
+        page = paginate_keyset(self.request, self.object_list, ordering)
+        return super().get_context_data(object_list=page.object_list, page=page, **kwargs)
+
 @login_required
 def item_list(request):
     """
     物品列表視圖
     """
     items = RecognizedItem.objects.select_related('photo', 'owner').all()
+    page = paginate_keyset(request, items, ('-added_at', '-id'))
     return render(request, 'inventory/item_list.html', {
+        'items': page.object_list,
+        'page': page
+    })
+
+@login_required
+def fridge_contents(request, device_id):
+    """
+    冰箱目前內容視圖
+    """
+    device = get_object_or_404(FridgeDevice, id=device_id)
+    items = FridgeInventoryItem.objects.select_related('owner').filter(fridge_device=device)
+    return render(request, 'inventory/fridge_contents.html', {
+        'device': device,
         'items': items
     })
 
@@ -50,15 +80,17 @@ def item_add(request):
     添加物品視圖
     """
     if request.method == 'POST':
-        form = RecognizedItemForm(request.POST)
+        form = ManualItemForm(request.POST)
         if form.is_valid():
             item = form.save(commit=False)
             item.owner = request.user
             item.save()
+            # 手動新增的物品沒有來源照片，直接加入所選冰箱的目前庫存
+            InventoryReconciliationService.add_manual(item, form.cleaned_data['fridge_device'])
             messages.success(request, '物品已成功添加')
             return redirect('inventory:detail', item_id=item.id)
     else:
-        form = RecognizedItemForm()
+        form = ManualItemForm()
 
     return render(request, 'inventory/item_form.html', {
         'form': form,
@@ -70,12 +102,15 @@ def item_edit(request, item_id):
     """
     編輯物品視圖
     """
-    item = get_object_or_404(RecognizedItem, id=item_id)
+    item = get_object_or_404(RecognizedItem.objects.select_related('photo'), id=item_id)
 
     if request.method == 'POST':
+        previous_name = item.name
         form = RecognizedItemForm(request.POST, instance=item)
         if form.is_valid():
             form.save()
+            # 同步更新冰箱目前庫存中對應的物品
+            InventoryReconciliationService.sync_item(item, previous_name)
             messages.success(request, '物品已成功更新')
             return redirect('inventory:detail', item_id=item.id)
     else:
@@ -91,10 +126,11 @@ def item_delete(request, item_id):
     """
     刪除物品視圖
     """
-    item = get_object_or_404(RecognizedItem, id=item_id)
+    item = get_object_or_404(RecognizedItem.objects.select_related('photo'), id=item_id)
 
     if request.method == 'POST':
-        item.delete()
+        # 一併將對應的物品移出冰箱目前庫存
+        InventoryReconciliationService.remove_item(item)
         messages.success(request, '物品已成功刪除')
         return redirect('inventory:list')
 
@@ -9,4 +9,7 @@ class PhotoAdmin(admin.ModelAdmin):
     list_filter = ('recognition_status', 'uploaded_at', 'fridge_device')
     search_fields = ('fridge_device__name', 'uploaded_by__username')
     ordering = ('-uploaded_at',)
-    readonly_fields = ('uploaded_at', 'timestamp_esp')
+    readonly_fields = (
+        'uploaded_at', 'timestamp_esp', 'image_bytes', 'image_width', 'image_height', 'image_sha256',
+        'thumbnail_key', 'preview_key', 'thumbnail_bytes', 'perceptual_hash', 'duplicate_of', 'processing_metrics',
+    )
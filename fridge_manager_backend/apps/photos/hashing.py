@@ -0,0 +1,114 @@
+import hashlib
+import io
+import logging
+
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# dHash 以 9x8 的灰階縮圖比較相鄰像素，得到 64 位元的雜湊
+DHASH_SIZE = 8
+READ_CHUNK_SIZE = 64 * 1024
+# 入庫時寫入 Photo 的元數據欄位，與 image_metadata 返回的鍵相同
+METADATA_FIELDS = ('image_bytes', 'image_width', 'image_height', 'image_sha256', 'perceptual_hash')
+
+
+def _dhash_picture(picture: Image.Image) -> str:
+    # 只需要極小的縮圖，讓 JPEG 解碼器以 1/8 比例解碼
+    picture.draft('L', (DHASH_SIZE * 8, DHASH_SIZE * 8))
+    pixels = list(picture.convert('L').resize((DHASH_SIZE + 1, DHASH_SIZE), Image.Resampling.LANCZOS).getdata())
+    value = 0
+    for row in range(DHASH_SIZE):
+        for col in range(DHASH_SIZE):
+            offset = row * (DHASH_SIZE + 1) + col
+            value = (value << 1) | (pixels[offset] > pixels[offset + 1])
+    return f"{value:016x}"
+
+
+def _open(image) -> Image.Image:
+    if isinstance(image, bytes | bytearray):
+        return Image.open(io.BytesIO(image))
+    return Image.open(image)
+
+
+def dhash(image) -> str:
+    """
+    計算圖片的差異雜湊 (dHash)
+
+    冰箱內容沒有變化時，即使曝光或 JPEG 壓縮略有不同，雜湊也只會相差少數位元。
+
+    Args:
+        image: 圖片數據，可為 bytes 或檔案物件 (讀取後會定位回開頭)
+
+    Returns:
+        str: 16 位十六進位字串；無法解碼圖片時返回空字串
+    """
+    try:
+        return _dhash_picture(_open(image))
+    except Exception as e:
+        logger.warning(f"無法計算照片的感知雜湊: {str(e)}")
+        return ''
+    finally:
+        if not isinstance(image, bytes | bytearray):
+            image.seek(0)
+
+
+def image_metadata(image, image_sha256: str = '', image_bytes: int | None = None) -> dict:
+    """
+    計算入庫時保存在 Photo 上的圖片元數據 (大小、尺寸、SHA-256、dHash)
+
+    尺寸只讀取 JPEG 標頭，dHash 與尺寸共用同一次解碼。串流接收時已算出的
+    SHA-256 與位元組數可直接傳入，不再重新讀取整個檔案。
+
+    Args:
+        image: 圖片數據，可為 bytes 或檔案物件 (讀取後會定位回開頭)
+        image_sha256: 已計算的 SHA-256，空字串時由此函數計算
+        image_bytes: 已知的位元組數，None 時由此函數計算
+
+    Returns:
+        Dict: 鍵為 METADATA_FIELDS；無法解碼圖片時尺寸為 None、perceptual_hash 為空字串
+    """
+    if not image_sha256 or image_bytes is None:
+        if isinstance(image, bytes | bytearray):
+            digest = hashlib.sha256(image)
+            image_bytes = len(image)
+        else:
+            digest = hashlib.sha256()
+            image_bytes = 0
+            for chunk in iter(lambda: image.read(READ_CHUNK_SIZE), b''):
+                digest.update(chunk)
+                image_bytes += len(chunk)
+            image.seek(0)
+        image_sha256 = digest.hexdigest()
+
+    metadata = {
+        'image_bytes': image_bytes,
+        'image_width': None,
+        'image_height': None,
+        'image_sha256': image_sha256,
+        'perceptual_hash': '',
+    }
+    try:
+        picture = _open(image)
+        metadata['image_width'], metadata['image_height'] = picture.size
+        metadata['perceptual_hash'] = _dhash_picture(picture)
+    except Exception as e:
+        logger.warning(f"無法讀取照片的尺寸與感知雜湊: {str(e)}")
+    finally:
+        if not isinstance(image, bytes | bytearray):
+            image.seek(0)
+    return metadata
+
+
+def hamming_distance(first: str, second: str) -> int:
+    """
+    計算兩個 dHash 之間相異的位元數
+
+    Args:
+        first: dhash 返回的十六進位字串
+        second: dhash 返回的十六進位字串
+
+    Returns:
+        int: 相異位元數 (0 表示完全相同)
+    """
+    return (int(first, 16) ^ int(second, 16)).bit_count()
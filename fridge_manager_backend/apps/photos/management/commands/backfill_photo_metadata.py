@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.photos.services import PhotoMetadataService
+
+
+class Command(BaseCommand):
+    help = '為舊照片回填圖片大小、尺寸、SHA-256 與 dHash (並行從 S3 讀取)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=8, help='同時下載的照片數')
+        parser.add_argument('--batch-size', type=int, default=200, help='每批寫入資料庫的照片數')
+        parser.add_argument('--limit', type=int, default=None, help='最多處理的照片數')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        result = PhotoMetadataService.backfill(
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+        )
+        elapsed = time.perf_counter() - started
+        summary = f"回填 {result['updated']} 張，失敗 {result['failed']} 張，耗時 {elapsed:.1f} 秒"
+        self.stdout.write(self.style.WARNING(summary) if result['failed'] else self.style.SUCCESS(summary))
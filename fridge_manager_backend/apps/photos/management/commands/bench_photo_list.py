@@ -0,0 +1,93 @@
+import io
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils import timezone
+from PIL import Image, ImageDraw
+
+from apps.fridges.models import FridgeDevice
+from apps.photos.models import Photo
+from apps.photos.renditions import PhotoRenditionService
+
+# 模擬簽名網址的長度 (s3v4 簽名網址約 400 字元)，讓 HTML 大小接近實際頁面
+SIGNED_URL_QUERY = '?X-Amz-Algorithm=AWS4-HMAC-SHA256&X-Amz-Signature=' + '0' * 340
+UXGA = (1600, 1200)
+
+
+class Command(BaseCommand):
+    help = '比較照片列表頁使用原圖與 WebP 縮圖時的頁面重量與渲染時間'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--photos', type=int, default=500, help='列表中的照片數')
+        parser.add_argument('--image', help='作為樣本的相機 JPEG (預設產生 1600x1200 的模擬畫面)')
+        parser.add_argument('--bandwidth', type=float, default=20, help='估算下載時間用的頻寬 (Mbps)')
+        parser.add_argument('--repeat', type=int, default=5, help='每種模式渲染的次數')
+
+    def handle(self, *args, **options):
+        original = self._sample_image(options['image'])
+        rendered = PhotoRenditionService.render(original)
+        thumbnail, thumbnail_size = rendered['thumbnail_key']
+        self.stdout.write(
+            f"樣本原圖 {len(original)} bytes；縮圖 {thumbnail_size[0]}x{thumbnail_size[1]} {len(thumbnail)} bytes "
+            f"(長邊 {settings.PHOTO_THUMBNAIL_EDGE}px，品質 {settings.PHOTO_RENDITION_QUALITY})"
+        )
+
+        photos = self._build_photos(options['photos'])
+        self.stdout.write(f"{'mode':<10} {'render ms':>10} {'html KB':>9} {'images KB':>10} {'total KB':>9} {'load s':>7}")
+        for mode, image_bytes in (('original', len(original)), ('thumbnail', len(thumbnail))):
+            for photo in photos:
+                photo.image_url = f"https://bucket.s3.amazonaws.com/{photo.image.name}{SIGNED_URL_QUERY}"
+                photo.thumbnail_url = photo.image_url.replace('.jpg', '_thumb.webp') if mode == 'thumbnail' else ''
+
+            timings = []
+            for _ in range(options['repeat']):
+                started = time.perf_counter()
+                html = render_to_string('photos/photo_list.html', {'photos': photos})
+                timings.append((time.perf_counter() - started) * 1000)
+
+            html_bytes = len(html.encode())
+            images_bytes = image_bytes * len(photos)
+            total = html_bytes + images_bytes
+            load_seconds = total * 8 / (options['bandwidth'] * 1_000_000)
+            self.stdout.write(
+                f"{mode:<10} {statistics.median(timings):>10.1f} {html_bytes / 1024:>9.1f} "
+                f"{images_bytes / 1024:>10.1f} {total / 1024:>9.1f} {load_seconds:>7.1f}"
+            )
+
+    @staticmethod
+    def _sample_image(path: str | None) -> bytes:
+        if path:
+            with open(path, 'rb') as image_file:
+                return image_file.read()
+        # 模擬冰箱內部：漸層背景加上幾個色塊與雜訊，壓縮後的大小接近相機畫面
+        image = Image.linear_gradient('L').resize(UXGA).convert('RGB')
+        draw = ImageDraw.Draw(image)
+        for index in range(12):
+            left = 100 + (index % 4) * 360
+            top = 100 + (index // 4) * 340
+            draw.rectangle((left, top, left + 260, top + 240), fill=(40 * index % 255, 180, 90 + 10 * index))
+        noise = Image.effect_noise(UXGA, 24).convert('RGB')
+        image = Image.blend(image, noise, 0.15)
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=85)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _build_photos(count: int) -> list[Photo]:
+        # 不寫入資料庫，只建立模板需要的欄位
+        device = FridgeDevice(id=1, name='bench-fridge', device_id_esp='bench')
+        now = timezone.now()
+        return [
+            Photo(
+                id=index + 1,
+                fridge_device=device,
+                image=f"fridge_photos/bench/photo_{index}.jpg",
+                timestamp_esp=now,
+                uploaded_at=now,
+                recognition_status='completed',
+            )
+            for index in range(count)
+        ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='processing_metrics',
+            field=models.JSONField(blank=True, default=dict, help_text='辨識流程的效能數據 (前處理、LLM 耗時等)'),
+        ),
+    ]
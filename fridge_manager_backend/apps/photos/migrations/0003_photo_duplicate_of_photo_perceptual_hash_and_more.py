@@ -0,0 +1,31 @@
+# Generated by Django 5.2.1 on 2026-10-18 00:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fridges', '0005_fridgedevice_recognition_crop_box'),
+        ('photos', '0002_photo_processing_metrics'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='duplicate_of',
+            field=models.ForeignKey(blank=True, help_text='內容與此照片相同而沿用其辨識結果的來源照片', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='duplicates', to='photos.photo'),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='perceptual_hash',
+            field=models.CharField(blank=True, help_text='照片的 dHash，用於判斷冰箱內容是否改變', max_length=16),
+        ),
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(fields=['fridge_device', 'recognition_status', '-uploaded_at'], name='photo_device_status_idx'),
+        ),
+    ]
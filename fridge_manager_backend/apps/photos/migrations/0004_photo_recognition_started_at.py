@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0003_photo_duplicate_of_photo_perceptual_hash_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='recognition_started_at',
+            field=models.DateTimeField(blank=True, help_text='本次辨識工作取得照片的時間，用於條件更新與回收逾時未完成的工作', null=True),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0004_photo_recognition_started_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='image_bytes',
+            field=models.PositiveIntegerField(blank=True, help_text='圖片位元組數', null=True),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='image_height',
+            field=models.PositiveIntegerField(blank=True, help_text='圖片高度 (像素)', null=True),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='image_sha256',
+            field=models.CharField(blank=True, help_text='圖片內容的 SHA-256', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='image_width',
+            field=models.PositiveIntegerField(blank=True, help_text='圖片寬度 (像素)', null=True),
+        ),
+    ]
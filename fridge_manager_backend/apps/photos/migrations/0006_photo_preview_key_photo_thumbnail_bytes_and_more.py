@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('photos', '0005_photo_image_bytes_photo_image_height_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='photo',
+            name='preview_key',
+            field=models.CharField(blank=True, help_text='預覽圖的儲存鍵', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='thumbnail_bytes',
+            field=models.PositiveIntegerField(blank=True, help_text='縮圖位元組數', null=True),
+        ),
+        migrations.AddField(
+            model_name='photo',
+            name='thumbnail_key',
+            field=models.CharField(blank=True, help_text='縮圖的儲存鍵', max_length=255),
+        ),
+    ]
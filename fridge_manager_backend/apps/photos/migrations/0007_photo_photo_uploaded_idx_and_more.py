@@ -0,0 +1,28 @@
+# Generated by Django 5.2.1 on 2026-10-18 01:27
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fridges', '0006_fridgedevice_inventory_synced_at'),
+        ('photos', '0006_photo_preview_key_photo_thumbnail_bytes_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(fields=['-uploaded_at', '-id'], name='photo_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(fields=['fridge_device', '-uploaded_at'], name='photo_device_uploaded_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='photo',
+            index=models.Index(fields=['recognition_status', 'uploaded_at'], name='photo_status_uploaded_idx'),
+        ),
+    ]
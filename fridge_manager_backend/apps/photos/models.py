@@ -1,4 +1,5 @@
 import logging
+from functools import cached_property
 
 from django.conf import settings
 from django.db import models
@@ -6,6 +7,8 @@ from storages.backends.s3boto3 import S3Boto3Storage
 
 from apps.fridges.models import FridgeDevice
 
+from .presign import PresignedURLCache
+
 # 獲取 logger 實例
 logger = logging.getLogger(__name__)
 
@@ -34,6 +37,15 @@ class Photo(models.Model):
         ),
         help_text="照片文件"
     )
+    # 圖片元數據在入庫時計算一次並保存，頁面與流程不需為此向 S3 發出請求
+    image_bytes = models.PositiveIntegerField(null=True, blank=True, help_text="圖片位元組數")
+    image_width = models.PositiveIntegerField(null=True, blank=True, help_text="圖片寬度 (像素)")
+    image_height = models.PositiveIntegerField(null=True, blank=True, help_text="圖片高度 (像素)")
+    image_sha256 = models.CharField(max_length=64, blank=True, help_text="圖片內容的 SHA-256")
+    # 瀏覽用的 WebP 縮圖與預覽圖 (apps/photos/renditions.py)，與原圖存放在同一個 bucket
+    thumbnail_key = models.CharField(max_length=255, blank=True, help_text="縮圖的儲存鍵")
+    preview_key = models.CharField(max_length=255, blank=True, help_text="預覽圖的儲存鍵")
+    thumbnail_bytes = models.PositiveIntegerField(null=True, blank=True, help_text="縮圖位元組數")
     timestamp_esp = models.DateTimeField(help_text="ESP32-CAM 拍攝時間")
     content_type_esp = models.CharField(max_length=50, default='image/jpeg', help_text="照片 MIME 類型")
     uploaded_by = models.ForeignKey(
@@ -50,23 +62,68 @@ class Photo(models.Model):
         default='pending',
         help_text="LLM 辨識狀態"
     )
+    recognition_started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text="本次辨識工作取得照片的時間，用於條件更新與回收逾時未完成的工作"
+    )
     raw_llm_response = models.JSONField(null=True, blank=True, help_text="LLM 原始回覆")
+    perceptual_hash = models.CharField(max_length=16, blank=True, help_text="照片的 dHash，用於判斷冰箱內容是否改變")
+    duplicate_of = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='duplicates',
+        help_text="內容與此照片相同而沿用其辨識結果的來源照片"
+    )
+    processing_metrics = models.JSONField(default=dict, blank=True, help_text="辨識流程的效能數據 (前處理、LLM 耗時等)")
 
     class Meta:
         verbose_name = "冰箱照片"
         verbose_name_plural = "冰箱照片"
         ordering = ['-uploaded_at']
+        indexes = [
+            # 查詢同一冰箱最新的已辨識照片 (感知雜湊去重)
+            models.Index(fields=['fridge_device', 'recognition_status', '-uploaded_at'], name='photo_device_status_idx'),
+            # 照片列表的游標分頁 (全部 / 依冰箱篩選)
+            models.Index(fields=['-uploaded_at', '-id'], name='photo_uploaded_idx'),
+            models.Index(fields=['fridge_device', '-uploaded_at'], name='photo_device_uploaded_idx'),
+            # 非同步辨識工作者依上傳時間輪詢 pending 照片
+            models.Index(fields=['recognition_status', 'uploaded_at'], name='photo_status_uploaded_idx'),
+        ]
 
     def __str__(self):
         return f"照片 {self.id} - {self.fridge_device.name} ({self.uploaded_at})"
 
+    @cached_property
+    def image_url(self) -> str:
+        """經 PresignedURLCache 快取的簽名網址；列表頁請先以 PresignedURLCache.attach 批次取得"""
+        return PresignedURLCache.lookup([self]).get(self.id, '')
+
+    @cached_property
+    def thumbnail_url(self) -> str:
+        """縮圖的簽名網址，尚未產生縮圖時為空字串"""
+        return PresignedURLCache.lookup([self], 'thumbnail_key').get(self.id, '')
+
+    @cached_property
+    def preview_url(self) -> str:
+        """預覽圖的簽名網址，尚未產生時改用原圖"""
+        return PresignedURLCache.lookup([self], 'preview_key').get(self.id) or self.image_url
+
+    @property
+    def dimensions(self) -> tuple[int, int] | None:
+        """以保存的欄位返回 (寬, 高)，尚未回填時返回 None"""
+        if self.image_width is None or self.image_height is None:
+            return None
+        return self.image_width, self.image_height
+
     def save(self, *args, **kwargs):
+        # 只記錄已在記憶體中的欄位；image.size / image.url 會對 S3 發出 HEAD 請求與簽名
         try:
-            logger.info(f"開始保存照片記錄: device={self.fridge_device.name}, user={self.uploaded_by}")
+            logger.info(f"開始保存照片記錄: device_id={self.fridge_device_id}, user_id={self.uploaded_by_id}")
             if self.image:
-                logger.debug(f"照片文件信息: name={self.image.name}, size={self.image.size if hasattr(self.image, 'size') else 'unknown'}")
-                logger.debug(f"照片文件 URL: {self.image.url if hasattr(self.image, 'url') else 'unknown'}")
-                logger.debug(f"照片文件 storage: {self.image.storage.__class__.__name__}")
+                logger.debug(f"照片文件信息: name={self.image.name}")
             super().save(*args, **kwargs)
             logger.info(f"照片記錄保存成功: id={self.id}")
         except Exception as e:
@@ -0,0 +1,132 @@
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+
+from apps.inventory.stats import RecognitionStats
+
+logger = logging.getLogger(__name__)
+
+CACHE_ALIAS = 'photo_urls'
+KEY_PREFIX = 'photo-url:'
+HITS = 'photo_url:hits'
+MISSES = 'photo_url:misses'
+# 記錄儲存鍵的欄位與 attach 設定的網址屬性
+URL_ATTRIBUTES = {
+    'image': 'image_url',
+    'thumbnail_key': 'thumbnail_url',
+    'preview_key': 'preview_url',
+}
+
+
+class PresignedURLCache:
+    """
+    照片簽名網址快取
+
+    Photo.image 以 s3v4 簽名產生網址，每次產生都需要計算 HMAC。簽名網址以
+    儲存鍵為快取鍵，保存 PHOTO_URL_CACHE_TTL 秒 (短於簽名有效期 AWS_QUERYSTRING_EXPIRE)，
+    因此從快取取出的網址至少還有兩者差距的有效時間。列表頁以 attach 一次
+    get_many 取得整頁網址，命中與未命中次數累計在 RecognitionStats。
+    快取無法使用時直接簽名，不影響頁面。
+    """
+    @staticmethod
+    def _storage_key(photo, field: str) -> str:
+        # image 為 FieldFile，縮圖等欄位直接保存儲存鍵字串
+        value = getattr(photo, field)
+        return getattr(value, 'name', value) or ''
+
+    @staticmethod
+    def _sign(photo, name: str) -> str:
+        return photo.image.storage.url(name)
+
+    @staticmethod
+    def _record(hits: int, misses: int) -> None:
+        if hits:
+            RecognitionStats.incr(HITS, hits)
+        if misses:
+            RecognitionStats.incr(MISSES, misses)
+
+    @staticmethod
+    def lookup(photos, field: str = 'image') -> dict:
+        """
+        以一次批次查詢取得多張照片的簽名網址，未命中的照片簽名後寫回快取
+
+        Args:
+            photos: Photo 實例的可迭代物件
+            field: 記錄儲存鍵的欄位，見 URL_ATTRIBUTES
+
+        Returns:
+            Dict: 照片 ID 與簽名網址；該欄位沒有儲存鍵的照片不包含在內
+        """
+        return {
+            photo.id: url
+            for (photo, _), url in PresignedURLCache._lookup([(photo, field) for photo in photos]).items()
+        }
+
+    @staticmethod
+    def _lookup(entries: list[tuple]) -> dict:
+        # entries 為 (photo, field)；返回 (photo, field) 與網址，一次 get_many 涵蓋所有欄位
+        keys = {}
+        for photo, field in entries:
+            name = PresignedURLCache._storage_key(photo, field)
+            if name:
+                keys[f"{KEY_PREFIX}{name}"] = (photo, field, name)
+        if not keys:
+            return {}
+        try:
+            cache = caches[CACHE_ALIAS]
+            cached = cache.get_many(keys)
+        except Exception as e:
+            logger.warning(f"讀取照片網址快取失敗: {str(e)}")
+            cache, cached = None, {}
+
+        urls = {}
+        missing = {}
+        for key, (photo, field, name) in keys.items():
+            if key in cached:
+                urls[photo, field] = cached[key]
+            else:
+                urls[photo, field] = missing[key] = PresignedURLCache._sign(photo, name)
+
+        if missing and cache is not None:
+            try:
+                cache.set_many(missing, timeout=settings.PHOTO_URL_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"寫入照片網址快取失敗: {str(e)}")
+        PresignedURLCache._record(len(cached), len(missing))
+        return urls
+
+    @staticmethod
+    def attach(photos, fields: tuple[str, ...] = ('image',)) -> list:
+        """
+        為列表頁的照片批次取得簽名網址並設定在 Photo 的網址屬性 (例如 image_url、
+        thumbnail_url)，模板不再逐張簽名
+
+        Args:
+            photos: Photo 實例的可迭代物件 (例如一頁的查詢結果)
+            fields: 要取得網址的欄位，見 URL_ATTRIBUTES
+
+        Returns:
+            List[Photo]: 已設定網址屬性的照片
+        """
+        photos = list(photos)
+        urls = PresignedURLCache._lookup([(photo, field) for photo in photos for field in fields])
+        for photo in photos:
+            for field in fields:
+                setattr(photo, URL_ATTRIBUTES[field], urls.get((photo, field), ''))
+        return photos
+
+    @staticmethod
+    def stats() -> dict:
+        """
+        獲取跨行程累計的命中統計
+
+        Returns:
+            Dict: hits、misses 與 hit_rate (無請求時為 None)
+        """
+        counters = RecognitionStats.get_many([HITS, MISSES])
+        return {
+            'hits': counters[HITS],
+            'misses': counters[MISSES],
+            'hit_rate': RecognitionStats.rate(counters, (HITS,), (HITS, MISSES)),
+        }
@@ -0,0 +1,126 @@
+import io
+import logging
+import posixpath
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.files.base import ContentFile
+from PIL import Image
+
+from .models import Photo
+
+logger = logging.getLogger(__name__)
+
+# 各尺寸版本：(Photo 上記錄儲存鍵的欄位, 長邊上限設定, 檔名後綴)
+RENDITIONS = (
+    ('thumbnail_key', 'PHOTO_THUMBNAIL_EDGE', 'thumb'),
+    ('preview_key', 'PHOTO_PREVIEW_EDGE', 'preview'),
+)
+RENDITION_FORMAT = 'WEBP'
+RENDITION_CONTENT_TYPE = 'image/webp'
+# 列表頁補產生縮圖時，同一張照片在此期間內只送出一次任務
+PENDING_KEY_PREFIX = 'photo-rendition-pending:'
+PENDING_TIMEOUT = 10 * 60
+
+
+class PhotoRenditionService:
+    """
+    產生照片瀏覽用的 WebP 縮圖與預覽圖
+
+    列表頁使用縮圖 (長邊 PHOTO_THUMBNAIL_EDGE)，詳情頁使用預覽圖 (長邊
+    PHOTO_PREVIEW_EDGE)，都不再下載相機原圖。原圖只解碼一次：以 JPEG draft
+    模式直接縮小解碼成預覽圖，再由預覽圖縮成縮圖。
+    """
+    @staticmethod
+    def render(image_data: bytes) -> dict:
+        """
+        將原圖縮成各尺寸的 WebP
+
+        Args:
+            image_data: 原圖數據
+
+        Returns:
+            Dict: 以 RENDITIONS 的欄位為鍵，值為 (WebP 數據, (寬, 高))
+        """
+        edges = {field: getattr(settings, setting) for field, setting, _ in RENDITIONS}
+        with Image.open(io.BytesIO(image_data)) as original:
+            largest = max(edges.values())
+            original.draft('RGB', (largest, largest))
+            image = original.convert('RGB')
+
+        rendered = {}
+        # 由大到小縮放，每次都從上一個尺寸縮小
+        for field, edge in sorted(edges.items(), key=lambda item: item[1], reverse=True):
+            image.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format=RENDITION_FORMAT, quality=settings.PHOTO_RENDITION_QUALITY, method=4)
+            rendered[field] = (buffer.getvalue(), image.size)
+        return rendered
+
+    @staticmethod
+    def rendition_name(image_name: str, suffix: str) -> str:
+        """
+        由原圖的儲存鍵產生尺寸版本的儲存鍵
+
+        Args:
+            image_name: 原圖的儲存鍵，例如 "fridge_photos/2025/05/01/photo_x.jpg"
+            suffix: 檔名後綴，例如 "thumb"
+
+        Returns:
+            str: 例如 "fridge_photos/2025/05/01/renditions/photo_x_thumb.webp"
+        """
+        directory, filename = posixpath.split(image_name)
+        stem = posixpath.splitext(filename)[0]
+        return posixpath.join(directory, 'renditions', f"{stem}_{suffix}.webp")
+
+    @staticmethod
+    def generate(photo: Photo) -> dict:
+        """
+        下載原圖、產生並上傳各尺寸版本，儲存鍵以條件更新寫回 Photo
+
+        Args:
+            photo: Photo 實例
+
+        Returns:
+            Dict: 各欄位寫入的儲存鍵，以及縮圖位元組數 thumbnail_bytes
+        """
+        storage = photo.image.storage
+        with photo.image.open('rb') as image_file:
+            image_data = image_file.read()
+        rendered = PhotoRenditionService.render(image_data)
+
+        updates = {}
+        for field, _, suffix in RENDITIONS:
+            data, size = rendered[field]
+            name = PhotoRenditionService.rendition_name(photo.image.name, suffix)
+            content = ContentFile(data, name=posixpath.basename(name))
+            content.content_type = RENDITION_CONTENT_TYPE
+            updates[field] = storage.save(name, content, max_length=Photo._meta.get_field(field).max_length)
+            logger.debug(f"照片 {photo.id} 的 {suffix} 已上傳: {updates[field]} ({size[0]}x{size[1]}, {len(data)} bytes)")
+        updates['thumbnail_bytes'] = len(rendered['thumbnail_key'][0])
+
+        # 只寫入尺寸版本欄位，不覆蓋同時進行中的辨識狀態
+        Photo.objects.filter(id=photo.id).update(**updates)
+        for field, value in updates.items():
+            setattr(photo, field, value)
+        return updates
+
+    @staticmethod
+    def claim_missing(photos) -> list[int]:
+        """
+        從列表頁的照片中挑出缺少縮圖、且最近未送出產生任務的照片
+
+        Args:
+            photos: Photo 實例的可迭代物件
+
+        Returns:
+            List[int]: 需要送出產生任務的照片 ID
+        """
+        missing = [photo.id for photo in photos if not photo.thumbnail_key and photo.image]
+        if not missing:
+            return []
+        cache = caches['default']
+        return [
+            photo_id for photo_id in missing
+            if cache.add(f"{PENDING_KEY_PREFIX}{photo_id}", True, timeout=PENDING_TIMEOUT)
+        ]
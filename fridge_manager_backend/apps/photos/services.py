@@ -0,0 +1,408 @@
+import logging
+import statistics
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.core.services import PENDING_STATUSES, SummaryService
+from apps.fridges.models import FridgeDevice
+
+from .hashing import METADATA_FIELDS, image_metadata
+from .models import Photo
+from .tasks import dispatch_renditions
+from .timing import STAGE_ORDER, STAGES_KEY, stage_timer
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (50, 95, 99)
+# 階段耗時之外，報表一併統計的數值 (token 用量、圖片大小)
+EXTRA_METRICS = ('prompt_tokens', 'completion_tokens', 'original_bytes', 'sent_bytes')
+
+# 與資料庫寫入並行的 S3 上傳執行緒池 (每個行程一個)
+_upload_executor = ThreadPoolExecutor(
+    max_workers=settings.PHOTO_UPLOAD_WORKERS,
+    thread_name_prefix='photo-upload'
+)
+
+class PhotoIngestService:
+    @staticmethod
+    def build_filename(user) -> str:
+        """
+        產生上傳至 S3 的唯一檔名
+
+        Args:
+            user: 觸發拍照的用戶，可為 None (例如排程快照)
+
+        Returns:
+            str: 檔名，例如 user_1_20250101_120000_ab12cd34.jpg
+        """
+        timestamp = timezone.now().strftime('%Y%m%d_%H%M%S')
+        user_part = f"user_{user.id}" if user is not None else "system"
+        return f"{user_part}_{timestamp}_{uuid.uuid4().hex[:8]}.jpg"
+
+    @staticmethod
+    def _as_django_file(image, filename: str) -> File:
+        # 直接上傳記憶體中的數據或串流解碼得到的暫存檔，不經過額外的磁碟複製
+        if isinstance(image, bytes | bytearray):
+            return ContentFile(image, name=filename)
+        return File(image, name=filename)
+
+    @staticmethod
+    def upload_image(image, filename: str) -> str:
+        """
+        只將圖片上傳至 Photo.image 的儲存後端，不建立資料庫記錄
+
+        Args:
+            image: 圖片數據，可為 bytes 或已定位到開頭的檔案物件
+            filename: 檔名 (會依 upload_to 加上日期目錄)
+
+        Returns:
+            str: 儲存後端中的實際鍵值，可直接指定給 Photo.image
+        """
+        field = Photo._meta.get_field('image')
+        name = field.generate_filename(None, filename)
+        return field.storage.save(
+            name,
+            PhotoIngestService._as_django_file(image, filename),
+            max_length=field.max_length
+        )
+
+    @staticmethod
+    def build_photo(device: FridgeDevice, storage_key: str, photo_data: dict, user) -> Photo:
+        """
+        以已上傳的圖片建立未保存的 Photo 實例，供 bulk_create 使用
+
+        Args:
+            device: FridgeDevice 實例
+            storage_key: upload_image 返回的鍵值
+            photo_data: ESP32CamService.fetch_photo 返回的元數據 (可包含 hashing.METADATA_FIELDS
+                的圖片元數據與入庫各階段耗時 'stages')
+            user: 觸發拍照的用戶，可為 None
+
+        Returns:
+            Photo: 尚未寫入資料庫的 Photo 實例
+        """
+        return Photo(
+            fridge_device=device,
+            image=storage_key,
+            timestamp_esp=timezone.datetime.fromisoformat(photo_data['timestamp']),
+            content_type_esp=photo_data['content_type'],
+            uploaded_by=user,
+            uploaded_at=timezone.now(),
+            recognition_status='pending',
+            **{field: photo_data[field] for field in METADATA_FIELDS if field in photo_data},
+            processing_metrics={STAGES_KEY: dict(photo_data.get(STAGES_KEY, {}))}
+        )
+
+    @staticmethod
+    def _timed_upload(image, filename: str, photo_data: dict) -> str:
+        # 在上傳執行緒中計時，記錄的是上傳本身的耗時而非等待時間
+        with stage_timer(photo_data, 'upload'):
+            return PhotoIngestService.upload_image(image, filename)
+
+    @staticmethod
+    def ingest(device: FridgeDevice, photo_data: dict, user, operation_log_factory=None) -> Photo:
+        """
+        拍照後的共用入庫流程：將圖片直接串流上傳至 S3 並建立 Photo 記錄
+
+        圖片 (bytes 或串流解碼得到的 SpooledTemporaryFile) 不經過暫存檔，直接交給
+        儲存後端上傳 (大型影像依 AWS_S3_TRANSFER_CONFIG 分段上傳)。上傳在背景執行緒
+        進行，同時在呼叫端執行緒中執行 operation_log_factory 寫入操作記錄，兩者並行。
+
+        Args:
+            device: FridgeDevice 實例
+            photo_data: ESP32CamService.fetch_photo 返回的數據，'image' 會在上傳後關閉
+            user: 觸發拍照的用戶，可為 None
+            operation_log_factory: 可選，返回 FridgeOperationLog 的函數 (例如建立操作記錄)，
+                返回的記錄會關聯新照片並標記為 'captured'；上傳或建立照片失敗時標記為 'failed'
+
+        Returns:
+            Photo: 新建立的 Photo 實例 (狀態為 'pending')，
+            關聯的操作記錄可由 photo.operation_log 取得
+        """
+        filename = PhotoIngestService.build_filename(user)
+        operation_log = None
+
+        try:
+            with photo_data['image'] as image:
+                # 尺寸與縮圖解碼只需數毫秒，先在上傳前計算，避免兩個執行緒同時讀取同一個檔案
+                with stage_timer(photo_data, 'hash'):
+                    photo_data.update(
+                        image_metadata(image, photo_data.get('image_sha256', ''), photo_data.get('image_size'))
+                    )
+                # 上傳執行緒只存取 S3，資料庫寫入都留在呼叫端執行緒
+                upload = _upload_executor.submit(PhotoIngestService._timed_upload, image, filename, photo_data)
+                try:
+                    if operation_log_factory is not None:
+                        operation_log = operation_log_factory()
+                finally:
+                    # 即使寫入操作記錄失敗，也要等上傳結束後才能關閉圖片
+                    storage_key = upload.result()
+
+            try:
+                photo = PhotoIngestService.build_photo(device, storage_key, photo_data, user)
+                with transaction.atomic():
+                    photo.save()
+                    SummaryService.record_pending_photos([device.id])
+                logger.info(f"Photo 實例創建成功: id={photo.id}")
+            except Exception as e:
+                logger.error(f"創建 Photo 實例時發生錯誤: {str(e)}", exc_info=True)
+                raise
+        except Exception as e:
+            # 操作記錄已寫入但上傳或建立照片失敗時標記為失敗，避免停留在 'pending'
+            if operation_log is not None:
+                operation_log.capture_status = 'failed'
+                operation_log.capture_error = str(e)
+                operation_log.save(update_fields=['capture_status', 'capture_error'])
+            raise
+
+        dispatch_renditions(photo.id)
+
+        if operation_log is not None:
+            operation_log.photo_taken = photo
+            operation_log.capture_status = 'captured'
+            operation_log.save(update_fields=['photo_taken', 'capture_status'])
+
+        return photo
+
+
+class PhotoMetadataService:
+    """
+    為入庫時尚未記錄圖片元數據的舊照片回填 image_bytes / 尺寸 / SHA-256 / dHash
+
+    下載與計算在執行緒池中並行 (只存取 S3)，資料庫讀寫都留在呼叫端執行緒，
+    每批以一次 bulk_update 寫入。
+    """
+    @staticmethod
+    def describe_stored(photo: Photo) -> dict:
+        """
+        從 S3 讀入照片並計算元數據 (在工作執行緒中執行，不存取資料庫)
+
+        Args:
+            photo: Photo 實例 (只需要 image 欄位)
+
+        Returns:
+            Dict: hashing.image_metadata 的結果
+        """
+        with photo.image.open('rb') as image_file:
+            return image_metadata(image_file.read())
+
+    @staticmethod
+    def backfill(workers: int = 8, batch_size: int = 200, limit: int | None = None) -> dict:
+        """
+        回填缺少元數據 (image_sha256 為空) 的照片
+
+        Args:
+            workers: 同時下載的照片數
+            batch_size: 每批處理並寫入的照片數
+            limit: 最多處理的照片數，None 表示全部
+
+        Returns:
+            Dict: updated (已回填) 與 failed (讀取失敗) 的照片數
+        """
+        fields = [field for field in METADATA_FIELDS if field != 'perceptual_hash']
+        result = {'updated': 0, 'failed': 0}
+        last_id = 0
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='photo-metadata') as executor:
+            while limit is None or result['updated'] + result['failed'] < limit:
+                size = batch_size if limit is None else min(batch_size, limit - result['updated'] - result['failed'])
+                batch = list(
+                    Photo.objects
+                    .filter(image_sha256='', id__gt=last_id)
+                    .order_by('id')
+                    .only('id', 'image', 'perceptual_hash')[:size]
+                )
+                if not batch:
+                    break
+                last_id = batch[-1].id
+
+                futures = [(photo, executor.submit(PhotoMetadataService.describe_stored, photo)) for photo in batch]
+                updated = []
+                for photo, future in futures:
+                    try:
+                        metadata = future.result()
+                    except Exception as e:
+                        logger.warning(f"無法讀取照片 {photo.id} 以回填元數據: {str(e)}")
+                        result['failed'] += 1
+                        continue
+                    for field in fields:
+                        setattr(photo, field, metadata[field])
+                    # 保留既有的 dHash，避免改變去重比對的基準
+                    photo.perceptual_hash = photo.perceptual_hash or metadata['perceptual_hash']
+                    updated.append(photo)
+
+                Photo.objects.bulk_update(updated, [*fields, 'perceptual_hash'])
+                result['updated'] += len(updated)
+                logger.info(f"已回填 {result['updated']} 張照片的元數據 (失敗 {result['failed']} 張)")
+        return result
+
+
+class PhotoStatusService:
+    """
+    以條件式 UPDATE 切換照片的辨識狀態
+
+    每次切換都是單一的 `UPDATE ... WHERE id = ? AND recognition_status = <預期狀態>`，
+    只寫入指定欄位，不呼叫 Photo.save()，也不存取 S3。取得照片時寫入的
+    recognition_started_at 作為本次工作的憑證：逾時被回收後，原工作者的後續
+    切換會因憑證不符而失敗，不會覆蓋新工作者的結果。
+
+    允許的切換：
+        pending → processing (claim)
+        processing (逾時) → processing (claim 回收)
+        processing → completed / failed (transition)
+    """
+    TRANSITIONS = {
+        'pending': ('processing',),
+        'processing': ('processing', 'completed', 'failed'),
+    }
+
+    @staticmethod
+    def claim(photo_id: int) -> Photo | None:
+        """
+        取得照片的辨識工作 (pending → processing)
+
+        已處理中超過 RECOGNITION_STALE_SECONDS 的照片視為工作者已中斷 (例如
+        Celery 重新投遞未確認的任務)，可被重新取得，前一個工作者已建立的物品會一併刪除。
+
+        Args:
+            photo_id: Photo 實例的 ID
+
+        Returns:
+            Photo | None: 已標記為處理中的 Photo 實例；照片已完成、失敗或正由
+            其他工作者處理時返回 None
+
+        Raises:
+            Photo.DoesNotExist: 當照片不存在時拋出
+        """
+        now = timezone.now()
+        stale_before = now - timedelta(seconds=settings.RECOGNITION_STALE_SECONDS)
+        with transaction.atomic():
+            claimed = Photo.objects.filter(id=photo_id, recognition_status='pending').update(
+                recognition_status='processing', recognition_started_at=now
+            )
+            reclaimed = not claimed and (
+                Photo.objects
+                .filter(id=photo_id, recognition_status='processing')
+                .filter(Q(recognition_started_at__lt=stale_before) | Q(recognition_started_at__isnull=True))
+                .update(recognition_started_at=now)
+            )
+            photo = Photo.objects.select_related('fridge_device', 'uploaded_by').get(id=photo_id)
+            if not (claimed or reclaimed) or photo.recognition_started_at != now:
+                logger.info(f"照片 {photo_id} 目前為 '{photo.recognition_status}'，略過重複的辨識工作")
+                return None
+            if reclaimed:
+                # 前一個工作者已串流建立的物品與新憑證在同一個交易中刪除，重新辨識後不會重複
+                deleted, _ = photo.recognized_items.all().delete()
+                logger.info(f"照片 {photo_id} 的辨識工作逾時，重新取得並刪除 {deleted} 個未完成的物品")
+        return photo
+
+    @staticmethod
+    def transition(photo: Photo, target: str, update_fields: tuple[str, ...] = ()) -> bool:
+        """
+        將 claim 取得的照片切換至 target 狀態，並一併寫入指定欄位
+
+        Args:
+            photo: claim 返回的 Photo 實例
+            target: 目標狀態
+            update_fields: 一併寫入的欄位 (例如 'processing_metrics')
+
+        Returns:
+            bool: 切換成功時返回 True；照片已不在預期狀態或已被其他工作者回收時返回 False
+
+        Raises:
+            ValueError: 當切換不在 TRANSITIONS 中時拋出
+        """
+        expected = photo.recognition_status
+        if target not in PhotoStatusService.TRANSITIONS.get(expected, ()):
+            raise ValueError(f"不允許的照片狀態切換: {expected} → {target}")
+
+        values = {field: getattr(photo, field) for field in update_fields}
+        with transaction.atomic():
+            updated = Photo.objects.filter(
+                id=photo.id,
+                recognition_status=expected,
+                recognition_started_at=photo.recognition_started_at,
+            ).update(recognition_status=target, **values)
+            if updated and target not in PENDING_STATUSES:
+                SummaryService.record_pending_photos([photo.fridge_device_id], -1)
+        if not updated:
+            logger.warning(f"照片 {photo.id} 已不是本工作持有的 '{expected}' 狀態，放棄切換至 '{target}'")
+            return False
+        photo.recognition_status = target
+        return True
+
+
+class PhotoTimingReportService:
+    @staticmethod
+    def percentiles(values: list[float]) -> dict:
+        """
+        計算 p50 / p95 / p99
+
+        Args:
+            values: 數值列表
+
+        Returns:
+            Dict: {'count', 'p50', 'p95', 'p99'}，只有一個數值時各百分位數皆為該值
+        """
+        result = {'count': len(values)}
+        if len(values) == 1:
+            result.update({f"p{p}": values[0] for p in PERCENTILES})
+            return result
+        cuts = statistics.quantiles(values, n=100, method='inclusive')
+        result.update({f"p{p}": round(cuts[p - 1], 1) for p in PERCENTILES})
+        return result
+
+    @staticmethod
+    def _rows(samples: dict) -> list[dict]:
+        names = [name for name in (*STAGE_ORDER, *EXTRA_METRICS) if samples.get(name)]
+        return [{'name': name, **PhotoTimingReportService.percentiles(samples[name])} for name in names]
+
+    @staticmethod
+    def build(days: int = 7, device_id: int | None = None) -> dict:
+        """
+        統計最近幾天照片的各階段耗時、token 用量與圖片大小
+
+        Args:
+            days: 統計最近幾天上傳的照片
+            device_id: 只統計指定 FridgeDevice ID 的照片
+
+        Returns:
+            Dict: {'photos': 照片數, 'overall': [各階段列], 'devices': [{'name', 'photos', 'rows'}]}，
+            每列包含 name、count、p50、p95、p99
+        """
+        photos = Photo.objects.filter(uploaded_at__gte=timezone.now() - timedelta(days=days))
+        if device_id is not None:
+            photos = photos.filter(fridge_device_id=device_id)
+
+        overall = defaultdict(list)
+        per_device = defaultdict(lambda: defaultdict(list))
+        device_photos = defaultdict(int)
+        total = 0
+        for device_name, raw_metrics in photos.values_list('fridge_device__name', 'processing_metrics').iterator():
+            metrics = raw_metrics or {}
+            values = dict(metrics.get(STAGES_KEY, {}))
+            values.update(metrics.get('usage', {}))
+            values.update({key: metrics[key] for key in ('original_bytes', 'sent_bytes') if key in metrics})
+            total += 1
+            device_photos[device_name] += 1
+            for name, value in values.items():
+                if isinstance(value, int | float):
+                    overall[name].append(value)
+                    per_device[device_name][name].append(value)
+
+        return {
+            'photos': total,
+            'overall': PhotoTimingReportService._rows(overall),
+            'devices': [
+                {'name': name, 'photos': device_photos[name], 'rows': PhotoTimingReportService._rows(samples)}
+                for name, samples in sorted(per_device.items())
+            ],
+        }
@@ -0,0 +1,42 @@
+import logging
+
+from celery import group, shared_task
+from django.conf import settings
+
+from .models import Photo
+from .renditions import PhotoRenditionService
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generate_photo_renditions(photo_id: int) -> None:
+    """
+    產生照片縮圖與預覽圖的 Celery 任務 (已產生過時直接結束)
+
+    Args:
+        photo_id: Photo 實例的 ID
+    """
+    try:
+        photo = Photo.objects.only('id', 'image', 'thumbnail_key', 'preview_key').get(id=photo_id)
+    except Photo.DoesNotExist:
+        logger.error(f"照片 ID {photo_id} 不存在")
+        return
+    if photo.thumbnail_key and photo.preview_key:
+        return
+    PhotoRenditionService.generate(photo)
+
+
+def dispatch_renditions(*photo_ids: int) -> None:
+    """
+    為新照片或缺少縮圖的舊照片送出 generate_photo_renditions 任務
+
+    Args:
+        photo_ids: 要產生縮圖的 Photo ID
+    """
+    if not photo_ids or not settings.PHOTO_RENDITIONS_ENABLED:
+        return
+    if len(photo_ids) == 1:
+        generate_photo_renditions.delay(photo_ids[0])
+    else:
+        group([generate_photo_renditions.s(photo_id) for photo_id in photo_ids]).apply_async()
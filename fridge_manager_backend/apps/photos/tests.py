@@ -1,2 +1,137 @@
+import io
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from apps.fridges.models import FridgeDevice, FridgeOperationLog
+from apps.inventory.models import RecognizedItem
+
+from .models import Photo
+from .presign import PresignedURLCache
+from .services import PhotoIngestService, PhotoStatusService
+
+
+class PhotoStatusServiceTests(TestCase):
+    def setUp(self):
+        self.device = FridgeDevice.objects.create(name="測試冰箱", device_id_esp='fridge-1')
+
+    def create_photo(self, status='pending') -> Photo:
+        return Photo.objects.create(
+            fridge_device=self.device, image='fridge_photos/test.jpg', timestamp_esp=timezone.now(),
+            recognition_status=status,
+        )
+
+    def test_photo_is_claimed_once(self):
+        photo = self.create_photo()
+
+        claimed = PhotoStatusService.claim(photo.id)
+
+        self.assertEqual(claimed.recognition_status, 'processing')
+        self.assertIsNotNone(claimed.recognition_started_at)
+        self.assertIsNone(PhotoStatusService.claim(photo.id))
+
+    def test_finished_photos_are_not_claimed(self):
+        for status in ('completed', 'failed'):
+            with self.subTest(status=status):
+                self.assertIsNone(PhotoStatusService.claim(self.create_photo(status).id))
+
+    def test_transition_writes_status_and_fields(self):
+        photo = PhotoStatusService.claim(self.create_photo().id)
+        photo.processing_metrics = {'parse': 'strict'}
+
+        self.assertTrue(PhotoStatusService.transition(photo, 'completed', ('processing_metrics',)))
+
+        photo.refresh_from_db()
+        self.assertEqual(photo.recognition_status, 'completed')
+        self.assertEqual(photo.processing_metrics, {'parse': 'strict'})
+
+    def test_disallowed_transition_is_rejected(self):
+        photo = self.create_photo()
+        with self.assertRaises(ValueError):
+            PhotoStatusService.transition(photo, 'completed')
+
+    @override_settings(RECOGNITION_STALE_SECONDS=60)
+    def test_stale_job_is_reclaimed_and_old_worker_loses(self):
+        first = PhotoStatusService.claim(self.create_photo().id)
+        Photo.objects.filter(pk=first.pk).update(recognition_started_at=timezone.now() - timedelta(minutes=5))
+        first.refresh_from_db()
+        # 中斷的工作者已串流建立的物品
+        RecognizedItem.objects.create(
+            photo=first, name='牛奶', quantity='1 瓶', estimated_expiry_info='約3天', placement_date=timezone.localdate()
+        )
+
+        second = PhotoStatusService.claim(first.id)
+
+        self.assertIsNotNone(second)
+        self.assertFalse(RecognizedItem.objects.filter(photo=first).exists())
+        self.assertFalse(PhotoStatusService.transition(first, 'failed'))
+        self.assertTrue(PhotoStatusService.transition(second, 'completed'))
+        self.assertEqual(Photo.objects.get(pk=first.pk).recognition_status, 'completed')
+
+
+@mock.patch('apps.photos.services.dispatch_renditions')
+class PhotoIngestServiceTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='alice')
+        self.device = FridgeDevice.objects.create(name="測試冰箱", device_id_esp='fridge-1')
+        self.storage = Photo._meta.get_field('image').storage
+
+    def photo_data(self) -> dict:
+        image = io.BytesIO()
+        Image.new('RGB', (64, 48), (200, 200, 200)).save(image, 'JPEG')
+        image.seek(0)
+        return {'image': image, 'timestamp': timezone.now().isoformat(), 'content_type': 'image/jpeg'}
+
+    def create_log(self) -> FridgeOperationLog:
+        return FridgeOperationLog.objects.create(user=self.user, fridge_device=self.device, operation_type='put_in')
+
+    def test_ingest_links_operation_log(self, dispatch_renditions):
+        with mock.patch.object(self.storage, 'save', side_effect=lambda name, content, max_length=None: name):
+            photo = PhotoIngestService.ingest(self.device, self.photo_data(), self.user, self.create_log)
+
+        self.assertEqual(photo.recognition_status, 'pending')
+        self.assertEqual((photo.image_width, photo.image_height), (64, 48))
+        self.assertEqual(photo.operation_log.capture_status, 'captured')
+        dispatch_renditions.assert_called_once_with(photo.id)
+
+    def test_failed_upload_marks_operation_log_failed(self, dispatch_renditions):
+        with (
+            mock.patch.object(self.storage, 'save', side_effect=OSError("S3 無法連線")),
+            self.assertRaises(OSError),
+        ):
+            PhotoIngestService.ingest(self.device, self.photo_data(), self.user, self.create_log)
+
+        operation_log = FridgeOperationLog.objects.get()
+        self.assertEqual(operation_log.capture_status, 'failed')
+        self.assertEqual(operation_log.capture_error, "S3 無法連線")
+        self.assertFalse(Photo.objects.exists())
+        dispatch_renditions.assert_not_called()
+
+
+@mock.patch('apps.photos.views.dispatch_renditions')
+class PhotoListViewTests(TestCase):
+    def setUp(self):
+        caches['photo_urls'].clear()
+        self.client.force_login(get_user_model().objects.create_user(username='alice'))
+        device = FridgeDevice.objects.create(name="測試冰箱", device_id_esp='fridge-1')
+        for name, thumbnail_key in (('a', 'thumbnails/a.webp'), ('b', '')):
+            Photo.objects.create(
+                fridge_device=device, image=f'fridge_photos/{name}.jpg', thumbnail_key=thumbnail_key,
+                timestamp_esp=timezone.now(),
+            )
+
+    def test_original_is_signed_only_without_thumbnail(self, dispatch_renditions):
+        with mock.patch.object(PresignedURLCache, '_sign', side_effect=lambda photo, name: f'https://s3/{name}') as sign:
+            response = self.client.get(reverse('photos:list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(call.args[1] for call in sign.call_args_list), ['fridge_photos/b.jpg', 'thumbnails/a.webp'])
+        self.assertContains(response, 'https://s3/thumbnails/a.webp')
+        self.assertContains(response, 'https://s3/fridge_photos/b.jpg')
+        dispatch_renditions.assert_called_once()
@@ -0,0 +1,54 @@
+import time
+from contextlib import contextmanager
+
+STAGES_KEY = 'stages'
+
+# 報表中各階段的顯示順序 (拍照入庫 → 辨識)
+STAGE_ORDER = (
+    'capture', 'hash', 'upload',
+    'download', 'preprocess', 'diff', 'cache_lookup', 'encode',
+    'llm_ttft', 'llm_ttfi', 'llm_total', 'parse', 'save_items', 'reconcile', 'recognition_total',
+)
+
+
+def elapsed_ms(started: float) -> float:
+    """
+    計算從 started (time.perf_counter()) 到現在的毫秒數
+
+    Args:
+        started: 開始時的 time.perf_counter()
+
+    Returns:
+        float: 毫秒數 (小數點後一位)
+    """
+    return round((time.perf_counter() - started) * 1000, 1)
+
+
+def record_stage(metrics: dict, stage: str, ms: float, accumulate: bool = False) -> None:
+    """
+    將階段耗時寫入 processing_metrics['stages']
+
+    Args:
+        metrics: Photo.processing_metrics 或入庫前的 photo_data
+        stage: 階段名稱，見 STAGE_ORDER
+        ms: 耗時 (毫秒)
+        accumulate: 為 True 時與既有數值相加 (例如逐一建立物品)
+    """
+    stages = metrics.setdefault(STAGES_KEY, {})
+    stages[stage] = round(stages.get(stage, 0) + ms, 1) if accumulate else ms
+
+
+@contextmanager
+def stage_timer(metrics: dict, stage: str, accumulate: bool = False):
+    """
+    計時區塊並以 record_stage 記錄，區塊拋出例外時同樣記錄
+
+    用法：
+        with stage_timer(photo.processing_metrics, 'download'):
+            image_data = RecognitionJobService.read_image(photo)
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(metrics, stage, elapsed_ms(started), accumulate)
@@ -7,4 +7,5 @@ app_name = 'photos'
 urlpatterns = [
     path('', views.photo_list, name='list'),
     path('<int:photo_id>/', views.photo_detail, name='detail'),
+    path('timings/', views.timing_report, name='timing_report'),
 ]
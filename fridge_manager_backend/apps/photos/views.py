@@ -1,7 +1,21 @@
+import logging
+
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404, render
 
+from apps.core.pagination import paginate_keyset
+from apps.fridges.models import FridgeDevice
+
 from .models import Photo
+from .presign import PresignedURLCache
+from .renditions import PhotoRenditionService
+from .services import PhotoTimingReportService
+from .tasks import dispatch_renditions
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REPORT_DAYS = 7
 
 
 @login_required
@@ -10,8 +24,21 @@ def photo_list(request):
     照片列表視圖
     """
     photos = Photo.objects.select_related('fridge_device', 'uploaded_by').all()
+    fridge_id = request.GET.get('fridge')
+    if fridge_id and fridge_id.isdigit():
+        photos = photos.filter(fridge_device_id=fridge_id)
+    page = paginate_keyset(request, photos, ('-uploaded_at', '-id'))
+
+    # 一次批次取得本頁的縮圖網址；缺少縮圖的舊照片暫時顯示原圖 (只為這些照片簽名原圖)，並在背景補產生
+    photos = PresignedURLCache.attach(page.object_list, ('thumbnail_key',))
+    PresignedURLCache.attach([photo for photo in photos if not photo.thumbnail_key], ('image',))
+    try:
+        dispatch_renditions(*PhotoRenditionService.claim_missing(photos))
+    except Exception as e:
+        logger.warning(f"送出補產生縮圖任務失敗: {str(e)}")
     return render(request, 'photos/photo_list.html', {
-        'photos': photos
+        'photos': photos,
+        'page': page
     })
 
 @login_required
@@ -28,3 +55,23 @@ def photo_detail(request, photo_id):
         'photo': photo,
         'items': items
     })
+
+@staff_member_required
+def timing_report(request):
+    """
+    照片處理各階段耗時報表 (p50/p95/p99，整體與各冰箱)
+    """
+    try:
+        days = max(int(request.GET.get('days', DEFAULT_REPORT_DAYS)), 1)
+    except ValueError:
+        days = DEFAULT_REPORT_DAYS
+    device_id = request.GET.get('device')
+    device_id = int(device_id) if device_id and device_id.isdigit() else None
+
+    return render(request, 'photos/timing_report.html', {
+        'report': PhotoTimingReportService.build(days, device_id),
+        'url_cache': PresignedURLCache.stats(),
+        'days': days,
+        'device_id': device_id,
+        'devices': FridgeDevice.objects.order_by('name'),
+    })
@@ -10,9 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import json
 import os
 from pathlib import Path
 
+from boto3.s3.transfer import TransferConfig
 from django.contrib.messages import constants as messages
 from dotenv import load_dotenv
 
@@ -151,6 +153,9 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# 物品與照片列表以游標分頁 (apps/core/pagination.py) 的每頁筆數
+LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', '30'))
+
 # AWS S3 settings
 AWS_ACCESS_KEY_ID = os.getenv('AWS_ACCESS_KEY_ID')
 AWS_SECRET_ACCESS_KEY = os.getenv('AWS_SECRET_ACCESS_KEY')
@@ -164,8 +169,30 @@ AWS_S3_OBJECT_PARAMETERS = {
 }
 AWS_S3_SIGNATURE_VERSION = 's3v4'
 AWS_QUERYSTRING_AUTH = True
+AWS_QUERYSTRING_EXPIRE = int(os.getenv('AWS_QUERYSTRING_EXPIRE', '3600'))  # 照片簽名網址有效期 (秒)
+# 簽名網址快取的保存時間須短於簽名有效期，從快取取出的網址至少還有兩者差距的有效時間
+PHOTO_URL_CACHE_TTL = min(
+    int(os.getenv('PHOTO_URL_CACHE_TTL', '3000')),
+    AWS_QUERYSTRING_EXPIRE - 60,
+)
 AWS_S3_VERIFY = True
 
+# 照片直接從記憶體/暫存檔串流上傳；超過門檻的大型影像 (例如 UXGA 高畫質) 改用分段上傳。
+# S3 分段大小下限為 5MB，一般 ESP32-CAM 畫面仍以單次 PUT 上傳
+AWS_S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=int(os.getenv('PHOTO_MULTIPART_THRESHOLD', str(8 * 1024 * 1024))),
+    multipart_chunksize=int(os.getenv('PHOTO_MULTIPART_CHUNKSIZE', str(8 * 1024 * 1024))),
+    max_concurrency=int(os.getenv('PHOTO_MULTIPART_CONCURRENCY', '4')),
+)
+# 與 FridgeOperationLog 寫入並行執行上傳的執行緒數
+PHOTO_UPLOAD_WORKERS = int(os.getenv('PHOTO_UPLOAD_WORKERS', '4'))
+
+# 入庫後以 Celery 任務產生瀏覽用的 WebP 縮圖與預覽圖 (apps/photos/renditions.py)
+PHOTO_RENDITIONS_ENABLED = os.getenv('PHOTO_RENDITIONS_ENABLED', 'True') == 'True'
+PHOTO_THUMBNAIL_EDGE = int(os.getenv('PHOTO_THUMBNAIL_EDGE', '400'))  # 列表頁縮圖長邊 (像素)
+PHOTO_PREVIEW_EDGE = int(os.getenv('PHOTO_PREVIEW_EDGE', '1280'))  # 詳情頁預覽圖長邊 (像素)
+PHOTO_RENDITION_QUALITY = int(os.getenv('PHOTO_RENDITION_QUALITY', '75'))
+
 # Use S3 for file storage
 DEFAULT_FILE_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
 STATICFILES_STORAGE = 'storages.backends.s3boto3.S3StaticStorage'
@@ -180,9 +207,137 @@ CELERY_TIMEZONE = TIME_ZONE
 CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60
 
+# 到期提醒 (apps/inventory/notifiers.py)，由 Celery beat 定時執行 notify_expiring_items
+EXPIRY_NOTIFY_INTERVAL = int(os.getenv('EXPIRY_NOTIFY_INTERVAL', '3600'))  # 秒，每天提醒一次可設為 86400
+EXPIRY_NOTIFY_DAYS = int(os.getenv('EXPIRY_NOTIFY_DAYS', '2'))  # 提前幾天提醒 (已過期的物品一併提醒)
+EXPIRY_NOTIFY_BATCH_SIZE = int(os.getenv('EXPIRY_NOTIFY_BATCH_SIZE', '200'))  # 每批處理的用戶數
+EXPIRY_NOTIFY_TIME_BUDGET = float(os.getenv('EXPIRY_NOTIFY_TIME_BUDGET', '60'))  # 秒，未處理完的用戶留待下次
+# 以逗號分隔的發送方式：console、email、webhook
+EXPIRY_NOTIFIERS = [name.strip() for name in os.getenv('EXPIRY_NOTIFIERS', 'console').split(',') if name.strip()]
+EXPIRY_WEBHOOK_URL = os.getenv('EXPIRY_WEBHOOK_URL', '')
+EXPIRY_WEBHOOK_TIMEOUT = float(os.getenv('EXPIRY_WEBHOOK_TIMEOUT', '10'))  # 秒
+
+CELERY_BEAT_SCHEDULE = {
+    'notify-expiring-items': {
+        'task': 'apps.inventory.tasks.notify_expiring_items',
+        'schedule': EXPIRY_NOTIFY_INTERVAL,
+        # 排程積壓時捨棄過時的執行，避免連續重複執行
+        'options': {'expires': EXPIRY_NOTIFY_INTERVAL},
+    },
+}
+
+# Email settings (到期提醒)；開發環境預設輸出到控制台
+EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'localhost')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', '25'))
+EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
+EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'False') == 'True'
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', 'fridge@localhost')
+
+# Fridge capture settings
+# True: UserOpenFridgeView 只寫入操作記錄並立即返回 202，拍照與上傳交由 Celery 任務處理
+FRIDGE_CAPTURE_ASYNC = os.getenv('FRIDGE_CAPTURE_ASYNC', 'True') == 'True'
+
+# ESP32-CAM HTTP client settings
+ESP32_CONNECT_TIMEOUT = float(os.getenv('ESP32_CONNECT_TIMEOUT', '3'))
+ESP32_READ_TIMEOUT = float(os.getenv('ESP32_READ_TIMEOUT', '10'))
+ESP32_MAX_RETRIES = int(os.getenv('ESP32_MAX_RETRIES', '2'))
+ESP32_RETRY_BACKOFF = float(os.getenv('ESP32_RETRY_BACKOFF', '0.5'))  # 秒，指數退避的基數
+ESP32_POOL_MAXSIZE = int(os.getenv('ESP32_POOL_MAXSIZE', '4'))  # 每台設備保留的 keep-alive 連線數
+ESP32_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('ESP32_CIRCUIT_FAILURE_THRESHOLD', '3'))
+ESP32_CIRCUIT_RESET_TIMEOUT = float(os.getenv('ESP32_CIRCUIT_RESET_TIMEOUT', '30'))  # 秒
+# 設備連線計數器存放的 Redis，Celery worker 與網頁進程共用 (apps/fridges/stats.py)
+DEVICE_STATS_CACHE_URL = os.getenv('DEVICE_STATS_CACHE_URL', 'redis://localhost:6379/2')
+ESP32_STREAM_CHUNK_SIZE = int(os.getenv('ESP32_STREAM_CHUNK_SIZE', str(16 * 1024)))
+ESP32_SPOOL_MAX_BYTES = int(os.getenv('ESP32_SPOOL_MAX_BYTES', str(2 * 1024 * 1024)))  # 超過後改寫入暫存檔
+
+# 所有啟用中冰箱的並行快照 (manage.py snapshot_fridges / snapshot_active_fridges 任務)
+FRIDGE_SNAPSHOT_MAX_WORKERS = int(os.getenv('FRIDGE_SNAPSHOT_MAX_WORKERS', '8'))  # 並行快照的設備數上限
+
 # LM Studio settings
 LMSTUDIO_API_URL = os.getenv('LMSTUDIO_API_URL', 'http://localhost:1234/v1')
 LMSTUDIO_MODEL_NAME = os.getenv('LMSTUDIO_MODEL_NAME', 'your-vision-model-id')
+LMSTUDIO_TIMEOUT = float(os.getenv('LMSTUDIO_TIMEOUT', '300'))  # 秒，CPU 推論可能很慢
+LMSTUDIO_MAX_CONNECTIONS = int(os.getenv('LMSTUDIO_MAX_CONNECTIONS', '4'))  # 每個行程的連線池大小
+LMSTUDIO_KEEPALIVE_EXPIRY = float(os.getenv('LMSTUDIO_KEEPALIVE_EXPIRY', '120'))  # 秒，閒置連線保留時間
+# 多台 LM Studio 時以 JSON 列出，例如 [{"url": "http://10.0.0.2:1234/v1", "model": "internvl3-8b", "weight": 2}]；
+# 未設定時只使用 LMSTUDIO_API_URL / LMSTUDIO_MODEL_NAME
+LMSTUDIO_BACKENDS = json.loads(os.getenv('LMSTUDIO_BACKENDS', '[]'))
+LMSTUDIO_HEALTH_INTERVAL = float(os.getenv('LMSTUDIO_HEALTH_INTERVAL', '15'))  # 秒，0 表示停用背景健康檢查
+LMSTUDIO_HEALTH_TIMEOUT = float(os.getenv('LMSTUDIO_HEALTH_TIMEOUT', '5'))  # 秒
+LMSTUDIO_EJECT_FAILURES = int(os.getenv('LMSTUDIO_EJECT_FAILURES', '3'))  # 連續失敗幾次後暫時移出後端
+
+# 以串流方式請求 LLM，每解析出一個物品就立即建立 RecognizedItem
+LLM_STREAMING = os.getenv('LLM_STREAMING', 'True') == 'True'
+
+# 以 response_format=json_schema 要求結構化輸出；後端拒絕時自動改用一般輸出並容錯解析
+LLM_STRUCTURED_OUTPUT = os.getenv('LLM_STRUCTURED_OUTPUT', 'True') == 'True'
+
+# 辨識工作的執行方式：'celery' 為每張照片送出 process_fridge_image 任務；
+# 'async' 由 manage.py recognition_worker 以非同步執行器輪詢 pending 照片
+RECOGNITION_EXECUTOR = os.getenv('RECOGNITION_EXECUTOR', 'celery')
+LLM_ASYNC_CONCURRENCY = int(os.getenv('LLM_ASYNC_CONCURRENCY', '4'))  # 每個後端同時進行的請求數
+LLM_ASYNC_QUEUE_SIZE = int(os.getenv('LLM_ASYNC_QUEUE_SIZE', '32'))  # 待辨識佇列容量，滿了即停止取出新照片
+RECOGNITION_WORKER_POLL_INTERVAL = float(os.getenv('RECOGNITION_WORKER_POLL_INTERVAL', '2'))  # 秒
+# 處理中超過此秒數的照片視為工作者已中斷，可被重新取得 (預設比 CELERY_TASK_TIME_LIMIT 多 5 分鐘)
+RECOGNITION_STALE_SECONDS = int(os.getenv('RECOGNITION_STALE_SECONDS', str(35 * 60)))
+
+# 送交 LLM 前的圖片前處理 (apps/inventory/preprocessing.py)；裁切區域在 FridgeDevice.recognition_crop_box 設定
+LLM_IMAGE_PREPROCESS = os.getenv('LLM_IMAGE_PREPROCESS', 'True') == 'True'
+LLM_IMAGE_MAX_EDGE = int(os.getenv('LLM_IMAGE_MAX_EDGE', '1024'))  # 長邊上限 (像素)，0 表示不縮放
+LLM_IMAGE_JPEG_QUALITY = int(os.getenv('LLM_IMAGE_JPEG_QUALITY', '80'))
+LLM_IMAGE_GRAYSCALE = os.getenv('LLM_IMAGE_GRAYSCALE', 'False') == 'True'
+
+# 以圖片 SHA-256、模型與提示詞版本為鍵的辨識結果快取 (Redis 為主、資料庫為備援)
+RECOGNITION_CACHE_ENABLED = os.getenv('RECOGNITION_CACHE_ENABLED', 'True') == 'True'
+RECOGNITION_CACHE_URL = os.getenv('RECOGNITION_CACHE_URL', 'redis://localhost:6379/1')
+RECOGNITION_CACHE_TTL = int(os.getenv('RECOGNITION_CACHE_TTL', str(7 * 24 * 3600)))  # 秒
+RECOGNITION_CACHE_DB_MAX_ENTRIES = int(os.getenv('RECOGNITION_CACHE_DB_MAX_ENTRIES', '5000'))
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    # 照片簽名網址 (apps/photos/presign.py)，每個行程各自簽名與快取
+    'photo_urls': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'photo-urls',
+        'TIMEOUT': PHOTO_URL_CACHE_TTL,
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.getenv('PHOTO_URL_CACHE_MAX_ENTRIES', '20000')),
+        },
+    },
+    'devices': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': DEVICE_STATS_CACHE_URL,
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'socket_connect_timeout': 1,
+            'socket_timeout': 1,
+        },
+    },
+    # Redis 端請設定 maxmemory 與 maxmemory-policy allkeys-lru 以 LRU 淘汰
+    'recognition': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': RECOGNITION_CACHE_URL,
+        'TIMEOUT': RECOGNITION_CACHE_TTL,
+        'OPTIONS': {
+            'socket_connect_timeout': 1,
+            'socket_timeout': 1,
+        },
+    },
+}
+
+# 冰箱內容未改變時沿用上一張照片的辨識結果 (以 dHash 漢明距離判斷)
+PHOTO_DEDUPE_ENABLED = os.getenv('PHOTO_DEDUPE_ENABLED', 'True') == 'True'
+PHOTO_DEDUPE_MAX_DISTANCE = int(os.getenv('PHOTO_DEDUPE_MAX_DISTANCE', '4'))  # 0~64，距離不超過此值視為相同
+
+# 放入物品時與上一張已辨識照片比對，只把變化的區域送交 LLM
+FRAME_DIFF_ENABLED = os.getenv('FRAME_DIFF_ENABLED', 'True') == 'True'
+FRAME_DIFF_GRID = int(os.getenv('FRAME_DIFF_GRID', '32'))  # 長邊切成幾格比對
+FRAME_DIFF_THRESHOLD = float(os.getenv('FRAME_DIFF_THRESHOLD', '24'))  # 0~255，格子平均灰階差超過此值視為有變化
+FRAME_DIFF_MAX_CHANGED_RATIO = float(os.getenv('FRAME_DIFF_MAX_CHANGED_RATIO', '0.4'))  # 變化格比例超過時改送整張照片
 
 # Authentication settings
 LOGIN_URL = 'users:login'
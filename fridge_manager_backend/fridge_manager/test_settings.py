@@ -0,0 +1,51 @@
+"""
+測試用設定：SQLite、記憶體快取與 Celery eager 模式，不需要 PostgreSQL、Redis 或 S3
+
+    python manage.py test --settings=fridge_manager.test_settings
+
+S3 儲存後端在各測試中以 mock 取代，不會發出網路請求。
+"""
+import os
+
+os.environ.setdefault('AWS_STORAGE_BUCKET_NAME', 'test-bucket')
+os.environ.setdefault('AWS_S3_REGION_NAME', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'test')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'test')
+
+from .settings import *  # noqa: E402, F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+# 'devices' 與 'recognition' 改用行程內快取，跨行程計數器在測試中仍可讀寫
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'devices': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'devices',
+    },
+    'photo_urls': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'photo-urls',
+    },
+    'recognition': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recognition',
+    },
+}
+
+CELERY_BROKER_URL = 'memory://'
+CELERY_TASK_ALWAYS_EAGER = True
+CELERY_TASK_EAGER_PROPAGATES = True
+
+LMSTUDIO_BACKENDS = []
+LMSTUDIO_HEALTH_INTERVAL = 0  # 不啟動背景健康檢查執行緒
+RECOGNITION_EXECUTOR = 'celery'
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']